@@ -1,5 +1,7 @@
 from deepseek_client import DeepSeekClient
+from stage_timer import span, in_current_context
 from typing import Dict, Any
+import concurrent.futures
 import time
 
 class StockAnalysisAgents:
@@ -435,40 +437,61 @@ class StockAnalysisAgents:
         print(f"📋 参与分析的分析师: {', '.join(active_analysts)}")
         print("=" * 50)
         
-        # 并行运行各个分析师
-        agents_results = {}
+        # 并行运行各个分析师（LLM并发数受 deepseek_client.llm_semaphore 全局限制）
+        analyst_tasks = {}
         
         # 技术面分析
         if enabled_analysts.get('technical', True):
-            agents_results["technical"] = self.technical_analyst_agent(stock_info, stock_data, indicators)
+            analyst_tasks["technical"] = lambda: self.technical_analyst_agent(stock_info, stock_data, indicators)
         
         # 基本面分析
         if enabled_analysts.get('fundamental', True):
-            agents_results["fundamental"] = self.fundamental_analyst_agent(stock_info, financial_data, quarterly_data)
+            analyst_tasks["fundamental"] = lambda: self.fundamental_analyst_agent(stock_info, financial_data, quarterly_data)
         
         # 资金面分析（传入资金流向数据）
         if enabled_analysts.get('fund_flow', True):
-            agents_results["fund_flow"] = self.fund_flow_analyst_agent(stock_info, indicators, fund_flow_data)
+            analyst_tasks["fund_flow"] = lambda: self.fund_flow_analyst_agent(stock_info, indicators, fund_flow_data)
         
         # 风险管理分析（传入风险数据）
         if enabled_analysts.get('risk', True):
-            agents_results["risk_management"] = self.risk_management_agent(stock_info, indicators, risk_data)
+            analyst_tasks["risk_management"] = lambda: self.risk_management_agent(stock_info, indicators, risk_data)
         
         # 市场情绪分析（传入市场情绪数据）
         if enabled_analysts.get('sentiment', False):
-            agents_results["market_sentiment"] = self.market_sentiment_agent(stock_info, sentiment_data)
+            analyst_tasks["market_sentiment"] = lambda: self.market_sentiment_agent(stock_info, sentiment_data)
         
         # 新闻分析（传入新闻数据）
         if enabled_analysts.get('news', False):
-            agents_results["news"] = self.news_analyst_agent(stock_info, news_data)
+            analyst_tasks["news"] = lambda: self.news_analyst_agent(stock_info, news_data)
+        
+        agents_results = {}
+        if analyst_tasks:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(analyst_tasks)) as executor:
+                futures = {
+                    key: executor.submit(in_current_context(self._timed_task), key, task)
+                    for key, task in analyst_tasks.items()
+                }
+                # 按分析师顺序收集结果，保持报告顺序稳定
+                for key, future in futures.items():
+                    agents_results[key] = future.result()
         
         print("✅ 所有已选择的分析师完成分析")
         print("=" * 50)
         
         return agents_results
     
-    def conduct_team_discussion(self, agents_results: Dict[str, Any], stock_info: Dict) -> str:
-        """进行团队讨论"""
+    @staticmethod
+    def _timed_task(key, task):
+        """在分析师线程中运行任务，并计入当前流程的耗时统计"""
+        with span(f"agent:{key}", 'agent'):
+            return task()
+    
+    def conduct_team_discussion(self, agents_results: Dict[str, Any], stock_info: Dict, on_delta=None) -> str:
+        """进行团队讨论
+        
+        Args:
+            on_delta: 流式输出回调 on_delta(类型, 增量文本)，为None时使用非流式调用
+        """
         print("🤝 分析团队正在进行综合讨论...")
         time.sleep(2)
         
@@ -529,17 +552,24 @@ class StockAnalysisAgents:
             {"role": "user", "content": discussion_prompt}
         ]
         
-        discussion_result = self.deepseek_client.call_api(messages, max_tokens=6000)
+        if on_delta:
+            discussion_result = self.deepseek_client.call_api_streaming(messages, on_delta, max_tokens=6000)
+        else:
+            discussion_result = self.deepseek_client.call_api(messages, max_tokens=6000)
         
         print("✅ 团队讨论完成")
         return discussion_result
     
-    def make_final_decision(self, discussion_result: str, stock_info: Dict, indicators: Dict) -> Dict[str, Any]:
-        """制定最终投资决策"""
+    def make_final_decision(self, discussion_result: str, stock_info: Dict, indicators: Dict, on_delta=None) -> Dict[str, Any]:
+        """制定最终投资决策
+        
+        Args:
+            on_delta: 流式输出回调 on_delta(类型, 增量文本)，为None时使用非流式调用
+        """
         print("📋 正在制定最终投资决策...")
         time.sleep(1)
         
-        decision = self.deepseek_client.final_decision(discussion_result, stock_info, indicators)
+        decision = self.deepseek_client.final_decision(discussion_result, stock_info, indicators, on_delta=on_delta)
         
         print("✅ 最终投资决策完成")
         return decision
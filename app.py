@@ -16,6 +16,8 @@ from monitor_manager import display_monitor_manager, get_monitor_summary
 from monitor_service import monitor_service
 from notification_service import notification_service
 from config_manager import config_manager
+from config import ANALYSIS_MAX_WORKERS
+from stage_timer import PipelineTrace, span, in_current_context, stage_timing_db
 from main_force_ui import display_main_force_selector
 from sector_strategy_ui import display_sector_strategy
 from longhubang_ui import display_longhubang
@@ -714,8 +716,9 @@ def get_stock_data(symbol, period):
     if isinstance(stock_data, dict) and "error" in stock_data:
         return stock_info, None, None
     
+    # 图表需要完整的指标列；最新指标从该股票的增量状态读取（单股分析、批量/定时分析、结果回显都经由此处）
     stock_data_with_indicators = fetcher.calculate_technical_indicators(stock_data)
-    indicators = fetcher.get_latest_indicators(stock_data_with_indicators)
+    indicators = fetcher.get_latest_indicators(stock_data_with_indicators, symbol=symbol)
     
     return stock_info, stock_data_with_indicators, indicators
 
@@ -761,6 +764,96 @@ def parse_stock_list(stock_input):
     
     return unique_list
 
+# 各数据源的超时时间（秒），从并发获取开始计时
+DATA_SOURCE_TIMEOUTS = {
+    'financial_data': 60,
+    'quarterly_data': 60,
+    'fund_flow_data': 30,
+    'sentiment_data': 60,
+    'news_data': 30,
+    'risk_data': 60
+}
+
+def gather_analysis_data(symbol, stock_data, enabled_analysts_config):
+    """并发获取分析所需的各项数据（扇出/扇入）
+    
+    各数据源相互独立，同时发起请求，总耗时约等于最慢的单个数据源。
+    单个数据源失败或超时不影响其他数据源，对应结果为None。
+    
+    Args:
+        symbol: 股票代码
+        stock_data: 历史行情数据（市场情绪计算ARBR时使用）
+        enabled_analysts_config: 分析师配置字典
+    
+    Returns:
+        tuple: (数据字典, 失败数据源及原因字典)
+    """
+    import concurrent.futures
+    
+    is_chinese_stock = StockDataFetcher()._is_chinese_stock(symbol)
+    
+    def fetch_quarterly():
+        from quarterly_report_data import QuarterlyReportDataFetcher
+        return QuarterlyReportDataFetcher().get_quarterly_reports(symbol)
+    
+    def fetch_fund_flow():
+        from fund_flow_akshare import FundFlowAkshareDataFetcher
+        return FundFlowAkshareDataFetcher().get_fund_flow_data(symbol)
+    
+    def fetch_sentiment():
+        from market_sentiment_data import MarketSentimentDataFetcher
+        return MarketSentimentDataFetcher().get_market_sentiment_data(symbol, stock_data)
+    
+    def fetch_news():
+        from qstock_news_data import QStockNewsDataFetcher
+        return QStockNewsDataFetcher().get_stock_news(symbol)
+    
+    # 财务数据总是获取，其余数据源仅A股且对应分析师启用时获取
+    tasks = {'financial_data': lambda: StockDataFetcher().get_financial_data(symbol)}
+    if is_chinese_stock:
+        if enabled_analysts_config.get('fundamental', True):
+            tasks['quarterly_data'] = fetch_quarterly
+        if enabled_analysts_config.get('fund_flow', True):
+            tasks['fund_flow_data'] = fetch_fund_flow
+        if enabled_analysts_config.get('sentiment', False):
+            tasks['sentiment_data'] = fetch_sentiment
+        if enabled_analysts_config.get('news', False):
+            tasks['news_data'] = fetch_news
+        if enabled_analysts_config.get('risk', True):
+            tasks['risk_data'] = lambda: StockDataFetcher().get_risk_data(symbol)
+    
+    def run_timed(key, task):
+        with span(f"data:{key}", 'data'):
+            return task()
+    
+    results = {key: None for key in DATA_SOURCE_TIMEOUTS}
+    errors = {}
+    
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(tasks))
+    start_time = time.time()
+    try:
+        futures = {
+            key: executor.submit(in_current_context(run_timed), key, task)
+            for key, task in tasks.items()
+        }
+        for key, future in futures.items():
+            timeout = DATA_SOURCE_TIMEOUTS[key]
+            try:
+                results[key] = future.result(timeout=max(0, timeout - (time.time() - start_time)))
+            except concurrent.futures.TimeoutError:
+                errors[key] = f"超时（>{timeout}秒）"
+            except Exception as e:
+                errors[key] = str(e)
+    finally:
+        # 不等待超时的数据源线程结束
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    if errors:
+        print(f"⚠️ {symbol} 部分数据获取失败，使用已获取的数据继续分析: {errors}")
+    print(f"✅ {symbol} 数据获取完成，耗时 {time.time() - start_time:.2f}秒")
+    
+    return results, errors
+
 def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None, selected_model='deepseek-chat'):
     """单个股票分析（用于批量分析）
     
@@ -770,8 +863,16 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
         enabled_analysts_config: 分析师配置字典
         selected_model: 选择的AI模型
     
-    返回分析结果或错误信息
+    返回分析结果或错误信息，timings 字段为各阶段、数据源及LLM调用的耗时明细
     """
+    trace = PipelineTrace('stock_analysis', symbol)
+    with trace.activate():
+        result = _run_single_stock_analysis(symbol, period, enabled_analysts_config, selected_model)
+    result["timings"] = trace.finish(record_id=result.get("record_id"), success=result.get("success", False))
+    return result
+
+def _run_single_stock_analysis(symbol, period, enabled_analysts_config, selected_model):
+    """单个股票分析的具体流程（各阶段计入当前流程的耗时统计）"""
     try:
         # 使用默认配置
         if enabled_analysts_config is None:
@@ -785,7 +886,8 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
             }
         
         # 1. 获取股票数据
-        stock_info, stock_data, indicators = get_stock_data(symbol, period)
+        with span("stock_data"):
+            stock_info, stock_data, indicators = get_stock_data(symbol, period)
         
         if "error" in stock_info:
             return {"symbol": symbol, "error": stock_info['error'], "success": False}
@@ -793,64 +895,15 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
         if stock_data is None:
             return {"symbol": symbol, "error": "无法获取股票历史数据", "success": False}
         
-        # 2. 获取财务数据
-        fetcher = StockDataFetcher()
-        financial_data = fetcher.get_financial_data(symbol)
-        
-        # 2.5 获取季报数据（仅A股）
-        quarterly_data = None
-        enable_fundamental = enabled_analysts_config.get('fundamental', True)
-        if enable_fundamental and fetcher._is_chinese_stock(symbol):
-            try:
-                from quarterly_report_data import QuarterlyReportDataFetcher
-                quarterly_fetcher = QuarterlyReportDataFetcher()
-                quarterly_data = quarterly_fetcher.get_quarterly_reports(symbol)
-            except:
-                pass
-        
-        # 获取分析师选择状态（从参数而不是session_state）
-        enable_fund_flow = enabled_analysts_config.get('fund_flow', True)
-        enable_sentiment = enabled_analysts_config.get('sentiment', False)
-        enable_news = enabled_analysts_config.get('news', False)
-        
-        # 3. 获取资金流向数据（akshare数据源，可选）
-        fund_flow_data = None
-        if enable_fund_flow and fetcher._is_chinese_stock(symbol):
-            try:
-                from fund_flow_akshare import FundFlowAkshareDataFetcher
-                fund_flow_fetcher = FundFlowAkshareDataFetcher()
-                fund_flow_data = fund_flow_fetcher.get_fund_flow_data(symbol)
-            except:
-                pass
-        
-        # 4. 获取市场情绪数据（可选）
-        sentiment_data = None
-        if enable_sentiment and fetcher._is_chinese_stock(symbol):
-            try:
-                from market_sentiment_data import MarketSentimentDataFetcher
-                sentiment_fetcher = MarketSentimentDataFetcher()
-                sentiment_data = sentiment_fetcher.get_market_sentiment_data(symbol, stock_data)
-            except:
-                pass
-        
-        # 5. 获取新闻数据（qstock数据源，可选）
-        news_data = None
-        if enable_news and fetcher._is_chinese_stock(symbol):
-            try:
-                from qstock_news_data import QStockNewsDataFetcher
-                news_fetcher = QStockNewsDataFetcher()
-                news_data = news_fetcher.get_stock_news(symbol)
-            except:
-                pass
-        
-        # 5.5 获取风险数据（限售解禁、大股东减持、重要事件，可选）
-        risk_data = None
-        enable_risk = enabled_analysts_config.get('risk', True)
-        if enable_risk and fetcher._is_chinese_stock(symbol):
-            try:
-                risk_data = fetcher.get_risk_data(symbol)
-            except:
-                pass
+        # 2-5. 并发获取财务、季报、资金流向、市场情绪、新闻、风险数据
+        with span("gather_data"):
+            analysis_data, data_errors = gather_analysis_data(symbol, stock_data, enabled_analysts_config)
+        financial_data = analysis_data['financial_data']
+        quarterly_data = analysis_data['quarterly_data']
+        fund_flow_data = analysis_data['fund_flow_data']
+        sentiment_data = analysis_data['sentiment_data']
+        news_data = analysis_data['news_data']
+        risk_data = analysis_data['risk_data']
         
         # 6. 初始化AI分析系统
         agents = StockAnalysisAgents(model=selected_model)
@@ -859,31 +912,36 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
         enabled_analysts = enabled_analysts_config
         
         # 7. 运行多智能体分析
-        agents_results = agents.run_multi_agent_analysis(
-            stock_info, stock_data, indicators, financial_data, 
-            fund_flow_data, sentiment_data, news_data, quarterly_data, risk_data,
-            enabled_analysts=enabled_analysts_config
-        )
+        with span("agents"):
+            agents_results = agents.run_multi_agent_analysis(
+                stock_info, stock_data, indicators, financial_data, 
+                fund_flow_data, sentiment_data, news_data, quarterly_data, risk_data,
+                enabled_analysts=enabled_analysts_config
+            )
         
         # 8. 团队讨论
-        discussion_result = agents.conduct_team_discussion(agents_results, stock_info)
+        with span("discussion"):
+            discussion_result = agents.conduct_team_discussion(agents_results, stock_info)
         
         # 9. 最终决策
-        final_decision = agents.make_final_decision(discussion_result, stock_info, indicators)
+        with span("final_decision"):
+            final_decision = agents.make_final_decision(discussion_result, stock_info, indicators)
         
         # 保存到数据库
         saved_to_db = False
         db_error = None
+        record_id = None
         try:
-            record_id = db.save_analysis(
-                symbol=stock_info.get('symbol', ''),
-                stock_name=stock_info.get('name', ''),
-                period=period,
-                stock_info=stock_info,
-                agents_results=agents_results,
-                discussion_result=discussion_result,
-                final_decision=final_decision
-            )
+            with span("save"):
+                record_id = db.save_analysis(
+                    symbol=stock_info.get('symbol', ''),
+                    stock_name=stock_info.get('name', ''),
+                    period=period,
+                    stock_info=stock_info,
+                    agents_results=agents_results,
+                    discussion_result=discussion_result,
+                    final_decision=final_decision
+                )
             saved_to_db = True
             print(f"✅ {symbol} 成功保存到数据库，记录ID: {record_id}")
         except Exception as e:
@@ -899,7 +957,9 @@ def analyze_single_stock_for_batch(symbol, period, enabled_analysts_config=None,
             "discussion_result": discussion_result,
             "final_decision": final_decision,
             "saved_to_db": saved_to_db,
-            "db_error": db_error
+            "db_error": db_error,
+            "record_id": record_id,
+            "data_errors": data_errors
         }
         
     except Exception as e:
@@ -955,8 +1015,8 @@ def run_batch_analysis(stock_list, period, batch_mode="顺序分析"):
                     progress_status[0][symbol] = error_result
                 return error_result
         
-        # 使用线程池执行，限制最大并发数为3以避免API限流
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+        # 使用线程池执行，API限流由DeepSeek客户端的全局令牌桶控制
+        with concurrent.futures.ThreadPoolExecutor(max_workers=ANALYSIS_MAX_WORKERS) as executor:
             future_to_symbol = {executor.submit(analyze_with_progress, symbol): symbol 
                               for symbol in stock_list}
             
@@ -1036,6 +1096,40 @@ def run_batch_analysis(stock_list, period, batch_mode="顺序分析"):
     # 自动显示结果
     st.rerun()
 
+class StreamingTextView:
+    """将LLM流式输出实时渲染到页面占位符（作为 on_delta 回调使用）"""
+    
+    def __init__(self, title, refresh_interval=0.2):
+        self.title = title
+        self.refresh_interval = refresh_interval
+        self.placeholder = st.empty()
+        self.reasoning = ""
+        self.content = ""
+        self.last_render = 0
+    
+    def __call__(self, kind, text):
+        if kind == 'reasoning':
+            self.reasoning += text
+        else:
+            self.content += text
+        
+        # 限制刷新频率，避免每个token都重绘页面
+        if time.time() - self.last_render >= self.refresh_interval:
+            self.render()
+    
+    def render(self):
+        self.last_render = time.time()
+        with self.placeholder.container():
+            st.markdown(f"**{self.title}**")
+            if self.reasoning:
+                with st.expander("💭 推理过程", expanded=not self.content):
+                    st.text(self.reasoning)
+            if self.content:
+                st.markdown(self.content)
+    
+    def clear(self):
+        self.placeholder.empty()
+
 def run_stock_analysis(symbol, period):
     """运行股票分析"""
     
@@ -1223,17 +1317,21 @@ def run_stock_analysis(symbol, period):
         # 显示各分析师报告
         display_agents_analysis(agents_results)
         
-        # 8. 团队讨论
+        # 8. 团队讨论（流式显示生成过程）
         status_text.text("🤝 分析团队正在讨论...")
-        discussion_result = agents.conduct_team_discussion(agents_results, stock_info)
+        live_view = StreamingTextView("🤝 团队讨论进行中")
+        discussion_result = agents.conduct_team_discussion(agents_results, stock_info, on_delta=live_view)
+        live_view.clear()
         progress_bar.progress(88)
         
         # 显示团队讨论
         display_team_discussion(discussion_result)
         
-        # 9. 最终决策
+        # 9. 最终决策（流式显示生成过程）
         status_text.text("📋 正在制定最终投资决策...")
-        final_decision = agents.make_final_decision(discussion_result, stock_info, indicators)
+        live_view = StreamingTextView("📋 最终决策生成中")
+        final_decision = agents.make_final_decision(discussion_result, stock_info, indicators, on_delta=live_view)
+        live_view.clear()
         progress_bar.progress(100)
         
         # 显示最终决策
@@ -1607,41 +1705,56 @@ def show_example_interface():
     """)
 
 def display_history_records():
-    """显示历史分析记录"""
+    """显示历史分析记录（按时间倒序分页，筛选在数据库中完成）"""
     st.subheader("📚 历史分析记录")
     
-    # 获取所有记录
-    records = db.get_all_records()
-    
-    if not records:
+    if db.get_record_count() == 0:
         st.info("📭 暂无历史分析记录")
         return
     
-    st.write(f"📊 共找到 {len(records)} 条分析记录")
-    
     # 搜索和筛选
-    col1, col2 = st.columns([3, 1])
+    col1, col2, col3 = st.columns([3, 1, 1])
     with col1:
         search_term = st.text_input("🔍 搜索股票代码或名称", placeholder="输入股票代码或名称进行搜索")
     with col2:
+        rating_filter = st.selectbox("投资评级", ["全部"] + db.get_ratings())
+    with col3:
         st.write("")
         st.write("")
         if st.button("🔄 刷新列表"):
+            st.session_state.history_page_cursors = [None]
             st.rerun()
     
-    # 筛选记录
-    filtered_records = records
-    if search_term:
-        filtered_records = [
-            record for record in records 
-            if search_term.lower() in record['symbol'].lower() or 
-               search_term.lower() in record['stock_name'].lower()
-        ]
+    report_query = st.text_input("📝 搜索报告内容", placeholder="输入主题、风险或关键词（空格分隔多个），在分析师报告和团队讨论中全文搜索")
+    if report_query.strip():
+        display_report_search_results(report_query, search_term.strip() or None)
+        return
+    
+    search_term = search_term.strip() or None
+    rating = None if rating_filter == "全部" else rating_filter
+    
+    # 筛选条件变化时回到第一页；history_page_cursors 保存已访问各页的起始游标
+    if st.session_state.get('history_filter') != (search_term, rating):
+        st.session_state.history_filter = (search_term, rating)
+        st.session_state.history_page_cursors = [None]
+    cursors = st.session_state.setdefault('history_page_cursors', [None])
+    
+    page_size = 20
+    page = db.get_records_page(limit=page_size, cursor=cursors[-1], search=search_term, rating=rating)
+    filtered_records = page['records']
     
     if not filtered_records:
+        if len(cursors) > 1:
+            # 当前页的记录已被删除，回到上一页
+            cursors.pop()
+            st.rerun()
         st.warning("🔍 未找到匹配的记录")
         return
     
+    total = db.count_records(search=search_term, rating=rating)
+    page_no = len(cursors)
+    st.write(f"📊 共找到 {total} 条分析记录（第 {page_no}/{max(1, -(-total // page_size))} 页）")
+    
     # 显示记录列表
     for record in filtered_records:
         # 根据评级设置颜色和图标
@@ -1665,6 +1778,10 @@ def display_history_records():
                 st.write(f"**分析时间:** {record['analysis_date']}")
                 st.write(f"**数据周期:** {record['period']}")
                 st.write(f"**投资评级:** **{rating}**")
+                if record.get('confidence') is not None:
+                    st.write(f"**信心度:** {record['confidence']:g}/10")
+                if record.get('target_price') is not None:
+                    st.write(f"**目标价格:** {record['target_price']:g}")
             
             with col3:
                 if st.button("👀 查看详情", key=f"view_{record['id']}"):
@@ -1685,10 +1802,48 @@ def display_history_records():
                     else:
                         st.error("❌ 删除失败")
     
+    # 翻页
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if page_no > 1 and st.button("⬅️ 上一页"):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"第 {page_no} 页")
+    with col_next:
+        if page['next_cursor'] and st.button("下一页 ➡️"):
+            cursors.append(page['next_cursor'])
+            st.rerun()
+    
     # 查看详细记录
     if 'viewing_record_id' in st.session_state:
         display_record_detail(st.session_state.viewing_record_id)
 
+def display_report_search_results(report_query, search=None):
+    """显示报告全文搜索结果（按相关度排序），search 为股票代码或名称关键字"""
+    if not db.fts_enabled:
+        st.warning("⚠️ 当前SQLite不支持FTS5全文索引，无法搜索报告内容")
+        return
+    
+    results = db.search_reports(report_query, limit=50, search=search)
+    if not results:
+        st.warning("🔍 没有报告提及这些关键词")
+        return
+    
+    st.write(f"📊 找到 {len(results)} 条相关分析记录（按相关度排序）")
+    for result in results:
+        st.markdown(f"**{result['stock_name']} ({result['symbol']})** · {result['analysis_date']} · "
+                    f"{result['rating']} · {result['section']}")
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.caption(result['snippet'])
+        with col2:
+            if st.button("👀 查看详情", key=f"search_view_{result['id']}"):
+                st.session_state.viewing_record_id = result['id']
+    
+    if 'viewing_record_id' in st.session_state:
+        display_record_detail(st.session_state.viewing_record_id)
+
 def display_add_to_monitor_dialog(record):
     """显示加入监测的对话框"""
     st.markdown("---")
@@ -2027,6 +2182,48 @@ def display_record_detail(record_id):
             del st.session_state.add_to_monitor_id
         st.rerun()
 
+def display_stage_timing_summary():
+    """显示各分析流程的阶段耗时分布（p50/p95）"""
+    if stage_timing_db is None:
+        return
+    
+    st.markdown("---")
+    st.markdown("### ⏱️ 分析流程耗时统计")
+    
+    pipeline_names = {
+        'stock_analysis': '个股分析',
+        'longhubang': '智瞰龙虎',
+        'sector_strategy': '智策板块',
+        'main_force': '主力选股'
+    }
+    col1, col2 = st.columns(2)
+    with col1:
+        pipeline = st.selectbox(
+            "流程",
+            options=[None] + list(pipeline_names),
+            format_func=lambda x: "全部" if x is None else pipeline_names[x],
+            key="stage_timing_pipeline"
+        )
+    with col2:
+        days = st.number_input("统计最近天数", min_value=1, max_value=365, value=30, key="stage_timing_days")
+    
+    try:
+        summary = stage_timing_db.get_stage_summary(pipeline, int(days))
+    except Exception as e:
+        st.warning(f"读取耗时统计失败: {e}")
+        return
+    
+    if summary.empty:
+        st.info("暂无耗时记录，运行一次分析后再查看")
+        return
+    
+    summary['pipeline'] = summary['pipeline'].map(lambda x: pipeline_names.get(x, x))
+    summary = summary.rename(columns={
+        'pipeline': '流程', 'category': '类别', 'name': '阶段', 'count': '次数',
+        'mean': '平均(秒)', 'p50': 'P50(秒)', 'p95': 'P95(秒)', 'max': '最大(秒)', 'failures': '失败次数'
+    })
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
 def display_config_manager():
     """显示环境配置管理界面"""
     st.subheader("⚙️ 环境配置管理")
@@ -2087,6 +2284,32 @@ def display_config_manager():
         st.session_state.temp_config["DEEPSEEK_BASE_URL"] = new_base_url
         
         st.info("💡 如何获取DeepSeek API密钥？\n\n1. 访问 https://platform.deepseek.com\n2. 注册/登录账号\n3. 进入API密钥管理页面\n4. 创建新的API密钥\n5. 复制密钥并粘贴到上方输入框")
+        
+        # LLM响应缓存统计
+        from deepseek_client import get_llm_cache_stats
+        cache_stats = get_llm_cache_stats()
+        if cache_stats:
+            st.markdown("---")
+            st.markdown("### LLM响应缓存")
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("命中次数", cache_stats['hits'])
+            col2.metric("未命中次数", cache_stats['misses'])
+            col3.metric("命中率", f"{cache_stats['hit_rate']}%")
+            col4.metric("缓存条目", f"{cache_stats['entries']} ({cache_stats['total_bytes'] / 1024 / 1024:.1f}MB)")
+        
+        # 问财查询缓存统计
+        from wencai_cache import get_wencai_cache_stats
+        wencai_stats = get_wencai_cache_stats()
+        if wencai_stats:
+            st.markdown("---")
+            st.markdown("### 问财查询缓存")
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("命中次数", wencai_stats['hits'])
+            col2.metric("未命中次数", wencai_stats['misses'])
+            col3.metric("命中率", f"{wencai_stats['hit_rate']}%")
+            col4.metric("缓存条目", f"{sum(wencai_stats['entries'].values())} ({wencai_stats['total_bytes'] / 1024 / 1024:.1f}MB)")
+        
+        display_stage_timing_summary()
     
     with tab2:
         st.markdown("### Tushare数据接口（可选）")
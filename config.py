@@ -7,6 +7,43 @@ load_dotenv(override=True)
 # DeepSeek API配置
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "")
 DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "6"))  # 全进程同时进行的LLM请求上限
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "120"))  # 每分钟请求数上限（0为不限制）
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))  # 每分钟Token数上限（0为不限制）
+
+# LLM响应缓存（相同输入直接复用之前的完整响应；默认关闭，开启后有效期内重复分析不会得到新的结果）
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))  # 缓存有效期（秒）
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "200"))  # 缓存总大小上限（MB）
+
+# 批量分析的并发股票数（实际吞吐由上面的LLM限流决定）
+ANALYSIS_MAX_WORKERS = max(1, int(os.getenv("ANALYSIS_MAX_WORKERS", "8")))
+
+# 分析流程耗时统计（各阶段、数据源、LLM调用耗时）
+STAGE_TIMING_ENABLED = os.getenv("STAGE_TIMING_ENABLED", "true").lower() == "true"
+STAGE_TIMING_DB_PATH = os.getenv("STAGE_TIMING_DB_PATH", "stage_timings.db")
+
+# 龙虎榜数据接口（StockAPI）请求限制
+LONGHUBANG_REQUESTS_PER_SECOND = float(os.getenv("LONGHUBANG_REQUESTS_PER_SECOND", "40"))  # 接口限制为每秒40次
+LONGHUBANG_MAX_WORKERS = int(os.getenv("LONGHUBANG_MAX_WORKERS", "8"))  # 同时进行的日期请求数
+
+# 智策板块数据源请求限制（按数据源主机分别限流）
+SECTOR_HOST_REQUESTS_PER_SECOND = float(os.getenv("SECTOR_HOST_REQUESTS_PER_SECOND", "2"))
+SECTOR_FETCH_MAX_WORKERS = int(os.getenv("SECTOR_FETCH_MAX_WORKERS", "8"))
+
+# 问财（pywencai）查询缓存（按规范化问句及交易日缓存，同一交易日重复分析不再请求问财）
+WENCAI_CACHE_ENABLED = os.getenv("WENCAI_CACHE_ENABLED", "true").lower() == "true"
+WENCAI_CACHE_PATH = os.getenv("WENCAI_CACHE_PATH", "wencai_cache.db")
+WENCAI_CACHE_TTL = int(os.getenv("WENCAI_CACHE_TTL", "86400"))  # 风险、公告、主力选股查询的有效期（秒）
+WENCAI_NEWS_CACHE_TTL = int(os.getenv("WENCAI_NEWS_CACHE_TTL", "14400"))  # 新闻查询的有效期（秒）
+WENCAI_EMPTY_CACHE_TTL = int(os.getenv("WENCAI_EMPTY_CACHE_TTL", "3600"))  # 无结果查询的有效期上限（秒）
+WENCAI_MAX_CONCURRENCY = int(os.getenv("WENCAI_MAX_CONCURRENCY", "3"))  # 全进程同时进行的问财请求上限
+WENCAI_QUERY_TIMEOUT = int(os.getenv("WENCAI_QUERY_TIMEOUT", "30"))  # 单个风险数据子查询的等待上限（秒）
+
+# 本地SQLite数据库连接（按线程复用连接，启用WAL）
+SQLITE_POOL_ENABLED = os.getenv("SQLITE_POOL_ENABLED", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))  # 数据库被锁定时的等待时间（秒）
 
 # 其他配置
 TUSHARE_TOKEN = os.getenv("TUSHARE_TOKEN", "")
@@ -14,6 +51,12 @@ TUSHARE_TOKEN = os.getenv("TUSHARE_TOKEN", "")
 # 股票数据源配置
 DEFAULT_PERIOD = "1y"  # 默认获取1年数据
 DEFAULT_INTERVAL = "1d"  # 默认日线数据
+SPOT_SNAPSHOT_TTL = int(os.getenv("SPOT_SNAPSHOT_TTL", "30"))  # 全市场实时行情快照有效期（秒）
+
+# 本地日K线存储配置
+OHLCV_CACHE_ENABLED = os.getenv("OHLCV_CACHE_ENABLED", "true").lower() == "true"
+OHLCV_STORE_PATH = os.getenv("OHLCV_STORE_PATH", "ohlcv_cache.db")
+OHLCV_REFRESH_TTL = int(os.getenv("OHLCV_REFRESH_TTL", "300"))  # 当日K线的刷新间隔（秒）
 
 # MiniQMT量化交易配置
 MINIQMT_CONFIG = {
@@ -4,9 +4,13 @@
 """
 
 import os
+import time
 import pandas as pd
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from config import OHLCV_CACHE_ENABLED, OHLCV_STORE_PATH, OHLCV_REFRESH_TTL
+from ohlcv_store import OHLCVStore
+from spot_snapshot import spot_snapshot
 
 # 加载环境变量
 load_dotenv()
@@ -33,16 +37,25 @@ class DataSourceManager:
                 self.tushare_available = False
         else:
             print("ℹ️ 未配置Tushare Token，将仅使用Akshare数据源")
+        
+        # 初始化本地日K线存储
+        self.ohlcv_store = None
+        if OHLCV_CACHE_ENABLED:
+            try:
+                self.ohlcv_store = OHLCVStore(OHLCV_STORE_PATH)
+            except Exception as e:
+                print(f"⚠️ 本地日K线存储初始化失败: {e}")
     
-    def get_stock_hist_data(self, symbol, start_date=None, end_date=None, adjust='qfq'):
+    def get_stock_hist_data(self, symbol, start_date=None, end_date=None, adjust='qfq', use_cache=True):
         """
-        获取股票历史数据（优先akshare，失败时使用tushare）
+        获取股票历史数据（优先本地存储，缺失区间从akshare获取，失败时使用tushare）
         
         Args:
             symbol: 股票代码（6位数字）
             start_date: 开始日期（格式：'20240101'或'2024-01-01'）
             end_date: 结束日期
             adjust: 复权类型（'qfq'前复权, 'hfq'后复权, ''不复权）
+            use_cache: 是否使用本地日K线存储
             
         Returns:
             DataFrame: 包含日期、开盘、收盘、最高、最低、成交量等列
@@ -55,6 +68,94 @@ class DataSourceManager:
         else:
             end_date = datetime.now().strftime('%Y%m%d')
         
+        if use_cache and self.ohlcv_store is not None:
+            try:
+                return self._get_stock_hist_data_cached(symbol, start_date or '19700101', end_date, adjust)
+            except Exception as e:
+                print(f"[本地存储] ❌ 读取失败，直接从数据源获取: {e}")
+        
+        return self._fetch_stock_hist_data(symbol, start_date, end_date, adjust)
+    
+    def _get_stock_hist_data_cached(self, symbol, start_date, end_date, adjust):
+        """
+        从本地存储读取历史数据，只从数据源补齐缺失的日期区间
+        
+        前复权数据在除权除息后整段历史都会变化：补数据时会重新获取锚点日（上次写入时已收盘的
+        最后一根K线），若其收盘价与本地不一致，说明复权因子已变化，整只股票的分区作废并重新下载。
+        """
+        store = self.ohlcv_store
+        today = datetime.now().strftime('%Y%m%d')
+        covered_end = min(end_date, today)
+        partition = store.get_partition(symbol, adjust)
+        
+        if partition is None:
+            if not self._refill_hist_partition(symbol, start_date, end_date, adjust):
+                return None
+            return self._load_cached_hist(symbol, start_date, end_date, adjust)
+        
+        range_start = partition['range_start']
+        range_end = partition['range_end']
+        anchor_date = partition['anchor_date']
+        
+        # 头部缺口：请求起始日早于已覆盖区间，重叠获取到本地第一根K线以校验复权
+        if start_date < range_start:
+            first_date = store.get_first_bar_date(symbol, adjust) or range_start
+            print(f"[本地存储] {symbol} 补齐头部缺口 {start_date} - {first_date}")
+            df = self._fetch_stock_hist_data(symbol, start_date, first_date, adjust)
+            if df is not None:
+                if anchor_date and first_date <= anchor_date and \
+                        self._adjustment_changed(df, first_date, store.get_bar_close(symbol, adjust, first_date)):
+                    self._refill_hist_partition(symbol, start_date, max(end_date, range_end), adjust)
+                    return self._load_cached_hist(symbol, start_date, end_date, adjust)
+                range_start = start_date
+                store.save_bars(symbol, adjust, df, range_start, range_end)
+        
+        # 尾部缺口：新交易日，或当日K线超过刷新间隔
+        stale = time.time() - partition['updated_at'] > OHLCV_REFRESH_TTL
+        if end_date > range_end or (end_date >= today and stale):
+            fetch_start = anchor_date or range_end
+            print(f"[本地存储] {symbol} 补齐尾部缺口 {fetch_start} - {end_date}")
+            df = self._fetch_stock_hist_data(symbol, fetch_start, end_date, adjust)
+            if df is not None:
+                if anchor_date and \
+                        self._adjustment_changed(df, anchor_date, store.get_bar_close(symbol, adjust, anchor_date)):
+                    self._refill_hist_partition(symbol, min(start_date, range_start), end_date, adjust)
+                    return self._load_cached_hist(symbol, start_date, end_date, adjust)
+                store.save_bars(symbol, adjust, df, range_start, max(range_end, covered_end))
+        
+        return self._load_cached_hist(symbol, start_date, end_date, adjust)
+    
+    def _load_cached_hist(self, symbol, start_date, end_date, adjust):
+        """从本地存储读取区间数据，无数据时返回None"""
+        df = self.ohlcv_store.load_bars(symbol, adjust, start_date, end_date)
+        if df.empty:
+            return None
+        print(f"[本地存储] ✅ {symbol} 返回 {len(df)} 条数据")
+        return df
+    
+    def _refill_hist_partition(self, symbol, start_date, end_date, adjust):
+        """整段下载并重建本地分区，返回是否成功"""
+        self.ohlcv_store.invalidate(symbol, adjust)
+        df = self._fetch_stock_hist_data(symbol, start_date, end_date, adjust)
+        if df is None:
+            return False
+        self.ohlcv_store.save_bars(symbol, adjust, df, start_date, min(end_date, datetime.now().strftime('%Y%m%d')))
+        return True
+    
+    def _adjustment_changed(self, df, date, cached_close):
+        """比较新获取数据与本地数据在同一日期的收盘价，判断复权因子是否变化"""
+        if cached_close is None:
+            return False
+        matched = df[df['date'] == pd.to_datetime(date, format='%Y%m%d')]
+        if matched.empty:
+            return False
+        changed = abs(float(matched['close'].iloc[0]) - cached_close) > 1e-6
+        if changed:
+            print(f"[本地存储] ⚠️ {date} 收盘价与本地不一致，复权因子已变化，重新下载")
+        return changed
+    
+    def _fetch_stock_hist_data(self, symbol, start_date, end_date, adjust):
+        """从数据源获取历史数据（优先akshare，失败时使用tushare），日期格式为YYYYMMDD"""
         # 优先使用akshare
         try:
             import akshare as ak
@@ -219,14 +320,11 @@ class DataSourceManager:
         
         # 优先使用akshare
         try:
-            import akshare as ak
             print(f"[Akshare] 正在获取 {symbol} 的实时行情...")
             
-            df = ak.stock_zh_a_spot_em()
-            stock_df = df[df['代码'] == symbol]
+            row = spot_snapshot.get_a_row(symbol)
             
-            if not stock_df.empty:
-                row = stock_df.iloc[0]
+            if row is not None:
                 quotes = {
                     'symbol': symbol,
                     'name': row['名称'],
@@ -1,7 +1,33 @@
-import sqlite3
 import json
+import re
 from datetime import datetime
 import os
+from sqlite_pool import get_connection
+
+# 历史记录列表使用的摘要列（与 analysis_record_summary 表的列顺序一致）
+SUMMARY_COLUMNS = ['id', 'symbol', 'stock_name', 'analysis_date', 'period', 'rating', 'confidence',
+                   'target_price', 'entry_min', 'entry_max', 'take_profit', 'stop_loss', 'created_at']
+
+# 报告全文索引中每条记录占用的rowid区间：rowid = 记录ID * REPORT_ROWID_SPAN + 报告序号
+REPORT_ROWID_SPAN = 1000
+
+_CJK_RUN = re.compile(r'([\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)')
+
+
+def segment_text(text):
+    """
+    将文本切分为全文索引的词元：连续的汉字切成相互重叠的二字词（"商誉减值" -> "商誉 誉减 减值"），
+    其余文本原样保留，由FTS5的unicode61分词器按空格和标点切分
+    """
+    parts = []
+    for i, part in enumerate(_CJK_RUN.split(text)):
+        if i % 2 == 0:
+            parts.append(part)
+        elif len(part) == 1:
+            parts.append(f" {part} ")
+        else:
+            parts.append(' ' + ' '.join(part[j:j + 2] for j in range(len(part) - 1)) + ' ')
+    return ''.join(parts)
 
 class StockAnalysisDatabase:
     def __init__(self, db_path="stock_analysis.db"):
@@ -15,7 +41,7 @@ class StockAnalysisDatabase:
     
     def init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 创建分析记录表
@@ -34,12 +60,177 @@ class StockAnalysisDatabase:
             )
         ''')
         
+        # 历史记录摘要表：评级、信心度及关键价位拆成独立的列，列表查询不必读取和解析JSON
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_record_summary (
+                id INTEGER PRIMARY KEY,
+                symbol TEXT NOT NULL,
+                stock_name TEXT,
+                analysis_date TEXT NOT NULL,
+                period TEXT,
+                rating TEXT,
+                confidence REAL,
+                target_price REAL,
+                entry_min REAL,
+                entry_max REAL,
+                take_profit REAL,
+                stop_loss REAL,
+                created_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_summary_created ON analysis_record_summary(created_at, id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_summary_symbol ON analysis_record_summary(symbol, created_at)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_summary_rating ON analysis_record_summary(rating, created_at)
+        ''')
+        
+        # 为升级前保存的记录补建摘要（之后每条记录保存时同时写入摘要，只需比较最大ID）
+        cursor.execute('''
+            SELECT id, symbol, stock_name, analysis_date, period, final_decision, created_at
+            FROM analysis_records
+            WHERE id > (SELECT COALESCE(MAX(id), 0) FROM analysis_record_summary)
+        ''')
+        rows = [
+            self._summary_row(record[0], record[1], record[2], record[3], record[4],
+                              self._load_json(record[5]), record[6])
+            for record in cursor.fetchall()
+        ]
+        if rows:
+            cursor.executemany(self._INSERT_SUMMARY, rows)
+            print(f"[OK] 已为 {len(rows)} 条历史分析记录建立摘要")
+        
         conn.commit()
+        
+        # 分析师报告及团队讨论的全文索引（terms 为按 segment_text 切分后的正文，content 保存原文用于展示）
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS analysis_report_fts
+                USING fts5(section UNINDEXED, content UNINDEXED, terms)
+            ''')
+            self.fts_enabled = True
+        except Exception as e:
+            self.fts_enabled = False
+            print(f"[WARN] 当前SQLite不支持FTS5全文索引，报告搜索不可用: {e}")
+        
+        if self.fts_enabled:
+            self._backfill_report_index(conn)
+        
         conn.close()
     
+    def _backfill_report_index(self, conn):
+        """为升级前保存的记录建立报告全文索引（按批读取，避免一次载入全部报告）"""
+        cursor = conn.cursor()
+        cursor.execute('SELECT COALESCE(MAX(rowid), -1) FROM analysis_report_fts')
+        last_id = cursor.fetchone()[0] // REPORT_ROWID_SPAN
+        
+        indexed = 0
+        while True:
+            cursor.execute('''
+                SELECT id, agents_results, discussion_result FROM analysis_records
+                WHERE id > ? ORDER BY id LIMIT 500
+            ''', (last_id,))
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            rows = []
+            for record_id, agents_results, discussion_result in batch:
+                rows.extend(self._report_rows(record_id, self._load_json(agents_results),
+                                              self._load_json(discussion_result)))
+            cursor.executemany('INSERT INTO analysis_report_fts (rowid, section, content, terms) VALUES (?, ?, ?, ?)', rows)
+            conn.commit()
+            last_id = batch[-1][0]
+            indexed += len(batch)
+        
+        if indexed:
+            print(f"[OK] 已为 {indexed} 条历史分析记录建立报告全文索引")
+    
+    @staticmethod
+    def _report_sections(agents_results, discussion_result):
+        """提取报告正文：[(分析师名称或"团队讨论", 正文)]"""
+        sections = []
+        if isinstance(agents_results, dict):
+            for agent_key, agent_result in agents_results.items():
+                if isinstance(agent_result, dict):
+                    text = agent_result.get('analysis')
+                    name = agent_result.get('agent_name') or agent_key
+                else:
+                    text, name = agent_result, agent_key
+                if isinstance(text, str) and text.strip():
+                    sections.append((str(name), text))
+        
+        if isinstance(discussion_result, dict):
+            discussion_result = "\n".join(v for v in discussion_result.values() if isinstance(v, str))
+        if isinstance(discussion_result, str) and discussion_result.strip():
+            sections.append(("团队讨论", discussion_result))
+        return sections
+    
+    @classmethod
+    def _report_rows(cls, record_id, agents_results, discussion_result):
+        """生成报告全文索引的行 (rowid, section, content, terms)"""
+        sections = cls._report_sections(agents_results, discussion_result)[:REPORT_ROWID_SPAN]
+        return [
+            (record_id * REPORT_ROWID_SPAN + i, section, text, segment_text(text))
+            for i, (section, text) in enumerate(sections)
+        ]
+    
+    _INSERT_SUMMARY = f'''
+        INSERT OR REPLACE INTO analysis_record_summary ({', '.join(SUMMARY_COLUMNS)})
+        VALUES ({', '.join('?' * len(SUMMARY_COLUMNS))})
+    '''
+    
+    @staticmethod
+    def _load_json(text):
+        """解析JSON字段，无法解析时返回空字典"""
+        if not text:
+            return {}
+        try:
+            return json.loads(text)
+        except (TypeError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _parse_numbers(value):
+        """提取文本中的数字（如 "¥10.5-12.0元" -> [10.5, 12.0]）"""
+        if value is None:
+            return []
+        if isinstance(value, (int, float)):
+            return [float(value)]
+        return [float(n) for n in re.findall(r'\d+\.?\d*', str(value))]
+    
+    @classmethod
+    def _summary_row(cls, record_id, symbol, stock_name, analysis_date, period, final_decision, created_at):
+        """由分析记录生成摘要行"""
+        if not isinstance(final_decision, dict):
+            final_decision = {}
+        
+        def first_number(key):
+            numbers = cls._parse_numbers(final_decision.get(key))
+            return numbers[0] if numbers else None
+        
+        entry = cls._parse_numbers(final_decision.get('entry_range'))
+        return (
+            record_id,
+            symbol,
+            stock_name,
+            analysis_date,
+            period,
+            final_decision.get('rating', '未知') or '未知',
+            first_number('confidence_level'),
+            first_number('target_price'),
+            entry[0] if entry else None,
+            entry[1] if len(entry) >= 2 else (entry[0] if entry else None),
+            first_number('take_profit'),
+            first_number('stop_loss'),
+            created_at
+        )
+    
     def save_analysis(self, symbol, stock_name, period, stock_info, agents_results, discussion_result, final_decision):
         """保存分析记录到数据库"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 准备数据
@@ -57,50 +248,223 @@ class StockAnalysisDatabase:
             (symbol, stock_name, analysis_date, period, stock_info, agents_results, discussion_result, final_decision, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (symbol, stock_name, analysis_date, period, stock_info_json, agents_results_json, discussion_result_json, final_decision_json, created_at))
+        record_id = cursor.lastrowid
+        
+        # 同一事务中写入摘要及报告全文索引
+        cursor.execute(self._INSERT_SUMMARY, self._summary_row(
+            record_id, symbol, stock_name, analysis_date, period, final_decision, created_at
+        ))
+        if self.fts_enabled:
+            cursor.executemany(
+                'INSERT INTO analysis_report_fts (rowid, section, content, terms) VALUES (?, ?, ?, ?)',
+                self._report_rows(record_id, agents_results, discussion_result)
+            )
         
         conn.commit()
         conn.close()
         
-        return cursor.lastrowid
+        return record_id
     
     def get_all_records(self):
-        """获取所有分析记录"""
-        conn = sqlite3.connect(self.db_path)
+        """获取所有分析记录（摘要）"""
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT id, symbol, stock_name, analysis_date, period, final_decision, created_at
-            FROM analysis_records 
-            ORDER BY created_at DESC
+        cursor.execute(f'''
+            SELECT {', '.join(SUMMARY_COLUMNS)}
+            FROM analysis_record_summary
+            ORDER BY created_at DESC, id DESC
         ''')
         
         records = cursor.fetchall()
         conn.close()
         
-        result = []
-        for record in records:
-            # 解析final_decision获取评级
-            final_decision = json.loads(record[5]) if record[5] else {}
-            rating = final_decision.get('rating', '未知') if isinstance(final_decision, dict) else '未知'
+        return [dict(zip(SUMMARY_COLUMNS, record)) for record in records]
+    
+    @staticmethod
+    def _like_pattern(text):
+        """生成包含 text 的 LIKE 模式（转义 % 和 _，配合 ESCAPE '\\' 使用）"""
+        return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    
+    @staticmethod
+    def _filter_clause(search=None, rating=None):
+        """生成历史记录筛选条件（股票代码/名称模糊匹配、评级）"""
+        conditions = []
+        params = []
+        if search:
+            pattern = StockAnalysisDatabase._like_pattern(search.strip())
+            conditions.append("(symbol LIKE ? ESCAPE '\\' OR stock_name LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        if rating:
+            conditions.append('rating = ?')
+            params.append(rating)
+        return conditions, params
+    
+    def get_records_page(self, limit=20, cursor=None, search=None, rating=None):
+        """
+        按时间倒序分页获取分析记录摘要（键集分页，翻页耗时与页码无关）
+        
+        Args:
+            limit: 每页记录数
+            cursor: 上一页返回的 next_cursor，None 表示第一页
+            search: 股票代码或名称关键字（不区分大小写的模糊匹配）
+            rating: 投资评级
             
-            result.append({
-                'id': record[0],
-                'symbol': record[1],
-                'stock_name': record[2],
-                'analysis_date': record[3],
-                'period': record[4],
-                'rating': rating,
-                'created_at': record[6]
-            })
-        
-        return result
+        Returns:
+            dict: records 为本页记录；next_cursor 为下一页的游标，没有下一页时为 None
+        """
+        conditions, params = self._filter_clause(search, rating)
+        if cursor:
+            conditions.append('(created_at, id) < (?, ?)')
+            params.extend([cursor[0], cursor[1]])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = get_connection(self.db_path)
+        db_cursor = conn.cursor()
+        db_cursor.execute(f'''
+            SELECT {', '.join(SUMMARY_COLUMNS)}
+            FROM analysis_record_summary
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', params + [limit + 1])
+        rows = db_cursor.fetchall()
+        conn.close()
+        
+        records = [dict(zip(SUMMARY_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = (records[-1]['created_at'], records[-1]['id'])
+        return {'records': records, 'next_cursor': next_cursor}
+    
+    def count_records(self, search=None, rating=None):
+        """统计符合筛选条件的记录数"""
+        conditions, params = self._filter_clause(search, rating)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        conn = get_connection(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT COUNT(*) FROM analysis_record_summary {where}', params)
+        count = cursor.fetchone()[0]
+        conn.close()
+        
+        return count
+    
+    def get_ratings(self):
+        """获取历史记录中出现过的全部评级"""
+        conn = get_connection(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT rating FROM analysis_record_summary WHERE rating IS NOT NULL ORDER BY rating')
+        ratings = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        
+        return ratings
+    
+    @staticmethod
+    def _make_snippet(text, terms, width=40):
+        """截取首个关键词附近的正文，并用【】标出关键词"""
+        lower = text.lower()
+        positions = [lower.find(term.lower()) for term in terms]
+        positions = [p for p in positions if p >= 0]
+        start = max(0, min(positions) - width) if positions else 0
+        snippet = text[start:start + width * 3]
+        for term in sorted(terms, key=len, reverse=True):
+            snippet = re.sub(re.escape(term), lambda m: f"【{m.group(0)}】", snippet, flags=re.IGNORECASE)
+        return ('...' if start > 0 else '') + snippet + ('...' if start + width * 3 < len(text) else '')
+    
+    def search_reports(self, query, limit=20, search=None):
+        """
+        在分析师报告及团队讨论中全文搜索，按相关度（BM25）排序
+        
+        多个关键词以空格分隔，需同时出现在同一份报告中。汉字按二字词建立索引，
+        两个字及以上的连续汉字都走索引；含单个汉字的关键词（如"股"、"A股"、"5G板"）
+        先用其余部分在索引中缩小范围，再逐行匹配原文。
+        
+        Args:
+            query: 搜索关键词
+            limit: 返回的记录数上限（每条分析记录只返回最相关的一份报告）
+            search: 只搜索股票代码或名称包含该关键字的记录（与 get_records_page 的 search 相同）
+            
+        Returns:
+            list: [{'id', 'symbol', 'stock_name', 'analysis_date', 'rating', 'section', 'snippet', 'score'}]
+        """
+        terms = [t for t in (query or '').replace('"', ' ').split() if re.search(r'\w', t)]
+        if not terms or not self.fts_enabled:
+            return []
+        
+        phrases = []
+        scan_terms = []
+        for term in terms:
+            parts = _CJK_RUN.split(term)
+            if not any(len(part) == 1 for part in parts[1::2]):
+                phrases.append('"' + ' '.join(segment_text(term).split()) + '"')
+                continue
+            # 单个汉字在索引中只出现在二字词里，无法按词组匹配
+            scan_terms.append(term)
+            for i, part in enumerate(parts):
+                if i % 2 == 0 or len(part) > 1:
+                    phrases.extend('"' + token + '"' for token in segment_text(part).split() if re.search(r'\w', token))
+        
+        conditions = []
+        params = []
+        if phrases:
+            conditions.append('analysis_report_fts MATCH ?')
+            params.append(' AND '.join(phrases))
+        for term in scan_terms:
+            conditions.append("content LIKE ? ESCAPE '\\'")
+            params.append(self._like_pattern(term))
+        record_conditions, record_params = self._filter_clause(search)
+        if record_conditions:
+            conditions.append(f'''rowid / {REPORT_ROWID_SPAN} IN (
+                SELECT id FROM analysis_record_summary WHERE {' AND '.join(record_conditions)})''')
+            params.extend(record_params)
+        
+        if phrases:
+            select = 'rowid, section, content, bm25(analysis_report_fts)'
+            order = 'ORDER BY rank'
+        else:
+            select = 'rowid, section, content, 0'
+            order = 'ORDER BY rowid DESC'
+        
+        conn = get_connection(self.db_path)
+        cursor = conn.cursor()
+        # 同一记录可能有多份报告命中，多取一些再按记录去重
+        cursor.execute(f'''
+            SELECT {select} FROM analysis_report_fts
+            WHERE {' AND '.join(conditions)}
+            {order}
+            LIMIT ?
+        ''', params + [limit * 5])
+        
+        hits = {}
+        for rowid, section, text, score in cursor.fetchall():
+            record_id = rowid // REPORT_ROWID_SPAN
+            if record_id in hits:
+                continue
+            hits[record_id] = {'id': record_id, 'section': section,
+                               'snippet': self._make_snippet(text, terms), 'score': -score}
+            if len(hits) >= limit:
+                break
+        
+        if hits:
+            placeholders = ', '.join('?' * len(hits))
+            cursor.execute(f'''
+                SELECT id, symbol, stock_name, analysis_date, rating FROM analysis_record_summary
+                WHERE id IN ({placeholders})
+            ''', list(hits))
+            for record_id, symbol_, stock_name, analysis_date, rating in cursor.fetchall():
+                hits[record_id].update(symbol=symbol_, stock_name=stock_name,
+                                       analysis_date=analysis_date, rating=rating)
+        conn.close()
+        
+        return [hit for hit in hits.values() if 'symbol' in hit]
     
     def get_record_count(self):
         """获取记录总数"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT COUNT(*) FROM analysis_records')
+        cursor.execute('SELECT COUNT(*) FROM analysis_record_summary')
         count = cursor.fetchone()[0]
         conn.close()
         
@@ -108,7 +472,7 @@ class StockAnalysisDatabase:
     
     def get_record_by_id(self, record_id):
         """根据ID获取详细分析记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -137,25 +501,112 @@ class StockAnalysisDatabase:
     
     def delete_record(self, record_id):
         """删除指定记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM analysis_records WHERE id = ?', (record_id,))
+        deleted = cursor.rowcount > 0
+        cursor.execute('DELETE FROM analysis_record_summary WHERE id = ?', (record_id,))
+        if self.fts_enabled:
+            cursor.execute('DELETE FROM analysis_report_fts WHERE rowid BETWEEN ? AND ?',
+                           (record_id * REPORT_ROWID_SPAN, (record_id + 1) * REPORT_ROWID_SPAN - 1))
         conn.commit()
         conn.close()
         
-        return cursor.rowcount > 0
+        return deleted
     
     def get_record_count(self):
         """获取记录总数"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT COUNT(*) FROM analysis_records')
+        cursor.execute('SELECT COUNT(*) FROM analysis_record_summary')
         count = cursor.fetchone()[0]
         conn.close()
         
         return count
 
 # 全局数据库实例
-db = StockAnalysisDatabase()
\ No newline at end of file
+db = StockAnalysisDatabase()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    
+    print("=" * 60)
+    print("历史记录分页及报告搜索基准测试（10万条记录）")
+    print("=" * 60)
+    
+    TOTAL = 100000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bench_db = StockAnalysisDatabase(os.path.join(tmp_dir, 'bench_analysis.db'))
+        
+        # 直接批量写入原始记录（模拟升级前的数据库），报告正文约1.5KB，每份报告包含不同的主题句
+        topics = [f"主题{n}相关的风险提示：大股东减持计划{n}号，商誉减值压力。" for n in range(1000)]
+        filler = "技术面分析：均线多头排列，成交量温和放大。" * 25
+        ratings = ["买入", "持有", "卖出", "强烈买入"]
+        conn = get_connection(bench_db.db_path)
+        conn.executemany('''
+            INSERT INTO analysis_records
+            (symbol, stock_name, analysis_date, period, stock_info, agents_results, discussion_result, final_decision, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            (f"{600000 + i % 3000}", f"股票{i % 3000}", "2024-01-01 10:00:00", "1y", "{}",
+             json.dumps({"technical": {"analysis": filler + topics[i % 1000]}}, ensure_ascii=False), "{}",
+             json.dumps({"rating": ratings[i % 4], "confidence_level": 7, "target_price": "12.5元",
+                         "entry_range": "10.0-11.0"}, ensure_ascii=False),
+             f"2024-01-01T10:{i // 6000:02d}:{i % 60:02d}.{i:06d}")
+            for i in range(TOTAL)
+        ))
+        conn.commit()
+        conn.close()
+        
+        start = time.perf_counter()
+        StockAnalysisDatabase(bench_db.db_path)
+        print(f"\n迁移（摘要 + 报告全文索引）: {time.perf_counter() - start:.2f}秒")
+        
+        def timed(label, func, rounds=20):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                result = func()
+            print(f"   {label}: {(time.perf_counter() - start) / rounds * 1000:.2f}ms")
+            return result
+        
+        print("\n逐条解析JSON（改造前的做法）")
+        def load_all_json():
+            conn = get_connection(bench_db.db_path)
+            rows = conn.execute('''
+                SELECT id, symbol, stock_name, analysis_date, period, final_decision, created_at
+                FROM analysis_records ORDER BY created_at DESC
+            ''').fetchall()
+            conn.close()
+            return [json.loads(r[5]).get('rating') for r in rows]
+        timed("加载全部记录", load_all_json, rounds=3)
+        
+        print("\n摘要表 + 键集分页")
+        page = timed("第一页", lambda: bench_db.get_records_page())
+        cursor = page['next_cursor']
+        for _ in range(2000):
+            cursor = bench_db.get_records_page(cursor=cursor)['next_cursor']
+        timed("第2000页之后的一页", lambda: bench_db.get_records_page(cursor=cursor))
+        timed("搜索代码", lambda: bench_db.get_records_page(search="601234"))
+        timed("搜索名称 + 评级", lambda: bench_db.get_records_page(search="股票12", rating="买入"))
+        timed("统计匹配数", lambda: bench_db.count_records(search="股票12"))
+        
+        print("\n报告全文搜索")
+        timed("无结果", lambda: bench_db.search_reports("不存在的主题词"))
+        timed("100条报告命中", lambda: bench_db.search_reports("减持计划123号"))
+        timed("两个关键词", lambda: bench_db.search_reports("主题42 商誉"))
+        timed("每份报告都命中（对全部结果计算BM25）", lambda: bench_db.search_reports("温和放大"), rounds=3)
+        
+        def like_scan():
+            conn = get_connection(bench_db.db_path)
+            rows = conn.execute('''
+                SELECT id FROM analysis_records
+                WHERE agents_results LIKE '%不存在的主题词%' OR discussion_result LIKE '%不存在的主题词%'
+            ''').fetchall()
+            conn.close()
+            return rows
+        timed("对比：LIKE扫描原始JSON", like_scan, rounds=3)
+
@@ -1,21 +1,99 @@
 import openai
+import asyncio
 import json
+import math
+import threading
+import time
+import weakref
 from typing import Dict, List, Any, Optional
 import config
+from rate_limiter import LLMRateLimiter
+from llm_cache import LLMResponseCache
+from stage_timer import record_llm_call
+
+# 全进程共享的LLM并发上限（所有客户端实例共用）
+llm_semaphore = threading.BoundedSemaphore(config.LLM_MAX_CONCURRENCY)
+
+# 全进程共享的RPM/TPM令牌桶限流器
+llm_rate_limiter = LLMRateLimiter(config.LLM_REQUESTS_PER_MINUTE, config.LLM_TOKENS_PER_MINUTE)
+
+# 全进程共享的LLM响应缓存（未启用时为None）
+llm_cache = None
+if config.LLM_CACHE_ENABLED:
+    try:
+        llm_cache = LLMResponseCache(
+            config.LLM_CACHE_PATH,
+            ttl_seconds=config.LLM_CACHE_TTL,
+            max_bytes=config.LLM_CACHE_MAX_MB * 1024 * 1024
+        )
+    except Exception as e:
+        print(f"⚠️ LLM响应缓存初始化失败: {e}")
+
+# 共享的OpenAI客户端（复用HTTP连接池），按 (api_key, base_url) 区分
+_shared_clients = {}
+# 异步客户端的连接池绑定在事件循环上，按事件循环分别缓存
+_shared_async_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_shared_client() -> openai.OpenAI:
+    """获取进程共享的同步OpenAI客户端"""
+    key = (config.DEEPSEEK_API_KEY, config.DEEPSEEK_BASE_URL)
+    with _clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = openai.OpenAI(api_key=key[0], base_url=key[1])
+            _shared_clients[key] = client
+        return client
+
+
+def get_shared_async_client() -> openai.AsyncOpenAI:
+    """获取当前事件循环共享的异步OpenAI客户端"""
+    loop = asyncio.get_running_loop()
+    key = (config.DEEPSEEK_API_KEY, config.DEEPSEEK_BASE_URL)
+    with _clients_lock:
+        clients = _shared_async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = openai.AsyncOpenAI(api_key=key[0], base_url=key[1])
+            clients[key] = client
+        return client
+
+
+async def acquire_llm_semaphore(poll_interval: float = 0.05):
+    """
+    在事件循环中等待全进程LLM并发名额（非阻塞轮询，不占用线程）
+
+    等待期间任务被取消时不会持有名额；取得名额后由调用方负责 llm_semaphore.release()
+    """
+    while not llm_semaphore.acquire(blocking=False):
+        await asyncio.sleep(poll_interval)
+
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """粗略估算一次请求的Token用量（提示词按每字符0.6个Token计，加上最大输出Token数）"""
+    chars = sum(len(message.get('content') or '') for message in messages)
+    return math.ceil(chars * 0.6) + max_tokens
+
+
+def get_llm_cache_stats() -> Optional[Dict]:
+    """获取LLM响应缓存的命中统计，缓存未启用时返回None"""
+    return llm_cache.stats() if llm_cache is not None else None
+
 
 class DeepSeekClient:
     """DeepSeek API客户端"""
     
     def __init__(self, model="deepseek-chat"):
         self.model = model
-        self.client = openai.OpenAI(
-            api_key=config.DEEPSEEK_API_KEY,
-            base_url=config.DEEPSEEK_BASE_URL
-        )
-        
-    def call_api(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
-                 temperature: float = 0.7, max_tokens: int = 2000) -> str:
-        """调用DeepSeek API"""
+    
+    @property
+    def client(self) -> openai.OpenAI:
+        """进程共享的OpenAI客户端"""
+        return get_shared_client()
+    
+    def _prepare_request(self, model: Optional[str], max_tokens: int):
+        """确定实际使用的模型与max_tokens"""
         # 使用实例的模型，如果没有传入则使用默认模型
         model_to_use = model or self.model
         
@@ -23,34 +101,204 @@ class DeepSeekClient:
         if "reasoner" in model_to_use.lower() and max_tokens <= 2000:
             max_tokens = 8000  # reasoner 模型需要更多 tokens 来输出推理过程
         
+        return model_to_use, max_tokens
+    
+    @staticmethod
+    def _format_result(reasoning_content: Optional[str], content: Optional[str]) -> str:
+        """拼接推理过程与最终内容"""
+        # reasoner 模型可能包含 reasoning_content（推理过程）和 content（最终答案）
+        # 我们返回完整内容，包括推理过程（如果有的话）
+        result = ""
+        
+        # 检查是否有推理内容
+        if reasoning_content:
+            result += f"【推理过程】\n{reasoning_content}\n\n"
+        
+        # 添加最终内容
+        if content:
+            result += content
+        
+        return result if result else "API返回空响应"
+    
+    @classmethod
+    def _parse_response(cls, response) -> str:
+        """解析API响应"""
+        # 处理 reasoner 模型的响应
+        message = response.choices[0].message
+        return cls._format_result(getattr(message, 'reasoning_content', None), message.content)
+    
+    @staticmethod
+    def _usage_tokens(response) -> Optional[int]:
+        usage = getattr(response, 'usage', None)
+        return getattr(usage, 'total_tokens', None) if usage else None
+        
+    @staticmethod
+    def _cache_key(model_to_use, messages, temperature, max_tokens, use_cache) -> Optional[str]:
+        """计算缓存键，缓存未启用或调用方要求绕过时返回None"""
+        if not use_cache or llm_cache is None:
+            return None
+        return llm_cache.make_key(model_to_use, messages, temperature, max_tokens)
+    
+    @staticmethod
+    def _load_cache(cache_key) -> Optional[str]:
         try:
-            response = self.client.chat.completions.create(
-                model=model_to_use,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            return llm_cache.get(cache_key)
+        except Exception as e:
+            print(f"⚠️ 读取LLM响应缓存失败: {e}")
+            return None
+    
+    @staticmethod
+    def _store_cache(cache_key, model_to_use, result):
+        if cache_key and result != "API返回空响应":
+            try:
+                llm_cache.set(cache_key, model_to_use, result)
+            except Exception as e:
+                print(f"⚠️ 写入LLM响应缓存失败: {e}")
+    
+    def call_api(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
+                 temperature: float = 0.7, max_tokens: int = 2000, use_cache: bool = True) -> str:
+        """调用DeepSeek API
+        
+        Args:
+            use_cache: 是否使用响应缓存（传False强制重新请求）
+        """
+        model_to_use, max_tokens = self._prepare_request(model, max_tokens)
+        estimated_tokens = estimate_tokens(messages, max_tokens)
+        
+        start = time.perf_counter()
+        try:
+            cache_key = self._cache_key(model_to_use, messages, temperature, max_tokens, use_cache)
+            if cache_key:
+                cached = self._load_cache(cache_key)
+                if cached is not None:
+                    record_llm_call(time.perf_counter() - start, model_to_use, cached=True)
+                    return cached
             
-            # 处理 reasoner 模型的响应
-            message = response.choices[0].message
+            llm_rate_limiter.acquire(estimated_tokens)
+            with llm_semaphore:
+                response = self.client.chat.completions.create(
+                    model=model_to_use,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            llm_rate_limiter.settle(estimated_tokens, self._usage_tokens(response))
             
-            # reasoner 模型可能包含 reasoning_content（推理过程）和 content（最终答案）
-            # 我们返回完整内容，包括推理过程（如果有的话）
-            result = ""
+            result = self._parse_response(response)
+            self._store_cache(cache_key, model_to_use, result)
+            record_llm_call(time.perf_counter() - start, model_to_use)
+            return result
             
-            # 检查是否有推理内容
-            if hasattr(message, 'reasoning_content') and message.reasoning_content:
-                result += f"【推理过程】\n{message.reasoning_content}\n\n"
+        except Exception as e:
+            record_llm_call(time.perf_counter() - start, model_to_use, ok=False)
+            return f"API调用失败: {str(e)}"
+    
+    async def acall_api(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                        temperature: float = 0.7, max_tokens: int = 2000, use_cache: bool = True) -> str:
+        """异步调用DeepSeek API（与 call_api 共享并发上限、限流额度与响应缓存）"""
+        model_to_use, max_tokens = self._prepare_request(model, max_tokens)
+        estimated_tokens = estimate_tokens(messages, max_tokens)
+        
+        start = time.perf_counter()
+        try:
+            cache_key = self._cache_key(model_to_use, messages, temperature, max_tokens, use_cache)
+            if cache_key:
+                cached = await asyncio.to_thread(self._load_cache, cache_key)
+                if cached is not None:
+                    record_llm_call(time.perf_counter() - start, model_to_use, cached=True)
+                    return cached
             
-            # 添加最终内容
-            if message.content:
-                result += message.content
+            await llm_rate_limiter.acquire_async(estimated_tokens)
+            # 并发信号量为线程级（与同步调用共用），以非阻塞方式轮询，取消等待时不会遗留名额
+            await acquire_llm_semaphore()
+            try:
+                response = await get_shared_async_client().chat.completions.create(
+                    model=model_to_use,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+            finally:
+                llm_semaphore.release()
+            llm_rate_limiter.settle(estimated_tokens, self._usage_tokens(response))
             
-            return result if result else "API返回空响应"
+            result = self._parse_response(response)
+            await asyncio.to_thread(self._store_cache, cache_key, model_to_use, result)
+            record_llm_call(time.perf_counter() - start, model_to_use)
+            return result
             
         except Exception as e:
+            record_llm_call(time.perf_counter() - start, model_to_use, ok=False)
             return f"API调用失败: {str(e)}"
     
+    def stream_api(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                   temperature: float = 0.7, max_tokens: int = 2000, use_cache: bool = True):
+        """流式调用DeepSeek API
+        
+        Yields:
+            tuple: (类型, 增量文本)，类型为 'reasoning'（推理过程）或 'content'（最终内容）；
+                   命中缓存时一次性返回完整结果
+        """
+        model_to_use, max_tokens = self._prepare_request(model, max_tokens)
+        estimated_tokens = estimate_tokens(messages, max_tokens)
+        
+        start = time.perf_counter()
+        cache_key = self._cache_key(model_to_use, messages, temperature, max_tokens, use_cache)
+        if cache_key:
+            cached = self._load_cache(cache_key)
+            if cached is not None:
+                record_llm_call(time.perf_counter() - start, model_to_use, cached=True)
+                yield 'content', cached
+                return
+        
+        reasoning_parts = []
+        content_parts = []
+        usage_tokens = None
+        try:
+            llm_rate_limiter.acquire(estimated_tokens)
+            with llm_semaphore:
+                stream = self.client.chat.completions.create(
+                    model=model_to_use,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                for chunk in stream:
+                    if getattr(chunk, 'usage', None):
+                        usage_tokens = chunk.usage.total_tokens
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    reasoning = getattr(delta, 'reasoning_content', None)
+                    if reasoning:
+                        reasoning_parts.append(reasoning)
+                        yield 'reasoning', reasoning
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield 'content', delta.content
+        except Exception as e:
+            record_llm_call(time.perf_counter() - start, model_to_use, ok=False)
+            yield 'content', f"API调用失败: {str(e)}"
+            return
+        
+        llm_rate_limiter.settle(estimated_tokens, usage_tokens)
+        result = self._format_result(''.join(reasoning_parts), ''.join(content_parts))
+        self._store_cache(cache_key, model_to_use, result)
+        record_llm_call(time.perf_counter() - start, model_to_use)
+    
+    def call_api_streaming(self, messages: List[Dict[str, str]], on_delta, model: Optional[str] = None,
+                           temperature: float = 0.7, max_tokens: int = 2000, use_cache: bool = True) -> str:
+        """流式调用DeepSeek API，每个增量回调 on_delta(类型, 增量文本)，返回与 call_api 格式相同的完整结果"""
+        reasoning_parts = []
+        content_parts = []
+        for kind, text in self.stream_api(messages, model, temperature, max_tokens, use_cache):
+            (reasoning_parts if kind == 'reasoning' else content_parts).append(text)
+            on_delta(kind, text)
+        
+        return self._format_result(''.join(reasoning_parts), ''.join(content_parts))
+    
     def technical_analysis(self, stock_info: Dict, stock_data: Any, indicators: Dict) -> str:
         """技术面分析"""
         prompt = f"""
@@ -391,8 +639,12 @@ class DeepSeekClient:
         return self.call_api(messages, max_tokens=6000)
     
     def final_decision(self, comprehensive_discussion: str, stock_info: Dict, 
-                      indicators: Dict) -> Dict[str, Any]:
-        """最终投资决策"""
+                      indicators: Dict, on_delta=None) -> Dict[str, Any]:
+        """最终投资决策
+        
+        Args:
+            on_delta: 流式输出回调 on_delta(类型, 增量文本)，为None时使用非流式调用
+        """
         prompt = f"""
 基于前期的综合分析讨论，现在需要做出最终的投资决策。
 
@@ -441,7 +693,10 @@ class DeepSeekClient:
             {"role": "user", "content": prompt}
         ]
         
-        response = self.call_api(messages, temperature=0.3, max_tokens=4000)
+        if on_delta:
+            response = self.call_api_streaming(messages, on_delta, temperature=0.3, max_tokens=4000)
+        else:
+            response = self.call_api(messages, temperature=0.3, max_tokens=4000)
         
         try:
             # 尝试解析JSON响应
@@ -0,0 +1,314 @@
+"""
+技术指标增量计算模块
+为每只股票保存滚动求和、EMA状态及KDJ窗口，新增K线时只做常数次运算，
+不必每次从头重算整段历史；当日K线在盘中变化时可替换最后一根重新计算
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from technical_indicators import (
+    MA_WINDOWS, RSI_WINDOW, MACD_FAST, MACD_SLOW, MACD_SIGNAL,
+    BB_WINDOW, BB_DEV, STOCH_WINDOW, STOCH_SMOOTH, VOLUME_MA_WINDOW, _ema
+)
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    """与NumPy一致的除法：除数为0时返回 ±inf 或 NaN 而不抛出异常"""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class IndicatorState:
+    """单只股票的技术指标增量状态，指标定义与 technical_indicators.compute_indicators 一致"""
+
+    def __init__(self):
+        """初始化空状态（尚无K线）"""
+        self.bar_count = 0
+        self.last_date = None
+        # 收盘价窗口多保留一根，用于从各均线的滚动和中减去移出窗口的值
+        self.closes = deque(maxlen=max(MA_WINDOWS) + 1)
+        self.close_sums = {window: 0.0 for window in MA_WINDOWS}
+        self.highs = deque(maxlen=STOCH_WINDOW)
+        self.lows = deque(maxlen=STOCH_WINDOW)
+        self.k_values = deque(maxlen=STOCH_SMOOTH)
+        self.volumes = deque(maxlen=VOLUME_MA_WINDOW + 1)
+        self.volume_sum = 0.0
+        self.ema_up = 0.0
+        self.ema_down = 0.0
+        self.ema_fast = math.nan
+        self.ema_slow = math.nan
+        self.macd_signal = math.nan
+        self.last_bar = None
+        # 追加最后一根K线之前的状态，用于 replace_last
+        self._previous = None
+
+    @classmethod
+    def from_arrays(cls, close, high, low, volume) -> 'IndicatorState':
+        """
+        由整段历史建立状态（EMA状态用向量化计算，窗口只取末尾）
+
+        Args:
+            close/high/low/volume: 一维数组，不应含NaN
+
+        Returns:
+            IndicatorState: 已包含全部K线的状态
+        """
+        close, high, low, volume = (np.asarray(a, dtype=np.float64) for a in (close, high, low, volume))
+        state = cls()
+        n = len(close)
+        if n == 0:
+            return state
+
+        # 先载入前 n-1 根，再追加最后一根，使 replace_last 可用
+        state._load(close[:-1], high[:-1], low[:-1], volume[:-1])
+        state.append(close[-1], high[-1], low[-1], volume[-1])
+        return state
+
+    def _load(self, close, high, low, volume):
+        n = len(close)
+        if n == 0:
+            return
+        self.bar_count = n
+        self.closes.extend(close[-self.closes.maxlen:].tolist())
+        for window in MA_WINDOWS:
+            self.close_sums[window] = math.fsum(close[-window:].tolist())
+        self.highs.extend(high[-STOCH_WINDOW:].tolist())
+        self.lows.extend(low[-STOCH_WINDOW:].tolist())
+        self.volumes.extend(volume[-self.volumes.maxlen:].tolist())
+        self.volume_sum = math.fsum(volume[-VOLUME_MA_WINDOW:].tolist())
+
+        diff = np.zeros(n)
+        diff[1:] = close[1:] - close[:-1]
+        self.ema_up = float(_ema(np.where(diff > 0, diff, 0.0)[:, None], 1.0 / RSI_WINDOW)[-1, 0])
+        self.ema_down = float(_ema(np.where(diff < 0, -diff, 0.0)[:, None], 1.0 / RSI_WINDOW)[-1, 0])
+        ema_fast = _ema(close[:, None], 2.0 / (MACD_FAST + 1))[:, 0]
+        ema_slow = _ema(close[:, None], 2.0 / (MACD_SLOW + 1))[:, 0]
+        self.ema_fast = float(ema_fast[-1])
+        self.ema_slow = float(ema_slow[-1])
+        if n >= MACD_SLOW:
+            macd = (ema_fast - ema_slow)[MACD_SLOW - 1:]
+            self.macd_signal = float(_ema(macd[:, None], 2.0 / (MACD_SIGNAL + 1))[-1, 0])
+
+        for i in range(max(0, n - STOCH_SMOOTH), n):
+            if i + 1 < STOCH_WINDOW:
+                self.k_values.append(math.nan)
+                continue
+            lowest = low[i + 1 - STOCH_WINDOW:i + 1].min()
+            highest = high[i + 1 - STOCH_WINDOW:i + 1].max()
+            self.k_values.append(_ratio(100.0 * (close[i] - lowest), highest - lowest))
+
+        self.last_bar = (float(close[-1]), float(high[-1]), float(low[-1]), float(volume[-1]))
+
+    def append(self, close: float, high: float, low: float, volume: float, date=None):
+        """
+        追加一根新K线（各指标均为常数次运算）
+
+        Args:
+            close/high/low/volume: K线数据
+            date: K线日期（可选，供 IndicatorStateStore 对齐数据使用）
+        """
+        close, high, low, volume = float(close), float(high), float(low), float(volume)
+        self._previous = self._snapshot()
+
+        prev_close = self.closes[-1] if self.closes else None
+        self.bar_count += 1
+        n = self.bar_count
+
+        self.closes.append(close)
+        for window in MA_WINDOWS:
+            self.close_sums[window] += close
+            if n > window:
+                self.close_sums[window] -= self.closes[-window - 1]
+
+        diff = 0.0 if prev_close is None else close - prev_close
+        alpha = 1.0 / RSI_WINDOW
+        if n == 1:
+            self.ema_up = max(diff, 0.0)
+            self.ema_down = max(-diff, 0.0)
+            self.ema_fast = close
+            self.ema_slow = close
+        else:
+            self.ema_up = (1 - alpha) * self.ema_up + alpha * max(diff, 0.0)
+            self.ema_down = (1 - alpha) * self.ema_down + alpha * max(-diff, 0.0)
+            fast_alpha = 2.0 / (MACD_FAST + 1)
+            slow_alpha = 2.0 / (MACD_SLOW + 1)
+            self.ema_fast = (1 - fast_alpha) * self.ema_fast + fast_alpha * close
+            self.ema_slow = (1 - slow_alpha) * self.ema_slow + slow_alpha * close
+        if n == MACD_SLOW:
+            self.macd_signal = self.ema_fast - self.ema_slow
+        elif n > MACD_SLOW:
+            signal_alpha = 2.0 / (MACD_SIGNAL + 1)
+            self.macd_signal = (1 - signal_alpha) * self.macd_signal + signal_alpha * (self.ema_fast - self.ema_slow)
+
+        self.highs.append(high)
+        self.lows.append(low)
+        if n >= STOCH_WINDOW:
+            lowest = min(self.lows)
+            self.k_values.append(_ratio(100.0 * (close - lowest), max(self.highs) - lowest))
+        else:
+            self.k_values.append(math.nan)
+
+        self.volumes.append(volume)
+        self.volume_sum += volume
+        if n > VOLUME_MA_WINDOW:
+            self.volume_sum -= self.volumes[-VOLUME_MA_WINDOW - 1]
+
+        self.last_bar = (close, high, low, volume)
+        if date is not None:
+            self.last_date = date
+
+    def replace_last(self, close: float, high: float, low: float, volume: float):
+        """替换最后一根K线（盘中当日K线更新时使用）"""
+        if self._previous is None:
+            raise ValueError("没有可替换的K线")
+        last_date = self.last_date
+        self.__dict__.update(self._previous)
+        self.append(close, high, low, volume, date=last_date)
+
+    def _snapshot(self) -> Dict:
+        snapshot = {}
+        for key, value in self.__dict__.items():
+            if isinstance(value, deque):
+                value = deque(value, maxlen=value.maxlen)
+            elif isinstance(value, dict):
+                value = dict(value)
+            snapshot[key] = value
+        snapshot['_previous'] = None
+        return snapshot
+
+    def latest(self) -> Dict[str, float]:
+        """
+        最新一根K线的全部指标
+
+        Returns:
+            dict: {指标列名: 数值}，数据不足的指标为NaN
+        """
+        n = self.bar_count
+        nan = math.nan
+        values = {}
+        for window in MA_WINDOWS:
+            values[f'MA{window}'] = self.close_sums[window] / window if n >= window else nan
+
+        rsi = 100.0 if self.ema_down == 0 else 100.0 - 100.0 / (1.0 + self.ema_up / self.ema_down)
+        values['RSI'] = rsi if n >= RSI_WINDOW else nan
+
+        macd = self.ema_fast - self.ema_slow if n >= MACD_SLOW else nan
+        signal = self.macd_signal if n >= MACD_SLOW + MACD_SIGNAL - 1 else nan
+        values['MACD'] = macd
+        values['MACD_signal'] = signal
+        values['MACD_histogram'] = macd - signal
+
+        if n >= BB_WINDOW:
+            window = list(self.closes)[-BB_WINDOW:]
+            middle = math.fsum(window) / BB_WINDOW
+            std = math.sqrt(math.fsum((c - middle) ** 2 for c in window) / BB_WINDOW)
+            values['BB_upper'] = middle + BB_DEV * std
+            values['BB_middle'] = middle
+            values['BB_lower'] = middle - BB_DEV * std
+        else:
+            values['BB_upper'] = values['BB_middle'] = values['BB_lower'] = nan
+
+        values['K'] = self.k_values[-1] if self.k_values else nan
+        values['D'] = sum(self.k_values) / STOCH_SMOOTH if len(self.k_values) == STOCH_SMOOTH else nan
+
+        volume_ma = self.volume_sum / VOLUME_MA_WINDOW if n >= VOLUME_MA_WINDOW else nan
+        values['Volume_MA5'] = volume_ma
+        values['Volume_ratio'] = _ratio(self.last_bar[3], volume_ma) if n else nan
+        return values
+
+
+# 续算前校验的已收盘K线根数
+RESUME_CHECK_BARS = 5
+
+
+class IndicatorStateStore:
+    """按股票代码保存指标增量状态，并与最新获取的日K线对齐"""
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[IndicatorState]:
+        """获取股票的指标状态，不存在时返回 None"""
+        return self._states.get(symbol)
+
+    def sync(self, symbol: str, df: pd.DataFrame) -> Optional[IndicatorState]:
+        """
+        将状态与日K线对齐：只追加状态之后的新K线，当日K线变化时替换最后一根；
+        历史数据不连续或已变化（如复权）时按整段数据重建
+
+        行情接口按"今天往前一年"取数，窗口起点每天后移，因此只校验与状态末尾已收盘K线的重叠部分，
+        不要求窗口起点相同。状态延续了建立以来的全部K线：MA、布林带、KDJ、量比与按当前窗口计算的结果相同，
+        RSI、MACD等EMA类指标包含窗口之前的历史，与只用当前窗口从头计算的值略有差别
+
+        Args:
+            symbol: 股票代码
+            df: 以日期为索引、包含 Close/High/Low/Volume 列的日K线
+
+        Returns:
+            IndicatorState: 对齐后的状态；数据含缺失值时返回 None（由调用方整段计算）
+        """
+        columns = ('Close', 'High', 'Low', 'Volume')
+        arrays = [df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in columns]
+        if len(df) == 0 or any(np.isnan(values).any() for values in arrays):
+            return None
+        dates = df.index
+
+        with self._lock:
+            state = self._states.get(symbol)
+            start = self._resume_position(state, dates, arrays)
+            if start is None:
+                state = IndicatorState.from_arrays(*arrays)
+                state.last_date = dates[-1]
+                self._states[symbol] = state
+                return state
+
+            last_bar = tuple(float(values[start - 1]) for values in arrays)
+            if last_bar != state.last_bar:
+                state.replace_last(*last_bar)
+            for i in range(start, len(df)):
+                state.append(*(values[i] for values in arrays), date=dates[i])
+            return state
+
+    @staticmethod
+    def _resume_position(state, dates, arrays) -> Optional[int]:
+        """
+        返回需要从哪一行开始追加；返回 None 表示需要重建
+
+        状态最后一根K线可能是盘中未完成的K线，用它之前的 RESUME_CHECK_BARS 根（已收盘）校验历史是否一致
+        """
+        if state is None or state.last_date is None:
+            return None
+        position = dates.searchsorted(state.last_date)
+        if position >= len(dates) or dates[position] != state.last_date:
+            return None
+        # 状态中已收盘的K线（不含最后一根）与窗口中 last_date 之前的K线比较
+        checked = min(RESUME_CHECK_BARS, len(state.closes) - 1, position)
+        if len(state.closes) >= 2 and checked == 0:
+            return None
+        if checked > 0:
+            expected = list(state.closes)[-checked - 1:-1]
+            if arrays[0][position - checked:position].tolist() != expected:
+                return None
+        return position + 1
+
+    def invalidate(self, symbol: str = None):
+        """删除指定股票（symbol为None时删除全部）的指标状态"""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop(symbol, None)
+
+
+# 全局指标状态实例
+indicator_states = IndicatorStateStore()
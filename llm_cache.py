@@ -0,0 +1,161 @@
+"""
+LLM响应缓存模块
+以 (model, messages, temperature, max_tokens) 的哈希为键缓存完整响应，
+支持过期时间（TTL）与按总大小的LRU淘汰
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class LLMResponseCache:
+    """内容寻址的LLM响应磁盘缓存"""
+
+    def __init__(self, db_path='llm_cache.db', ttl_seconds=86400, max_bytes=200 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            db_path: 数据库文件路径
+            ttl_seconds: 缓存有效期（秒）
+            max_bytes: 缓存内容总大小上限（字节），超出时按最近访问时间淘汰
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self.init_database()
+
+    def get_connection(self):
+        """获取数据库连接"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_database(self):
+        """初始化数据库表"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_responses (
+            cache_key TEXT PRIMARY KEY,
+            model TEXT,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_accessed REAL NOT NULL
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_llm_responses_last_accessed ON llm_responses(last_accessed)
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        """计算请求内容的哈希键"""
+        payload = json.dumps(
+            {'model': model, 'messages': messages, 'temperature': temperature, 'max_tokens': max_tokens},
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """
+        读取缓存
+
+        Returns:
+            str: 缓存的响应，未命中或已过期时返回 None
+        """
+        now = time.time()
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT response FROM llm_responses WHERE cache_key = ? AND created_at > ?
+            ''', (cache_key, now - self.ttl_seconds))
+            row = cursor.fetchone()
+            if row:
+                cursor.execute('''
+                    UPDATE llm_responses SET last_accessed = ? WHERE cache_key = ?
+                ''', (now, cache_key))
+                conn.commit()
+        finally:
+            conn.close()
+
+        with self._stats_lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def set(self, cache_key: str, model: str, response: str):
+        """写入缓存，并淘汰过期及超出大小上限的条目"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO llm_responses (cache_key, model, response, size, created_at, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (cache_key, model, response, size, now, now))
+            self._evict(cursor, now)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _evict(self, cursor, now):
+        """删除过期条目；总大小超限时按最近访问时间从旧到新删除"""
+        cursor.execute('DELETE FROM llm_responses WHERE created_at <= ?', (now - self.ttl_seconds,))
+
+        cursor.execute('SELECT COALESCE(SUM(size), 0) FROM llm_responses')
+        total = cursor.fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        cursor.execute('SELECT cache_key, size FROM llm_responses ORDER BY last_accessed')
+        evict_keys = []
+        for cache_key, size in cursor.fetchall():
+            if excess <= 0:
+                break
+            evict_keys.append((cache_key,))
+            excess -= size
+        cursor.executemany('DELETE FROM llm_responses WHERE cache_key = ?', evict_keys)
+
+    def stats(self) -> Dict:
+        """获取缓存统计信息（命中/未命中次数、条目数、总大小）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses')
+        entries, total_bytes = cursor.fetchone()
+        conn.close()
+
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 2) if total > 0 else 0,
+            'entries': entries,
+            'total_bytes': total_bytes
+        }
+
+    def clear(self):
+        """清空缓存"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM llm_responses')
+        conn.commit()
+        conn.close()
@@ -5,33 +5,51 @@
 
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 import time
 import warnings
 
+from config import LONGHUBANG_REQUESTS_PER_SECOND, LONGHUBANG_MAX_WORKERS
+from rate_limiter import TokenBucket
+
 warnings.filterwarnings('ignore')
 
 
+# 全进程共享的StockAPI请求限流（桶容量为1，请求按固定间隔均匀发出，不会在1秒内突发超限）
+stockapi_rate_limiter = TokenBucket(LONGHUBANG_REQUESTS_PER_SECOND, capacity=1)
+
+
 class LonghubangDataFetcher:
     """龙虎榜数据获取类"""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, database=None):
         """
         初始化数据获取器
         
         Args:
             api_key: StockAPI的API密钥（可选，普通请求每日免费1000次）
+            database: LonghubangDatabase 实例（可选），提供时按日期范围获取数据只下载数据库中缺失的日期
         """
         print("[智瞰龙虎] 龙虎榜数据获取器初始化...")
         self.base_url = "https://www.stockapi.com.cn/v1"
         self.api_key = api_key
+        self.database = database
         self.max_retries = 3  # 最大重试次数
-        self.retry_delay = 2  # 重试延迟（秒）
-        self.request_delay = 0.025  # 请求间隔（秒），40次/秒 = 0.025秒/次
+        self.retry_delay = 1  # 首次重试延迟（秒），之后每次翻倍
+        self.max_workers = LONGHUBANG_MAX_WORKERS  # 同时进行的日期请求数
+        self.rate_limiter = stockapi_rate_limiter
+        
+        # 复用连接，避免每次请求重新建立TCP/TLS连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
     
     def _safe_request(self, url, params=None):
         """
-        安全的HTTP请求，包含重试机制
+        安全的HTTP请求，包含限流与指数退避重试（可在多个线程中并发调用）
         
         Args:
             url: 请求URL
@@ -41,11 +59,11 @@ class LonghubangDataFetcher:
             dict: 响应数据
         """
         for attempt in range(self.max_retries):
+            delay = self.retry_delay * (2 ** attempt)
             try:
-                response = requests.get(url, params=params, timeout=10)
-                
-                # 添加请求延迟，遵守40次/秒的限制
-                time.sleep(self.request_delay)
+                # 每次请求（包括重试）都先取得令牌，遵守40次/秒的限制
+                self.rate_limiter.acquire()
+                response = self.session.get(url, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -56,17 +74,80 @@ class LonghubangDataFetcher:
                         return None
                 else:
                     print(f"    HTTP错误: {response.status_code}")
+                    if response.status_code < 500 and response.status_code != 429:
+                        return None
+                    error = f"HTTP {response.status_code}"
                     
             except Exception as e:
-                if attempt < self.max_retries - 1:
-                    print(f"    请求失败，{self.retry_delay}秒后重试... (尝试 {attempt + 1}/{self.max_retries})")
-                    time.sleep(self.retry_delay)
-                else:
-                    print(f"    请求失败，已达最大重试次数: {e}")
-                    return None
+                error = e
+            
+            if attempt < self.max_retries - 1:
+                print(f"    请求失败，{delay}秒后重试... (尝试 {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+            else:
+                print(f"    请求失败，已达最大重试次数: {error}")
         
         return None
     
+    def _download_date(self, date):
+        """
+        下载指定日期的龙虎榜记录
+        
+        Args:
+            date: 日期，格式为 YYYY-MM-DD
+            
+        Returns:
+            list: 龙虎榜记录（当日无数据时为空列表）；请求失败时返回 None
+        """
+        url = f"{self.base_url}/youzi/all"
+        params = {'date': date}
+        
+        result = self._safe_request(url, params)
+        if result is None:
+            return None
+        return result.get('data') or []
+    
+    def _iter_downloads(self, dates):
+        """
+        并发下载多个日期，按完成顺序逐个产出 (日期, 记录列表或None)
+        
+        同时进行的请求数不超过 max_workers，请求速率由令牌桶统一控制
+        """
+        if not dates:
+            return
+        
+        start = time.time()
+        failed = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(dates))) as executor:
+            futures = {executor.submit(self._download_date, date): date for date in dates}
+            for future in as_completed(futures):
+                date = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    print(f"    ✗ {date} 下载异常: {e}")
+                    data = None
+                if data is None:
+                    failed += 1
+                    print(f"    ✗ {date} 下载失败")
+                else:
+                    print(f"    ✓ {date} 获取 {len(data)} 条龙虎榜记录")
+                yield date, data
+        
+        print(f"    下载 {len(dates)} 个交易日用时 {time.time() - start:.2f}秒（失败 {failed} 个）")
+    
+    def download_dates(self, dates):
+        """
+        并发下载多个日期的龙虎榜数据
+        
+        Args:
+            dates: 日期列表，格式为 YYYY-MM-DD
+            
+        Returns:
+            dict: {日期: 记录列表}，下载失败的日期为 None
+        """
+        return dict(self._iter_downloads(list(dates)))
+    
     def get_longhubang_data(self, date):
         """
         获取指定日期的龙虎榜数据
@@ -79,58 +160,100 @@ class LonghubangDataFetcher:
         """
         print(f"[智瞰龙虎] 获取 {date} 的龙虎榜数据...")
         
-        url = f"{self.base_url}/youzi/all"
-        params = {'date': date}
-        
-        result = self._safe_request(url, params)
+        data = self._download_date(date)
         
-        if result and result.get('data'):
-            print(f"    ✓ 成功获取 {len(result['data'])} 条龙虎榜记录")
-            return result
+        if data:
+            print(f"    ✓ 成功获取 {len(data)} 条龙虎榜记录")
+            return {'code': 20000, 'data': data}
         else:
             print(f"    ✗ 未获取到数据")
             return None
     
-    def get_longhubang_data_range(self, start_date, end_date):
+    @staticmethod
+    def _weekdays(start_date, end_date):
+        """日期范围内的工作日（YYYY-MM-DD）列表"""
+        dates = []
+        current_date = datetime.strptime(start_date, '%Y-%m-%d')
+        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
+        
+        while current_date <= end_date_obj:
+            # 跳过周末
+            if current_date.weekday() < 5:  # 0-4表示周一到周五
+                dates.append(current_date.strftime('%Y-%m-%d'))
+            current_date += timedelta(days=1)
+        return dates
+    
+    def _missing_dates(self, dates, refresh_today=False):
+        """
+        筛选需要下载的日期
+        
+        数据库中没有下载记录的日期需要下载；下载时间不晚于当天的记录可能是收盘前的不完整数据，也重新下载。
+        今天的数据在当天下载过一次后默认视为完整，refresh_today=True 时强制重新下载
+        """
+        if not dates:
+            return []
+        
+        today = datetime.now().strftime('%Y-%m-%d')
+        fetched = self.database.get_fetched_dates(dates[0], dates[-1])
+        missing = []
+        for date in dates:
+            fetched_at = fetched.get(date)
+            if fetched_at is None:
+                missing.append(date)
+            elif date == today:
+                if refresh_today:
+                    missing.append(date)
+            elif fetched_at[:10] <= date:
+                missing.append(date)
+        return missing
+    
+    def get_longhubang_data_range(self, start_date, end_date, refresh_today=False):
         """
         获取日期范围内的龙虎榜数据
         
+        配置了数据库时优先读取本地数据，只下载数据库中缺失的日期，下载结果写入数据库后再统一返回
+        
         Args:
             start_date: 开始日期，格式为 YYYY-MM-DD
             end_date: 结束日期，格式为 YYYY-MM-DD
+            refresh_today: 是否重新下载今天的数据（盘中数据可能不完整）
             
         Returns:
             list: 龙虎榜数据列表
         """
         print(f"[智瞰龙虎] 获取 {start_date} 至 {end_date} 的龙虎榜数据...")
         
-        all_data = []
+        dates = self._weekdays(start_date, end_date)
         
-        # 转换日期
-        current_date = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
+        if self.database is None:
+            all_data = []
+            for date_str, data in sorted(self.download_dates(dates).items()):
+                all_data.extend(data or [])
+            print(f"[智瞰龙虎] ✓ 共获取 {len(all_data)} 条记录")
+            return all_data
         
-        while current_date <= end_date_obj:
-            date_str = current_date.strftime('%Y-%m-%d')
-            
-            # 跳过周末
-            if current_date.weekday() < 5:  # 0-4表示周一到周五
-                result = self.get_longhubang_data(date_str)
-                if result and result.get('data'):
-                    all_data.extend(result['data'])
-            
-            # 下一天
-            current_date += timedelta(days=1)
+        missing = self._missing_dates(dates, refresh_today)
+        print(f"    数据库已有 {len(dates) - len(missing)} 个交易日，需下载 {len(missing)} 个交易日")
+        
+        # 全部下载完成后在一个事务中写入记录及下载日期（下载失败的日期不记录，下次再试）
+        downloaded = {date_str: data for date_str, data in self._iter_downloads(missing) if data is not None}
+        if downloaded:
+            self.database.save_longhubang_data(
+                [record for data in downloaded.values() for record in data],
+                fetched_dates={date_str: len(data) for date_str, data in downloaded.items()}
+            )
         
+        all_data = self.database.get_raw_records(start_date, end_date)
         print(f"[智瞰龙虎] ✓ 共获取 {len(all_data)} 条记录")
         return all_data
     
-    def get_recent_days_data(self, days=5):
+    def get_recent_days_data(self, days=5, refresh_today=False):
         """
         获取最近N个交易日的龙虎榜数据
         
         Args:
             days: 天数（默认5天）
+            refresh_today: 是否重新下载今天的数据
             
         Returns:
             list: 龙虎榜数据列表
@@ -140,7 +263,8 @@ class LonghubangDataFetcher:
         
         return self.get_longhubang_data_range(
             start_date.strftime('%Y-%m-%d'),
-            end_date.strftime('%Y-%m-%d')
+            end_date.strftime('%Y-%m-%d'),
+            refresh_today=refresh_today
         )
     
     def parse_to_dataframe(self, data_list):
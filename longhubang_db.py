@@ -3,10 +3,10 @@
 用于存储龙虎榜历史数据和分析报告
 """
 
-import sqlite3
 from datetime import datetime
 import json
 import pandas as pd
+from sqlite_pool import get_connection
 
 
 class LonghubangDatabase:
@@ -23,8 +23,8 @@ class LonghubangDatabase:
         self.init_database()
     
     def get_connection(self):
-        """获取数据库连接"""
-        return sqlite3.connect(self.db_path)
+        """获取数据库连接（连接池中的连接，已启用WAL模式）"""
+        return get_connection(self.db_path)
     
     def init_database(self):
         """初始化数据库表"""
@@ -51,18 +51,87 @@ class LonghubangDatabase:
         ''')
         
         # 创建索引
+        # 按日期（及股票代码）筛选使用 UNIQUE(date, stock_code, ...) 自带的索引，无需再单独建 (date, stock_code) 索引；
+        # 游资按 (youzi_name, date) 建索引并包含金额列，游资排名查询只读索引即可完成
+        # （单独的 date、youzi_name 索引被上述索引覆盖，net_inflow 索引没有查询用到，均删除以减少写入开销）
+        cursor.execute('DROP INDEX IF EXISTS idx_date')
+        cursor.execute('DROP INDEX IF EXISTS idx_youzi_name')
+        cursor.execute('DROP INDEX IF EXISTS idx_net_inflow')
         cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_date ON longhubang_records(date)
+        CREATE INDEX IF NOT EXISTS idx_stock_code ON longhubang_records(stock_code)
         ''')
         cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_stock_code ON longhubang_records(stock_code)
+        CREATE INDEX IF NOT EXISTS idx_youzi_date ON longhubang_records(
+            youzi_name, date, buy_amount, sell_amount, net_inflow
+        )
+        ''')
+        
+        # 已下载日期记录（包括无龙虎榜数据的交易日），用于只下载缺失日期
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_fetch_log (
+            date TEXT PRIMARY KEY,
+            record_count INTEGER NOT NULL,
+            fetched_at TEXT NOT NULL
+        )
+        ''')
+        # 已有数据但没有下载记录的日期（旧版本写入的数据）视为已下载
+        cursor.execute('''
+        INSERT OR IGNORE INTO longhubang_fetch_log (date, record_count, fetched_at)
+        SELECT date, COUNT(*), MAX(created_at) FROM longhubang_records GROUP BY date
+        ''')
+        
+        # 按日汇总表（写入原始记录时按日期增量更新），统计查询在汇总表上按日期范围求和
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_youzi_daily (
+            date TEXT NOT NULL,
+            youzi_name TEXT,
+            trade_count INTEGER NOT NULL,
+            total_buy REAL,
+            total_sell REAL,
+            total_net_inflow REAL,
+            PRIMARY KEY (date, youzi_name)
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_youzi_daily_name ON longhubang_youzi_daily(
+            youzi_name, date, trade_count, total_buy, total_sell, total_net_inflow
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS longhubang_stock_daily (
+            date TEXT NOT NULL,
+            stock_code TEXT NOT NULL,
+            stock_name TEXT,
+            record_count INTEGER NOT NULL,
+            total_buy REAL,
+            total_sell REAL,
+            total_net_inflow REAL,
+            PRIMARY KEY (date, stock_code, stock_name)
+        )
         ''')
         cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_youzi_name ON longhubang_records(youzi_name)
+        CREATE INDEX IF NOT EXISTS idx_stock_daily_code ON longhubang_stock_daily(stock_code)
         ''')
         cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_net_inflow ON longhubang_records(net_inflow)
+        CREATE TABLE IF NOT EXISTS longhubang_concept_daily (
+            date TEXT NOT NULL,
+            concept TEXT NOT NULL,
+            stock_count INTEGER NOT NULL,
+            record_count INTEGER NOT NULL,
+            total_net_inflow REAL,
+            PRIMARY KEY (date, concept)
+        )
         ''')
+        # 汇总表尚未包含的日期（旧版本写入的数据）补建汇总
+        cursor.execute('''
+        SELECT DISTINCT date FROM longhubang_records
+        EXCEPT
+        SELECT DISTINCT date FROM longhubang_youzi_daily
+        ''')
+        missing_dates = [row[0] for row in cursor.fetchall()]
+        if missing_dates:
+            print(f"[智瞰龙虎] 补建 {len(missing_dates)} 个交易日的统计汇总...")
+            self._refresh_daily_rollups(conn, missing_dates)
         
         # AI分析报告表
         cursor.execute('''
@@ -102,53 +171,217 @@ class LonghubangDatabase:
         
         print("[智瞰龙虎] 数据库初始化完成")
     
-    def save_longhubang_data(self, data_list):
+    @staticmethod
+    def _record_row(record):
+        """将一条接口记录（中文或英文字段）转换为 longhubang_records 的一行"""
+        return (
+            record.get('rq') or record.get('日期'),
+            record.get('gpdm') or record.get('股票代码'),
+            record.get('gpmc') or record.get('股票名称'),
+            record.get('yzmc') or record.get('游资名称'),
+            record.get('yyb') or record.get('营业部'),
+            record.get('sblx') or record.get('榜单类型'),
+            float(record.get('mrje') or record.get('买入金额') or 0),
+            float(record.get('mcje') or record.get('卖出金额') or 0),
+            float(record.get('jlrje') or record.get('净流入金额') or 0),
+            record.get('gl') or record.get('概念')
+        )
+    
+    def save_longhubang_data(self, data_list, fetched_dates=None):
         """
-        保存龙虎榜数据
+        保存龙虎榜数据（批量写入，单个事务）
         
         Args:
             data_list: 龙虎榜数据列表
+            fetched_dates: {日期: 当日记录数}（可选），在同一事务中写入下载记录，见 mark_dates_fetched
             
         Returns:
             int: 成功保存的记录数
         """
-        if not data_list:
+        if not data_list and not fetched_dates:
             return 0
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        saved_count = 0
-        
-        for record in data_list:
+        rows = []
+        for record in data_list or []:
             try:
-                cursor.execute('''
-                INSERT OR REPLACE INTO longhubang_records 
+                row = self._record_row(record)
+            except (ValueError, TypeError) as e:
+                print(f"保存记录失败: {e}")
+                continue
+            if not row[0] or not row[1]:
+                print(f"保存记录失败: 缺少日期或股票代码")
+                continue
+            rows.append(row)
+        # 按唯一键顺序写入，索引页的插入更集中
+        rows.sort(key=lambda row: (row[0], row[1], row[3] or '', row[4] or ''))
+        
+        conn = self.get_connection()
+        try:
+            with conn:
+                # 已存在的记录原地更新，不像 INSERT OR REPLACE 那样先删除再插入
+                conn.executemany('''
+                INSERT INTO longhubang_records 
                 (date, stock_code, stock_name, youzi_name, yingye_bu, list_type, 
                  buy_amount, sell_amount, net_inflow, concepts)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record.get('rq') or record.get('日期'),
-                    record.get('gpdm') or record.get('股票代码'),
-                    record.get('gpmc') or record.get('股票名称'),
-                    record.get('yzmc') or record.get('游资名称'),
-                    record.get('yyb') or record.get('营业部'),
-                    record.get('sblx') or record.get('榜单类型'),
-                    float(record.get('mrje') or record.get('买入金额') or 0),
-                    float(record.get('mcje') or record.get('卖出金额') or 0),
-                    float(record.get('jlrje') or record.get('净流入金额') or 0),
-                    record.get('gl') or record.get('概念')
-                ))
-                saved_count += 1
-            except Exception as e:
-                print(f"保存记录失败: {e}")
-                continue
+                ON CONFLICT(date, stock_code, youzi_name, yingye_bu) DO UPDATE SET
+                    stock_name = excluded.stock_name,
+                    list_type = excluded.list_type,
+                    buy_amount = excluded.buy_amount,
+                    sell_amount = excluded.sell_amount,
+                    net_inflow = excluded.net_inflow,
+                    concepts = excluded.concepts,
+                    created_at = CURRENT_TIMESTAMP
+                ''', rows)
+                self._refresh_daily_rollups(conn, {row[0] for row in rows})
+                if fetched_dates:
+                    self._write_fetch_log(conn, fetched_dates)
+            if rows:
+                # 更新统计信息（抽样），查询规划器据此选择 (youzi_name, date) 等复合索引
+                conn.execute('PRAGMA analysis_limit=1000')
+                conn.execute('ANALYZE')
+                conn.commit()
+        finally:
+            conn.close()
+        
+        saved_count = len(rows)
+        print(f"[智瞰龙虎] 成功保存 {saved_count} 条龙虎榜记录")
+        return saved_count
+    
+    @staticmethod
+    def _refresh_daily_rollups(conn, dates):
+        """
+        按原始记录重建指定日期的游资/股票/概念日汇总（调用方负责提交事务）
         
-        conn.commit()
+        Args:
+            conn: 数据库连接
+            dates: 需要重建的日期
+        """
+        dates = [(date,) for date in sorted(dates)]
+        if not dates:
+            return
+        
+        for table in ('longhubang_youzi_daily', 'longhubang_stock_daily', 'longhubang_concept_daily'):
+            conn.executemany(f'DELETE FROM {table} WHERE date = ?', dates)
+        
+        conn.executemany('''
+        INSERT INTO longhubang_youzi_daily
+        (date, youzi_name, trade_count, total_buy, total_sell, total_net_inflow)
+        SELECT date, youzi_name, COUNT(*), SUM(buy_amount), SUM(sell_amount), SUM(net_inflow)
+        FROM longhubang_records WHERE date = ?
+        GROUP BY youzi_name
+        ''', dates)
+        conn.executemany('''
+        INSERT INTO longhubang_stock_daily
+        (date, stock_code, stock_name, record_count, total_buy, total_sell, total_net_inflow)
+        SELECT date, stock_code, stock_name, COUNT(*), SUM(buy_amount), SUM(sell_amount), SUM(net_inflow)
+        FROM longhubang_records WHERE date = ?
+        GROUP BY stock_code, stock_name
+        ''', dates)
+        
+        # 概念为逗号分隔的字符串，拆分后按 (日期, 概念) 汇总：上榜股票数、记录数、净流入
+        concept_rows = {}
+        for (date,) in dates:
+            cursor = conn.execute('''
+            SELECT stock_code, concepts, COUNT(*), SUM(net_inflow)
+            FROM longhubang_records WHERE date = ? AND concepts IS NOT NULL AND concepts != ''
+            GROUP BY stock_code, concepts
+            ''', (date,))
+            daily = {}
+            for stock_code, concepts, record_count, net_inflow in cursor.fetchall():
+                for concept in {c.strip() for c in concepts.split(',')} - {''}:
+                    stocks, records, net = daily.get(concept, (set(), 0, 0.0))
+                    stocks.add(stock_code)
+                    daily[concept] = (stocks, records + record_count, net + (net_inflow or 0.0))
+            for concept, (stocks, records, net) in daily.items():
+                concept_rows[(date, concept)] = (date, concept, len(stocks), records, net)
+        conn.executemany('''
+        INSERT INTO longhubang_concept_daily (date, concept, stock_count, record_count, total_net_inflow)
+        VALUES (?, ?, ?, ?, ?)
+        ''', list(concept_rows.values()))
+    
+    @staticmethod
+    def _date_range_filter(start_date=None, end_date=None):
+        """生成日期范围的 WHERE 子句及参数"""
+        clauses, params = ['1=1'], []
+        if start_date:
+            clauses.append('date >= ?')
+            params.append(start_date)
+        if end_date:
+            clauses.append('date <= ?')
+            params.append(end_date)
+        return ' AND '.join(clauses), params
+    
+    def get_fetched_dates(self, start_date, end_date):
+        """
+        获取日期范围内已下载过的日期
+        
+        Args:
+            start_date: 开始日期，格式为 YYYY-MM-DD
+            end_date: 结束日期，格式为 YYYY-MM-DD
+            
+        Returns:
+            dict: {日期: 下载时间（YYYY-MM-DD HH:MM:SS）}
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT date, fetched_at FROM longhubang_fetch_log WHERE date >= ? AND date <= ?
+        ''', (start_date, end_date))
+        fetched = dict(cursor.fetchall())
         conn.close()
+        return fetched
+    
+    @staticmethod
+    def _write_fetch_log(conn, date_counts):
+        fetched_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn.executemany('''
+        INSERT OR REPLACE INTO longhubang_fetch_log (date, record_count, fetched_at)
+        VALUES (?, ?, ?)
+        ''', [(date, count, fetched_at) for date, count in date_counts.items()])
+    
+    def mark_dates_fetched(self, date_counts):
+        """
+        记录已下载的日期
         
-        print(f"[智瞰龙虎] 成功保存 {saved_count} 条龙虎榜记录")
-        return saved_count
+        Args:
+            date_counts: {日期: 当日记录数}（记录数为0表示当日无龙虎榜数据）
+        """
+        if not date_counts:
+            return
+        
+        conn = self.get_connection()
+        try:
+            with conn:
+                self._write_fetch_log(conn, date_counts)
+        finally:
+            conn.close()
+    
+    def get_raw_records(self, start_date, end_date):
+        """
+        按接口原始字段格式读取日期范围内的龙虎榜记录
+        
+        Args:
+            start_date: 开始日期，格式为 YYYY-MM-DD
+            end_date: 结束日期，格式为 YYYY-MM-DD
+            
+        Returns:
+            list: 与 StockAPI 返回的 data 字段结构相同的记录列表（按日期升序）
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT date, stock_code, stock_name, youzi_name, yingye_bu, list_type,
+               buy_amount, sell_amount, net_inflow, concepts
+        FROM longhubang_records
+        WHERE date >= ? AND date <= ?
+        ORDER BY date, id
+        ''', (start_date, end_date))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        keys = ('rq', 'gpdm', 'gpmc', 'yzmc', 'yyb', 'sblx', 'mrje', 'mcje', 'jlrje', 'gl')
+        return [dict(zip(keys, row)) for row in rows]
     
     def get_longhubang_data(self, start_date=None, end_date=None, stock_code=None):
         """
@@ -188,7 +421,7 @@ class LonghubangDatabase:
     
     def get_top_youzi(self, start_date=None, end_date=None, limit=20):
         """
-        获取活跃游资排名
+        获取活跃游资排名（在游资日汇总表上按日期范围求和）
         
         Args:
             start_date: 开始日期
@@ -198,36 +431,23 @@ class LonghubangDatabase:
         Returns:
             pd.DataFrame: 游资排名
         """
-        conn = self.get_connection()
-        
-        query = '''
+        where, params = self._date_range_filter(start_date, end_date)
+        query = f'''
         SELECT 
             youzi_name,
-            COUNT(*) as trade_count,
-            SUM(buy_amount) as total_buy,
-            SUM(sell_amount) as total_sell,
-            SUM(net_inflow) as total_net_inflow
-        FROM longhubang_records
-        WHERE 1=1
-        '''
-        
-        params = []
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
-        
-        query += '''
+            SUM(trade_count) as trade_count,
+            SUM(total_buy) as total_buy,
+            SUM(total_sell) as total_sell,
+            SUM(total_net_inflow) as total_net_inflow
+        FROM longhubang_youzi_daily
+        WHERE {where}
         GROUP BY youzi_name
         ORDER BY total_net_inflow DESC
         LIMIT ?
         '''
         params.append(limit)
         
+        conn = self.get_connection()
         df = pd.read_sql_query(query, conn, params=params)
         conn.close()
         
@@ -237,6 +457,8 @@ class LonghubangDatabase:
         """
         获取热门股票排名
         
+        资金合计在股票日汇总表上按日期范围求和；游资数量（去重）与概念只对排名靠前的股票从原始记录中查询
+        
         Args:
             start_date: 开始日期
             end_date: 结束日期
@@ -245,38 +467,73 @@ class LonghubangDatabase:
         Returns:
             pd.DataFrame: 股票排名
         """
+        where, params = self._date_range_filter(start_date, end_date)
         conn = self.get_connection()
         
-        query = '''
+        top_df = pd.read_sql_query(f'''
+        SELECT 
+            stock_code,
+            stock_name,
+            SUM(total_buy) as total_buy,
+            SUM(total_sell) as total_sell,
+            SUM(total_net_inflow) as total_net_inflow
+        FROM longhubang_stock_daily
+        WHERE {where}
+        GROUP BY stock_code, stock_name
+        ORDER BY total_net_inflow DESC
+        LIMIT ?
+        ''', conn, params=params + [limit])
+        
+        columns = ['stock_code', 'stock_name', 'youzi_count', 'total_buy', 'total_sell',
+                   'total_net_inflow', 'all_concepts']
+        if top_df.empty:
+            conn.close()
+            return pd.DataFrame(columns=columns)
+        
+        codes = top_df['stock_code'].unique().tolist()
+        detail_df = pd.read_sql_query(f'''
         SELECT 
             stock_code,
             stock_name,
             COUNT(DISTINCT youzi_name) as youzi_count,
-            SUM(buy_amount) as total_buy,
-            SUM(sell_amount) as total_sell,
-            SUM(net_inflow) as total_net_inflow,
             GROUP_CONCAT(DISTINCT concepts) as all_concepts
         FROM longhubang_records
-        WHERE 1=1
-        '''
-        
-        params = []
-        
-        if start_date:
-            query += " AND date >= ?"
-            params.append(start_date)
+        WHERE {where} AND stock_code IN ({','.join('?' * len(codes))})
+        GROUP BY stock_code, stock_name
+        ''', conn, params=params + codes)
+        conn.close()
         
-        if end_date:
-            query += " AND date <= ?"
-            params.append(end_date)
+        df = top_df.merge(detail_df, on=['stock_code', 'stock_name'], how='left')
+        return df[columns]
+    
+    def get_top_concepts(self, start_date=None, end_date=None, limit=20):
+        """
+        获取热门概念排名（在概念日汇总表上按日期范围求和）
         
-        query += '''
-        GROUP BY stock_code, stock_name
-        ORDER BY total_net_inflow DESC
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            limit: 返回数量
+            
+        Returns:
+            pd.DataFrame: 概念排名，stock_count 为上榜股票次数（按日累计）
+        """
+        where, params = self._date_range_filter(start_date, end_date)
+        query = f'''
+        SELECT 
+            concept,
+            SUM(stock_count) as stock_count,
+            SUM(record_count) as record_count,
+            SUM(total_net_inflow) as total_net_inflow
+        FROM longhubang_concept_daily
+        WHERE {where}
+        GROUP BY concept
+        ORDER BY stock_count DESC, total_net_inflow DESC
         LIMIT ?
         '''
         params.append(limit)
         
+        conn = self.get_connection()
         df = pd.read_sql_query(query, conn, params=params)
         conn.close()
         
@@ -432,24 +689,28 @@ class LonghubangDatabase:
         
         stats = {}
         
-        # 总记录数
-        cursor.execute('SELECT COUNT(*) FROM longhubang_records')
+        # 总记录数（汇总表中的记录数之和）
+        cursor.execute('SELECT COALESCE(SUM(trade_count), 0) FROM longhubang_youzi_daily')
         stats['total_records'] = cursor.fetchone()[0]
         
-        # 涉及股票数
-        cursor.execute('SELECT COUNT(DISTINCT stock_code) FROM longhubang_records')
+        # 涉及股票数（子查询形式可沿索引跳跃去重）
+        cursor.execute('SELECT COUNT(*) FROM (SELECT DISTINCT stock_code FROM longhubang_stock_daily)')
         stats['total_stocks'] = cursor.fetchone()[0]
         
         # 涉及游资数
-        cursor.execute('SELECT COUNT(DISTINCT youzi_name) FROM longhubang_records')
+        cursor.execute('''
+        SELECT COUNT(*) FROM (SELECT DISTINCT youzi_name FROM longhubang_youzi_daily WHERE youzi_name IS NOT NULL)
+        ''')
         stats['total_youzi'] = cursor.fetchone()[0]
         
         # 分析报告数
         cursor.execute('SELECT COUNT(*) FROM longhubang_analysis')
         stats['total_reports'] = cursor.fetchone()[0]
         
-        # 日期范围
-        cursor.execute('SELECT MIN(date), MAX(date) FROM longhubang_records')
+        # 日期范围（MIN、MAX 分开查询才能各自直接从索引两端读取）
+        cursor.execute('''
+        SELECT (SELECT MIN(date) FROM longhubang_records), (SELECT MAX(date) FROM longhubang_records)
+        ''')
         date_range = cursor.fetchone()
         stats['date_range'] = {
             'start': date_range[0],
@@ -495,4 +756,64 @@ if __name__ == "__main__":
     # 获取统计信息
     stats = db.get_statistics()
     print(f"\n数据库统计: {stats}")
-
+    
+    # 批量写入与统计查询性能测试（模拟1年 × 每日约700条龙虎榜记录）
+    import os
+    import random
+    import tempfile
+    import timeit
+    
+    random.seed(42)
+    dates = [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2024-01-01', periods=250)]
+    youzi_names = [f'游资{i}' for i in range(300)]
+    year_data = []
+    daily_data = {date: [] for date in dates}
+    for date in dates:
+        for stock in random.sample(range(5000), 70):
+            for seat in random.sample(range(300), 10):
+                buy, sell = random.randint(0, 10 ** 8), random.randint(0, 10 ** 8)
+                daily_data[date].append({
+                    'rq': date, 'gpdm': f'{stock:06d}', 'gpmc': f'股票{stock}',
+                    'yzmc': youzi_names[seat], 'yyb': f'营业部{seat}', 'sblx': '1',
+                    'mrje': buy, 'mcje': sell, 'jlrje': buy - sell, 'gl': '人工智能,芯片'
+                })
+        year_data.extend(daily_data[date])
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 一次性回填全年数据（单个事务）
+        bench_db = LonghubangDatabase(os.path.join(tmp_dir, 'bench_longhubang.db'))
+        start = timeit.default_timer()
+        bench_db.save_longhubang_data(year_data, fetched_dates={date: len(daily_data[date]) for date in dates})
+        bulk_time = timeit.default_timer() - start
+        
+        # 全年数据再次写入（全部为已有记录的更新）
+        start = timeit.default_timer()
+        bench_db.save_longhubang_data(year_data)
+        upsert_time = timeit.default_timer() - start
+        
+        # 按日增量写入（每天一个事务）
+        daily_db = LonghubangDatabase(os.path.join(tmp_dir, 'bench_longhubang_daily.db'))
+        start = timeit.default_timer()
+        for date in dates:
+            daily_db.save_longhubang_data(daily_data[date])
+        daily_time = timeit.default_timer() - start
+        
+        month_start, month_end = dates[-21], dates[-1]
+        queries = {
+            '单股票全年明细': lambda: bench_db.get_longhubang_data(dates[0], dates[-1], stock_code='000042'),
+            '单日明细': lambda: bench_db.get_longhubang_data(month_end, month_end),
+            '近一月游资排名': lambda: bench_db.get_top_youzi(month_start, month_end),
+            '全年游资排名': lambda: bench_db.get_top_youzi(dates[0], dates[-1]),
+            '近一月股票排名': lambda: bench_db.get_top_stocks(month_start, month_end),
+            '全年股票排名': lambda: bench_db.get_top_stocks(dates[0], dates[-1]),
+            '全年概念排名': lambda: bench_db.get_top_concepts(dates[0], dates[-1]),
+            '数据库统计': bench_db.get_statistics,
+        }
+        
+        print("\n" + "=" * 60)
+        print(f"全年 {len(year_data)} 条记录一次性写入: {bulk_time:.2f}秒 （{len(year_data) / bulk_time:,.0f} 条/秒）")
+        print(f"全年数据重复写入（更新已有记录）: {upsert_time:.2f}秒 （{len(year_data) / upsert_time:,.0f} 条/秒）")
+        print(f"按日增量写入 {len(dates)} 天: {daily_time:.2f}秒 （{len(year_data) / daily_time:,.0f} 条/秒）")
+        for label, query in queries.items():
+            elapsed = min(timeit.repeat(query, number=1, repeat=5))
+            print(f"{label}: {elapsed * 1000:.1f}ms")
@@ -7,6 +7,7 @@ from longhubang_data import LonghubangDataFetcher
 from longhubang_db import LonghubangDatabase
 from longhubang_agents import LonghubangAgents
 from longhubang_scoring import LonghubangScoring
+from stage_timer import PipelineTrace, span
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 import time
@@ -23,23 +24,32 @@ class LonghubangEngine:
             model: AI模型名称
             db_path: 数据库路径
         """
-        self.data_fetcher = LonghubangDataFetcher()
         self.database = LonghubangDatabase(db_path)
+        self.data_fetcher = LonghubangDataFetcher(database=self.database)
         self.agents = LonghubangAgents(model=model)
         self.scoring = LonghubangScoring()
         print(f"[智瞰龙虎] 分析引擎初始化完成")
     
-    def run_comprehensive_analysis(self, date=None, days=1) -> Dict[str, Any]:
+    def run_comprehensive_analysis(self, date=None, days=1, refresh_today=False) -> Dict[str, Any]:
         """
         运行完整的龙虎榜分析流程
         
         Args:
             date: 指定日期，格式 YYYY-MM-DD，默认为昨日
             days: 分析最近几天的数据，默认1天
+            refresh_today: 是否重新下载今天的龙虎榜数据（其余日期优先使用数据库中的数据）
             
         Returns:
-            完整的分析结果
+            完整的分析结果，timings 字段为各阶段及LLM调用的耗时明细
         """
+        trace = PipelineTrace('longhubang', date or f'recent_{days}d')
+        with trace.activate():
+            results = self._run_comprehensive_analysis(date, days, refresh_today)
+        results["timings"] = trace.finish(record_id=results.get("report_id"), success=results.get("success", False))
+        return results
+    
+    def _run_comprehensive_analysis(self, date, days, refresh_today=False) -> Dict[str, Any]:
+        """完整分析流程的具体实现（各阶段计入当前流程的耗时统计）"""
         print("\n" + "=" * 60)
         print("🚀 智瞰龙虎综合分析系统启动")
         print("=" * 60)
@@ -58,11 +68,12 @@ class LonghubangEngine:
             print("\n[阶段1] 获取龙虎榜数据...")
             print("-" * 60)
             
-            if date:
-                data_list = [self.data_fetcher.get_longhubang_data(date)]
-                data_list = data_list[0].get('data', []) if data_list[0] else []
-            else:
-                data_list = self.data_fetcher.get_recent_days_data(days)
+            with span("fetch_data"):
+                # 数据库中已有的日期直接读取，只下载缺失日期并写入数据库
+                if date:
+                    data_list = self.data_fetcher.get_longhubang_data_range(date, date, refresh_today=refresh_today)
+                else:
+                    data_list = self.data_fetcher.get_recent_days_data(days, refresh_today=refresh_today)
             
             if not data_list:
                 print("✗ 未获取到龙虎榜数据")
@@ -71,17 +82,17 @@ class LonghubangEngine:
             
             print(f"✓ 成功获取 {len(data_list)} 条龙虎榜记录")
             
-            # 阶段2: 保存数据到数据库
+            # 阶段2: 新下载的数据已在获取时写入数据库
             print("\n[阶段2] 保存数据到数据库...")
             print("-" * 60)
-            saved_count = self.database.save_longhubang_data(data_list)
-            print(f"✓ 保存 {saved_count} 条记录")
+            print(f"✓ 新下载的数据已写入数据库")
             
             # 阶段3: 数据分析和统计
             print("\n[阶段3] 数据分析和统计...")
             print("-" * 60)
-            summary = self.data_fetcher.analyze_data_summary(data_list)
-            formatted_data = self.data_fetcher.format_data_for_ai(data_list, summary)
+            with span("summary"):
+                summary = self.data_fetcher.analyze_data_summary(data_list)
+                formatted_data = self.data_fetcher.format_data_for_ai(data_list, summary)
             
             results["data_info"] = {
                 "total_records": summary.get('total_records', 0),
@@ -94,7 +105,8 @@ class LonghubangEngine:
             # 阶段3.5: AI智能评分排名
             print("\n[阶段3.5] AI智能评分排名...")
             print("-" * 60)
-            scoring_df = self.scoring.score_all_stocks(data_list)
+            with span("scoring"):
+                scoring_df = self.scoring.score_all_stocks(data_list)
             results["scoring_ranking"] = scoring_df
             print(f"✓ 完成 {len(scoring_df)} 只股票的智能评分排名")
             
@@ -106,28 +118,33 @@ class LonghubangEngine:
             
             # 1. 游资行为分析师
             print("1/5 游资行为分析师...")
-            youzi_result = self.agents.youzi_behavior_analyst(formatted_data, summary)
+            with span("agent:youzi", 'agent'):
+                youzi_result = self.agents.youzi_behavior_analyst(formatted_data, summary)
             agents_results["youzi"] = youzi_result
             
             # 2. 个股潜力分析师
             print("2/5 个股潜力分析师...")
-            stock_result = self.agents.stock_potential_analyst(formatted_data, summary)
+            with span("agent:stock", 'agent'):
+                stock_result = self.agents.stock_potential_analyst(formatted_data, summary)
             agents_results["stock"] = stock_result
             
             # 3. 题材追踪分析师
             print("3/5 题材追踪分析师...")
-            theme_result = self.agents.theme_tracker_analyst(formatted_data, summary)
+            with span("agent:theme", 'agent'):
+                theme_result = self.agents.theme_tracker_analyst(formatted_data, summary)
             agents_results["theme"] = theme_result
             
             # 4. 风险控制专家
             print("4/5 风险控制专家...")
-            risk_result = self.agents.risk_control_specialist(formatted_data, summary)
+            with span("agent:risk", 'agent'):
+                risk_result = self.agents.risk_control_specialist(formatted_data, summary)
             agents_results["risk"] = risk_result
             
             # 5. 首席策略师综合
             print("5/5 首席策略师综合分析...")
             all_analyses = [youzi_result, stock_result, theme_result, risk_result]
-            chief_result = self.agents.chief_strategist(all_analyses)
+            with span("agent:chief", 'agent'):
+                chief_result = self.agents.chief_strategist(all_analyses)
             agents_results["chief"] = chief_result
             
             results["agents_analysis"] = agents_results
@@ -136,18 +153,20 @@ class LonghubangEngine:
             # 阶段5: 提取推荐股票
             print("\n[阶段5] 提取推荐股票...")
             print("-" * 60)
-            recommended_stocks = self._extract_recommended_stocks(
-                chief_result.get('analysis', ''),
-                stock_result.get('analysis', ''),
-                summary
-            )
+            with span("extract_stocks"):
+                recommended_stocks = self._extract_recommended_stocks(
+                    chief_result.get('analysis', ''),
+                    stock_result.get('analysis', ''),
+                    summary
+                )
             results["recommended_stocks"] = recommended_stocks
             print(f"✓ 提取 {len(recommended_stocks)} 只推荐股票")
             
             # 阶段6: 生成最终报告
             print("\n[阶段6] 生成最终报告...")
             print("-" * 60)
-            final_report = self._generate_final_report(agents_results, summary, recommended_stocks)
+            with span("final_report"):
+                final_report = self._generate_final_report(agents_results, summary, recommended_stocks)
             results["final_report"] = final_report
             print("✓ 最终报告生成完成")
             
@@ -176,13 +195,14 @@ class LonghubangEngine:
                 "timestamp": results["timestamp"]
             }
             
-            report_id = self.database.save_analysis_report(
-                data_date_range=data_date_range,
-                analysis_content=full_analysis_content,  # 保存完整的结构化数据
-                recommended_stocks=recommended_stocks,
-                summary=final_report.get('summary', ''),
-                full_result=results  # 传入完整结果
-            )
+            with span("save_report"):
+                report_id = self.database.save_analysis_report(
+                    data_date_range=data_date_range,
+                    analysis_content=full_analysis_content,  # 保存完整的结构化数据
+                    recommended_stocks=recommended_stocks,
+                    summary=final_report.get('summary', ''),
+                    full_result=results  # 传入完整结果
+                )
             results["report_id"] = report_id
             print(f"✓ 完整报告已保存 (ID: {report_id})")
             
@@ -358,6 +378,20 @@ class LonghubangEngine:
             股票排名
         """
         return self.database.get_top_stocks(start_date, end_date, limit)
+    
+    def get_top_concepts(self, start_date=None, end_date=None, limit=20):
+        """
+        获取热门概念排名
+        
+        Args:
+            start_date: 开始日期
+            end_date: 结束日期
+            limit: 返回数量
+            
+        Returns:
+            概念排名
+        """
+        return self.database.get_top_concepts(start_date, end_date, limit)
 
 
 # 测试函数
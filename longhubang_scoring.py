@@ -3,9 +3,10 @@
 对龙虎榜上榜股票进行综合评分排名
 """
 
+import re
+import numpy as np
 import pandas as pd
 from typing import Dict, List
-from collections import Counter
 
 
 class LonghubangScoring:
@@ -34,6 +35,18 @@ class LonghubangScoring:
             'QFII', 'RQFII', '券商', '信托'
         ]
         
+        # 热门概念关键词
+        self.hot_concept_keywords = [
+            '人工智能', 'AI', 'ChatGPT', '算力', '新能源', '芯片', '半导体',
+            '军工', '医药', '消费', '5G', '新材料', '量子', '光伏',
+            '储能', '锂电池', '汽车', '游戏', '传媒', '元宇宙'
+        ]
+        
+        # 热门概念每个加0.3分、最多3分；按逐次累加的结果查表，与逐条计算的浮点结果完全一致
+        self._concept_score_steps = [0.0]
+        while self._concept_score_steps[-1] < 3.0:
+            self._concept_score_steps.append(self._concept_score_steps[-1] + 0.3)
+        
         print("[智瞰龙虎] 评分系统初始化完成")
     
     def calculate_stock_score(self, stock_data: List[Dict]) -> float:
@@ -302,15 +315,9 @@ class LonghubangScoring:
             if concepts:
                 all_concepts.extend([c.strip() for c in str(concepts).split(',')])
         
-        hot_keywords = [
-            '人工智能', 'AI', 'ChatGPT', '算力', '新能源', '芯片', '半导体',
-            '军工', '医药', '消费', '5G', '新材料', '量子', '光伏',
-            '储能', '锂电池', '汽车', '游戏', '传媒', '元宇宙'
-        ]
-        
         concept_score = 0
         for concept in all_concepts:
-            if any(keyword in concept for keyword in hot_keywords):
+            if any(keyword in concept for keyword in self.hot_concept_keywords):
                 concept_score += 0.3
         
         score += min(concept_score, 3.0)
@@ -348,10 +355,51 @@ class LonghubangScoring:
         
         return min(score, max_score)
     
+    @staticmethod
+    def _normalize_records(data_list: List[Dict]) -> pd.DataFrame:
+        """
+        将龙虎榜记录的中英文字段统一为一张表，金额只解析一次
+        
+        Returns:
+            DataFrame: 列为 code, name, youzi, yingye_bu, buy, sell, net, concepts；
+                       已去除没有股票代码的记录，金额无法解析时记为0
+        """
+        fields = {
+            'code': ('股票代码', 'gpdm', None),
+            'name': ('股票名称', 'gpmc', None),
+            'youzi': ('游资名称', 'yzmc', ''),
+            'yingye_bu': ('营业部', 'yyb', ''),
+            'buy': ('买入金额', 'mrje', 0),
+            'sell': ('卖出金额', 'mcje', 0),
+            'net': ('净流入金额', 'jlrje', 0),
+            'concepts': ('概念', 'gl', '')
+        }
+        df = pd.DataFrame({
+            col: [r.get(cn) or r.get(en) or default for r in data_list]
+            for col, (cn, en, default) in fields.items()
+        })
+        df = df[df['code'].notna()].reset_index(drop=True)
+        for col in ('buy', 'sell', 'net'):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0).astype(np.float64)
+        return df
+    
+    @staticmethod
+    def _match_keywords(texts: pd.Series, keywords: List[str]) -> np.ndarray:
+        """判断每个文本是否包含任一关键词（相同文本只匹配一次）"""
+        codes, uniques = pd.factorize(texts)
+        if len(uniques) == 0:
+            return np.zeros(len(texts), dtype=bool)
+        pattern = '|'.join(re.escape(keyword) for keyword in keywords)
+        matched = pd.Series(uniques).astype(str).str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        return matched[codes]
+    
     def score_all_stocks(self, data_list: List[Dict]) -> pd.DataFrame:
         """
         对所有上榜股票进行评分排名
         
+        各维度的定义与 _calculate_* 逐股计算一致，这里对全部记录按股票分组一次性向量化计算，
+        金额累加按记录顺序进行，评分与排名与逐股计算完全相同
+        
         Args:
             data_list: 龙虎榜数据列表
             
@@ -361,143 +409,129 @@ class LonghubangScoring:
         if not data_list:
             return pd.DataFrame()
         
-        # 按股票代码分组
-        stocks_dict = {}
-        for record in data_list:
-            code = record.get('股票代码') or record.get('gpdm')
-            name = record.get('股票名称') or record.get('gpmc')
-            
-            if not code:
-                continue
-            
-            if code not in stocks_dict:
-                stocks_dict[code] = {
-                    'code': code,
-                    'name': name,
-                    'records': []
-                }
-            
-            stocks_dict[code]['records'].append(record)
+        df = self._normalize_records(data_list)
+        if df.empty:
+            return pd.DataFrame()
         
-        # 计算每只股票的评分
-        results = []
-        for code, stock_info in stocks_dict.items():
-            records = stock_info['records']
-            
-            # 计算各维度评分
-            capital_quality = self._calculate_capital_quality(records)
-            net_inflow = self._calculate_net_inflow_score(records)
-            sell_pressure = self._calculate_sell_pressure_score(records)
-            institution = self._calculate_institution_score(records)
-            bonus = self._calculate_bonus_score(records)
-            
-            total_score = capital_quality + net_inflow + sell_pressure + institution + bonus
-            
-            # 计算实际数据（安全转换）
-            total_buy = 0.0
-            total_sell = 0.0
-            total_net = 0.0
-            for r in records:
-                try:
-                    buy = float(r.get('买入金额', 0) or r.get('mrje', 0) or 0)
-                    total_buy += buy
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    sell = float(r.get('卖出金额', 0) or r.get('mcje', 0) or 0)
-                    total_sell += sell
-                except (ValueError, TypeError):
-                    pass
-                try:
-                    net = float(r.get('净流入金额', 0) or r.get('jlrje', 0) or 0)
-                    total_net += net
-                except (ValueError, TypeError):
-                    pass
-            
-            # 统计买入席位数（安全比较）
-            buy_seats = 0
-            for r in records:
-                try:
-                    buy = float(r.get('买入金额', 0) or r.get('mrje', 0) or 0)
-                    if buy > 0:
-                        buy_seats += 1
-                except (ValueError, TypeError):
-                    pass
+        # 按股票代码分组（保持首次出现的顺序），名称取该股票第一条记录
+        codes, stock_codes = pd.factorize(df['code'])
+        n_stocks = len(stock_codes)
+        first_rows = np.unique(codes, return_index=True)[1]
+        stock_names = df['name'].to_numpy()[first_rows]
+        
+        def group_sum(values):
+            # bincount 按记录顺序逐条累加，与逐股循环求和的浮点结果一致
+            return np.bincount(codes, weights=values, minlength=n_stocks)
+        
+        buy = df['buy'].to_numpy()
+        sell = df['sell'].to_numpy()
+        is_buyer = buy > 0
+        
+        # 席位（游资名称+营业部）关键词匹配，分隔符保证关键词不会跨两个字段匹配
+        seats = df['youzi'].astype(str) + '\x00' + df['yingye_bu'].astype(str)
+        is_top = self._match_keywords(seats, self.top_youzi)
+        is_famous = self._match_keywords(seats, self.famous_youzi) & ~is_top
+        is_institution = self._match_keywords(seats, self.institution_keywords)
+        
+        record_count = np.bincount(codes, minlength=n_stocks)
+        buyer_count = group_sum(is_buyer)
+        top_count = group_sum(is_buyer & is_top)
+        famous_count = group_sum(is_buyer & is_famous)
+        institution_buyers = group_sum(is_buyer & is_institution)
+        institution_count = group_sum(is_institution)
+        total_buy = group_sum(buy)
+        total_sell = group_sum(sell)
+        total_net = group_sum(df['net'].to_numpy())
+        
+        # 热门概念：每条记录的概念按逗号拆分后逐个匹配（相同的概念串只拆分一次）
+        concept_codes, concept_texts = pd.factorize(df['concepts'].astype(str))
+        concepts = pd.Series(concept_texts, dtype=object).str.split(',').explode().str.strip()
+        hot = self._match_keywords(concepts, self.hot_concept_keywords)
+        hot_per_text = np.bincount(concepts.index.to_numpy(dtype=np.int64), weights=hot, minlength=len(concept_texts))
+        hot_count = group_sum(hot_per_text[concept_codes]).astype(np.int64)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 1. 买入资金含金量 (0-30分)
+            ordinary_count = buyer_count - top_count - famous_count
+            capital_quality = np.minimum(top_count * 10.0 + famous_count * 5.0 + ordinary_count * 1.5, 30.0)
             
-            # 统计机构数量
-            institution_count = sum(1 for r in records 
-                                  if any(kw in (r.get('游资名称', '') or r.get('yzmc', '')) or 
-                                        kw in (r.get('营业部', '') or r.get('yyb', ''))
-                                        for kw in self.institution_keywords))
+            # 2. 净买入额 (0-25分)
+            net_wan = total_net / 10000
+            net_inflow = np.select(
+                [total_net <= 0, net_wan < 1000, net_wan < 5000, net_wan < 10000],
+                [0.0,
+                 (net_wan / 1000) * 10,
+                 10 + ((net_wan - 1000) / 4000) * 8,
+                 18 + ((net_wan - 5000) / 5000) * 4],
+                22 + np.minimum((net_wan - 10000) / 10000, 1) * 3
+            )
+            net_inflow = np.minimum(net_inflow, 25.0)
             
-            # 获取概念
-            concepts_list = []
-            for r in records:
-                concepts = r.get('概念', '') or r.get('gl', '')
-                if concepts:
-                    concepts_list.extend([c.strip() for c in str(concepts).split(',')])
+            # 3. 卖出压力 (0-20分)
+            sell_ratio = np.where(total_buy > 0, total_sell / total_buy, 1.0)
+            sell_pressure = np.select(
+                [sell_ratio < 0.1, sell_ratio < 0.3, sell_ratio < 0.5, sell_ratio < 0.8],
+                [20.0,
+                 20.0 - (sell_ratio - 0.1) / 0.2 * 5,
+                 15.0 - (sell_ratio - 0.3) / 0.2 * 5,
+                 10.0 - (sell_ratio - 0.5) / 0.3 * 5],
+                5.0 - np.minimum(sell_ratio - 0.8, 0.2) / 0.2 * 5
+            )
+            sell_pressure = np.where(total_buy == 0, 0.0, np.maximum(0, np.minimum(sell_pressure, 20.0)))
             
-            top_concepts = Counter(concepts_list).most_common(3)
-            concept_str = ','.join([c[0] for c in top_concepts]) if top_concepts else ''
+            # 4. 机构共振 (0-15分)
+            youzi_buyers = buyer_count - institution_buyers
+            institution = np.select(
+                [(institution_buyers > 0) & (youzi_buyers > 0), institution_buyers > 0, youzi_buyers > 0],
+                [15.0, np.minimum(8 + institution_buyers * 2, 12), np.minimum(5 + youzi_buyers * 1, 10)],
+                0.0
+            )
             
-            # 判断机构参与
-            has_institution = institution_count > 0
-            
-            results.append({
-                '排名': 0,  # 稍后填充
-                '股票名称': stock_info['name'],
-                '股票代码': code,
-                '综合评分': round(total_score, 1),
-                '资金含金量': round(capital_quality, 0),
-                '净买入额': round(net_inflow, 0),
-                '卖出压力': round(sell_pressure, 0),
-                '机构共振': round(institution, 0),
-                '加分项': round(bonus, 0),
-                '顶级游资': self._count_top_youzi(records),
-                '买方数': buy_seats,
-                '机构参与': '✅' if has_institution else '❌',
-                '净流入': round(total_net, 2)
-            })
-        
-        # 转换为DataFrame并排序
-        df = pd.DataFrame(results)
-        if df.empty:
-            return df
+            # 5. 其他加分项 (0-10分)：主力集中度、热门概念、连续上榜、买卖比例
+            concentration = np.select(
+                [record_count == 1, record_count == 2, record_count == 3, record_count <= 5],
+                [3.0, 2.5, 2.0, 1.5],
+                1.0
+            )
+            steps = np.array(self._concept_score_steps)
+            concept_score = np.minimum(steps[np.minimum(hot_count, len(steps) - 1)], 3.0)
+            consecutive = np.select([record_count >= 3, record_count == 2], [2.0, 1.0], 0.0)
+            buy_sell_ratio = total_buy / (total_sell + 1)
+            ratio_bonus = np.select(
+                [total_buy <= 0, buy_sell_ratio >= 10, buy_sell_ratio >= 5, buy_sell_ratio >= 3],
+                [0.0, 2.0, 1.5, 1.0],
+                0.0
+            )
+            bonus = np.minimum(0.0 + concentration + concept_score + consecutive + ratio_bonus, 10.0)
+        
+        total_score = capital_quality + net_inflow + sell_pressure + institution + bonus
+        
+        df = pd.DataFrame({
+            '排名': 0,  # 稍后填充
+            '股票名称': stock_names,
+            '股票代码': np.asarray(stock_codes, dtype=object),
+            '综合评分': [round(v, 1) for v in total_score.tolist()],
+            '资金含金量': [round(v, 0) for v in capital_quality.tolist()],
+            '净买入额': [round(v, 0) for v in net_inflow.tolist()],
+            '卖出压力': [round(v, 0) for v in sell_pressure.tolist()],
+            '机构共振': [round(v, 0) for v in institution.tolist()],
+            '加分项': [round(v, 0) for v in bonus.tolist()],
+            '顶级游资': top_count.astype(np.int64),
+            '买方数': buyer_count.astype(np.int64),
+            '机构参与': np.where(institution_count > 0, '✅', '❌'),
+            '净流入': [round(v, 2) for v in total_net.tolist()]
+        })
         
         df = df.sort_values('综合评分', ascending=False).reset_index(drop=True)
-        df['排名'] = range(1, len(df) + 1)
         
-        # 添加奖牌
-        if len(df) >= 1:
-            df.loc[0, '排名'] = '🥇 1'
-        if len(df) >= 2:
-            df.loc[1, '排名'] = '🥈 2'
-        if len(df) >= 3:
-            df.loc[2, '排名'] = '🥉 3'
+        # 前三名添加奖牌（排名列为混合类型，整列一次赋值）
+        ranks = list(range(1, len(df) + 1))
+        for i, medal in enumerate(['🥇', '🥈', '🥉'][:len(ranks)]):
+            ranks[i] = f'{medal} {i + 1}'
+        df['排名'] = pd.Series(ranks, dtype=object)
         
         return df
     
-    def _count_top_youzi(self, records: List[Dict]) -> int:
-        """统计顶级游资数量"""
-        count = 0
-        for record in records:
-            buy_amount = record.get('买入金额', 0) or record.get('mrje', 0)
-            try:
-                buy_amount = float(buy_amount) if buy_amount else 0
-            except (ValueError, TypeError):
-                buy_amount = 0
-            
-            if buy_amount <= 0:
-                continue
-            
-            youzi_name = record.get('游资名称', '') or record.get('yzmc', '')
-            yingye_bu = record.get('营业部', '') or record.get('yyb', '')
-            
-            if any(top in youzi_name or top in yingye_bu for top in self.top_youzi):
-                count += 1
-        
-        return count
-    
     def get_score_explanation(self) -> str:
         """获取评分维度说明"""
         explanation = """
@@ -12,6 +12,7 @@ import time
 import base64
 
 from longhubang_engine import LonghubangEngine
+from config import ANALYSIS_MAX_WORKERS
 from longhubang_pdf import LonghubangPDFGenerator
 
 
@@ -155,6 +156,13 @@ def display_analysis_tab():
             st.success("已清除分析结果")
             st.rerun()
     
+    with col3:
+        refresh_today = st.checkbox(
+            "重新获取今日数据",
+            value=False,
+            help="历史日期优先使用本地数据库中的数据，只下载缺失日期；勾选后强制重新下载今天的龙虎榜数据"
+        )
+    
     st.markdown("---")
     
     # 开始分析
@@ -166,9 +174,9 @@ def display_analysis_tab():
         # 准备参数
         if analysis_mode == "指定日期":
             date_str = selected_date.strftime('%Y-%m-%d')
-            run_longhubang_analysis(model=selected_model, date=date_str)
+            run_longhubang_analysis(model=selected_model, date=date_str, refresh_today=refresh_today)
         else:
-            run_longhubang_analysis(model=selected_model, days=days)
+            run_longhubang_analysis(model=selected_model, days=days, refresh_today=refresh_today)
     
     # 显示分析结果
     if 'longhubang_result' in st.session_state:
@@ -180,7 +188,7 @@ def display_analysis_tab():
             st.error(f"❌ 分析失败: {result.get('error', '未知错误')}")
 
 
-def run_longhubang_analysis(model="deepseek-chat", date=None, days=1):
+def run_longhubang_analysis(model="deepseek-chat", date=None, days=1, refresh_today=False):
     """运行龙虎榜分析"""
     
     # 进度显示
@@ -197,7 +205,7 @@ def run_longhubang_analysis(model="deepseek-chat", date=None, days=1):
         progress_bar.progress(15)
         
         # 运行分析
-        result = engine.run_comprehensive_analysis(date=date, days=days)
+        result = engine.run_comprehensive_analysis(date=date, days=days, refresh_today=refresh_today)
         
         progress_bar.progress(90)
         
@@ -1009,6 +1017,26 @@ def display_statistics_tab():
                 use_container_width=True
             )
         
+        st.markdown("---")
+        
+        # 热门概念排名
+        st.markdown("### 🔥 历史热门概念排名 (近30天)")
+        
+        top_concepts_df = engine.get_top_concepts(start_date, end_date, limit=20)
+        
+        if not top_concepts_df.empty:
+            st.dataframe(
+                top_concepts_df,
+                column_config={
+                    "concept": st.column_config.TextColumn("概念"),
+                    "stock_count": st.column_config.NumberColumn("上榜股票次数", format="%d"),
+                    "record_count": st.column_config.NumberColumn("上榜记录数", format="%d"),
+                    "total_net_inflow": st.column_config.NumberColumn("总净流入(元)", format="%.2f")
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+        
     except Exception as e:
         st.error(f"❌ 加载统计数据失败: {str(e)}")
 
@@ -1084,9 +1112,9 @@ def run_longhubang_batch_analysis():
             max_workers = st.number_input(
                 "并行线程数",
                 min_value=2,
-                max_value=5,
-                value=3,
-                help="同时分析的股票数量"
+                max_value=20,
+                value=min(max(ANALYSIS_MAX_WORKERS, 2), 20),
+                help="同时分析的股票数量（LLM请求另受全局限流控制）"
             )
         else:
             max_workers = 1
@@ -11,6 +11,7 @@ from main_force_selector import main_force_selector
 from stock_data import StockDataFetcher
 from ai_agents import StockAnalysisAgents
 from deepseek_client import DeepSeekClient
+from stage_timer import PipelineTrace, span
 import time
 import json
 
@@ -37,8 +38,16 @@ class MainForceAnalyzer:
             final_n: 最终精选N只，默认5只
             
         Returns:
-            分析结果字典
+            分析结果字典，timings 字段为各阶段及LLM调用的耗时明细
         """
+        trace = PipelineTrace('main_force', start_date or f'{days_ago}d')
+        with trace.activate():
+            result = self._run_full_analysis(start_date, days_ago, final_n)
+        result['timings'] = trace.finish(success=result.get('success', False))
+        return result
+    
+    def _run_full_analysis(self, start_date: str, days_ago: int, final_n: int) -> Dict:
+        """完整分析流程的具体实现（各阶段计入当前流程的耗时统计）"""
         result = {
             'success': False,
             'total_stocks': 0,
@@ -53,10 +62,11 @@ class MainForceAnalyzer:
             print(f"{'='*80}\n")
             
             # 步骤1: 获取主力资金净流入前100名股票
-            success, raw_data, message = self.selector.get_main_force_stocks(
-                start_date=start_date,
-                days_ago=days_ago
-            )
+            with span("fetch_stocks"):
+                success, raw_data, message = self.selector.get_main_force_stocks(
+                    start_date=start_date,
+                    days_ago=days_ago
+                )
             
             if not success:
                 result['error'] = message
@@ -65,12 +75,13 @@ class MainForceAnalyzer:
             result['total_stocks'] = len(raw_data)
             
             # 步骤2: 智能筛选（涨幅、市值等）
-            filtered_data = self.selector.filter_stocks(
-                raw_data,
-                max_range_change=30.0,
-                min_market_cap=50.0,
-                max_market_cap=1300.0
-            )
+            with span("filter_stocks"):
+                filtered_data = self.selector.filter_stocks(
+                    raw_data,
+                    max_range_change=30.0,
+                    min_market_cap=50.0,
+                    max_market_cap=1300.0
+                )
             
             result['filtered_stocks'] = len(filtered_data)
             
@@ -87,12 +98,16 @@ class MainForceAnalyzer:
             print(f"{'='*80}\n")
             
             # 准备整体数据摘要
-            overall_summary = self._prepare_overall_summary(filtered_data)
+            with span("summary"):
+                overall_summary = self._prepare_overall_summary(filtered_data)
             
             # 三大分析师整体分析
-            fund_flow_analysis = self._fund_flow_overall_analysis(filtered_data, overall_summary)
-            industry_analysis = self._industry_overall_analysis(filtered_data, overall_summary)
-            fundamental_analysis = self._fundamental_overall_analysis(filtered_data, overall_summary)
+            with span("agent:fund_flow", 'agent'):
+                fund_flow_analysis = self._fund_flow_overall_analysis(filtered_data, overall_summary)
+            with span("agent:industry", 'agent'):
+                industry_analysis = self._industry_overall_analysis(filtered_data, overall_summary)
+            with span("agent:fundamental", 'agent'):
+                fundamental_analysis = self._fundamental_overall_analysis(filtered_data, overall_summary)
             
             # 保存分析报告到对象属性，供UI展示
             self.fund_flow_analysis = fund_flow_analysis
@@ -104,13 +119,14 @@ class MainForceAnalyzer:
             print(f"👔 资深研究员综合评估并精选标的...")
             print(f"{'='*80}\n")
             
-            final_recommendations = self._select_best_stocks(
-                filtered_data,
-                fund_flow_analysis,
-                industry_analysis,
-                fundamental_analysis,
-                final_n=final_n
-            )
+            with span("select_best"):
+                final_recommendations = self._select_best_stocks(
+                    filtered_data,
+                    fund_flow_analysis,
+                    industry_analysis,
+                    fundamental_analysis,
+                    final_n=final_n
+                )
             
             result['final_recommendations'] = final_recommendations
             result['success'] = True
@@ -4,11 +4,11 @@
 主力选股批量分析历史记录数据库模块
 """
 
-import sqlite3
 import json
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import pandas as pd
+from sqlite_pool import get_connection
 
 class MainForceBatchDatabase:
     """主力选股批量分析历史数据库管理类"""
@@ -20,7 +20,7 @@ class MainForceBatchDatabase:
     
     def _init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 批量分析历史记录表
@@ -124,7 +124,7 @@ class MainForceBatchDatabase:
         Returns:
             记录ID
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         analysis_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -155,7 +155,7 @@ class MainForceBatchDatabase:
         Returns:
             历史记录列表
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -200,7 +200,7 @@ class MainForceBatchDatabase:
         Returns:
             记录详情
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -243,7 +243,7 @@ class MainForceBatchDatabase:
         Returns:
             是否删除成功
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM batch_analysis_history WHERE id = ?', (record_id,))
@@ -261,7 +261,7 @@ class MainForceBatchDatabase:
         Returns:
             统计数据
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 总记录数
@@ -6,7 +6,7 @@
 """
 
 import pandas as pd
-import pywencai
+from wencai_cache import wencai_get
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple
 import time
@@ -67,7 +67,7 @@ class MainForceStockSelector:
                 print(f"查询语句: {query[:100]}...")
                 
                 try:
-                    result = pywencai.get(query=query, loop=True)
+                    result = wencai_get(query, 'main_force', loop=True)
                     
                     if result is None:
                         print(f"  ⚠️ 方案{i}返回None，尝试下一个方案")
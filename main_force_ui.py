@@ -10,6 +10,7 @@ from main_force_analysis import MainForceAnalyzer
 from main_force_pdf_generator import display_report_download_section
 from main_force_history_ui import display_batch_history
 import pandas as pd
+from config import ANALYSIS_MAX_WORKERS
 
 def display_main_force_selector():
     """显示主力选股界面"""
@@ -555,9 +556,9 @@ def run_main_force_batch_analysis():
             max_workers = st.number_input(
                 "并行线程数",
                 min_value=2,
-                max_value=5,
-                value=3,
-                help="同时分析的股票数量"
+                max_value=20,
+                value=min(max(ANALYSIS_MAX_WORKERS, 2), 20),
+                help="同时分析的股票数量（LLM请求另受全局限流控制）"
             )
         else:
             max_workers = 1
@@ -11,6 +11,7 @@ import warnings
 import sys
 import io
 from data_source_manager import data_source_manager
+from spot_snapshot import spot_snapshot
 
 warnings.filterwarnings('ignore')
 
@@ -333,37 +334,34 @@ class MarketSentimentDataFetcher:
         try:
             # 优先使用akshare获取最近的换手率数据
             print(f"   [Akshare] 正在获取换手率数据...")
-            # 获取A股实时行情数据（不需要参数）
-            df = ak.stock_zh_a_spot_em()
-            if df is not None and not df.empty:
-                stock_data = df[df['代码'] == symbol]
-                if not stock_data.empty:
-                    row = stock_data.iloc[0]
-                    turnover_rate = row.get('换手率', 'N/A')
-                    
-                    # 解读换手率
-                    interpretation = ""
-                    if turnover_rate != 'N/A':
-                        try:
-                            turnover = float(turnover_rate)
-                            if turnover > 20:
-                                interpretation = "换手率极高（>20%），资金活跃度极高，可能存在炒作"
-                            elif turnover > 10:
-                                interpretation = "换手率较高（>10%），交易活跃"
-                            elif turnover > 5:
-                                interpretation = "换手率正常（5%-10%），交易适中"
-                            elif turnover > 2:
-                                interpretation = "换手率偏低（2%-5%），交易相对清淡"
-                            else:
-                                interpretation = "换手率很低（<2%），交易清淡"
-                        except:
-                            pass
-                    
-                    print(f"   [Akshare] ✅ 成功获取换手率: {turnover_rate}%")
-                    return {
-                        "current_turnover_rate": turnover_rate,
-                        "interpretation": interpretation
-                    }
+            # 从共享的全市场行情快照中获取该股票行情
+            row = spot_snapshot.get_a_row(symbol)
+            if row is not None:
+                turnover_rate = row.get('换手率', 'N/A')
+                
+                # 解读换手率
+                interpretation = ""
+                if turnover_rate != 'N/A':
+                    try:
+                        turnover = float(turnover_rate)
+                        if turnover > 20:
+                            interpretation = "换手率极高（>20%），资金活跃度极高，可能存在炒作"
+                        elif turnover > 10:
+                            interpretation = "换手率较高（>10%），交易活跃"
+                        elif turnover > 5:
+                            interpretation = "换手率正常（5%-10%），交易适中"
+                        elif turnover > 2:
+                            interpretation = "换手率偏低（2%-5%），交易相对清淡"
+                        else:
+                            interpretation = "换手率很低（<2%），交易清淡"
+                    except:
+                        pass
+                
+                print(f"   [Akshare] ✅ 成功获取换手率: {turnover_rate}%")
+                return {
+                    "current_turnover_rate": turnover_rate,
+                    "interpretation": interpretation
+                }
         except Exception as e:
             print(f"   [Akshare] ❌ 获取换手率失败: {e}")
             
@@ -427,7 +425,7 @@ class MarketSentimentDataFetcher:
                     
                     # 获取涨跌家数
                     try:
-                        market_summary = ak.stock_zh_a_spot_em()
+                        market_summary = spot_snapshot.get_a_spot()
                         if market_summary is not None and not market_summary.empty:
                             up_count = len(market_summary[market_summary['涨跌幅'] > 0])
                             down_count = len(market_summary[market_summary['涨跌幅'] < 0])
@@ -611,7 +609,7 @@ class MarketSentimentDataFetcher:
             
             # 获取涨跌家数
             try:
-                market_summary = ak.stock_zh_a_spot_em()
+                market_summary = spot_snapshot.get_a_spot()
                 if market_summary is not None and not market_summary.empty:
                     up_count = len(market_summary[market_summary['涨跌幅'] > 0])
                     down_count = len(market_summary[market_summary['涨跌幅'] < 0])
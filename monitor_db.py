@@ -1,14 +1,16 @@
-import sqlite3
 import json
 from datetime import datetime
 from typing import Dict, List, Optional
 import os
+from sqlite_pool import get_connection
 
 class StockMonitorDatabase:
     """股票监测数据库管理类"""
     
     def __init__(self, db_path: str = "stock_monitor.db"):
         self.db_path = db_path
+        # 监测列表及其价位、通知设置的版本号，每次增删改时加1（监测服务据此判断是否需要重新加载触发引擎）
+        self.config_version = 0
         # 确保数据库所在目录存在
         db_dir = os.path.dirname(self.db_path)
         if db_dir and not os.path.exists(db_dir):
@@ -17,7 +19,7 @@ class StockMonitorDatabase:
     
     def init_database(self):
         """初始化数据库表结构"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 创建监测股票表
@@ -75,7 +77,7 @@ class StockMonitorDatabase:
                            quant_enabled: bool = False,
                            quant_config: Dict = None) -> int:
         """添加监测股票"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         quant_config_json = json.dumps(quant_config) if quant_config else None
@@ -91,12 +93,13 @@ class StockMonitorDatabase:
         stock_id = cursor.lastrowid
         conn.commit()
         conn.close()
+        self.config_version += 1
         
         return stock_id
     
     def get_monitored_stocks(self) -> List[Dict]:
         """获取所有监测股票"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -133,7 +136,7 @@ class StockMonitorDatabase:
     
     def update_stock_price(self, stock_id: int, price: float):
         """更新股票价格"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # 更新当前价格
@@ -152,9 +155,37 @@ class StockMonitorDatabase:
         conn.commit()
         conn.close()
     
+    def batch_update_stock_prices(self, prices: Dict[int, float], failed_ids: List[int] = None):
+        """批量更新股票价格（单事务），failed_ids 中的股票仅更新最后检查时间"""
+        conn = get_connection(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+                UPDATE monitored_stocks 
+                SET current_price = ?, last_checked = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [(price, stock_id) for stock_id, price in prices.items()])
+            
+            cursor.executemany('''
+                INSERT INTO price_history (stock_id, price)
+                VALUES (?, ?)
+            ''', list(prices.items()))
+            
+            if failed_ids:
+                cursor.executemany('''
+                    UPDATE monitored_stocks 
+                    SET last_checked = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', [(stock_id,) for stock_id in failed_ids])
+            
+            conn.commit()
+        finally:
+            conn.close()
+    
     def update_last_checked(self, stock_id: int):
         """仅更新最后检查时间（用于获取失败的情况）"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -168,7 +199,7 @@ class StockMonitorDatabase:
     
     def has_recent_notification(self, stock_id: int, notification_type: str, minutes: int = 60) -> bool:
         """检查是否在最近X分钟内已有相同类型的通知"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -184,7 +215,7 @@ class StockMonitorDatabase:
     
     def add_notification(self, stock_id: int, notification_type: str, message: str):
         """添加提醒记录"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -195,9 +226,44 @@ class StockMonitorDatabase:
         conn.commit()
         conn.close()
     
+    def get_last_notification_times(self, minutes: int = 60) -> Dict:
+        """
+        获取最近X分钟内每只股票每类通知的最近触发时间（一次查询）
+        
+        Returns:
+            dict: {(stock_id, type): 触发时间的epoch秒}
+        """
+        conn = get_connection(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT stock_id, type, CAST(strftime('%s', MAX(triggered_at)) AS INTEGER)
+            FROM notifications
+            WHERE datetime(triggered_at) > datetime('now', '-' || ? || ' minutes')
+            GROUP BY stock_id, type
+        ''', (minutes,))
+        
+        result = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+        conn.close()
+        
+        return result
+    
+    def add_notifications(self, notifications: List[tuple]):
+        """批量添加提醒记录，notifications 为 (stock_id, type, message) 列表"""
+        conn = get_connection(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT INTO notifications (stock_id, type, message)
+            VALUES (?, ?, ?)
+        ''', notifications)
+        
+        conn.commit()
+        conn.close()
+    
     def get_pending_notifications(self) -> List[Dict]:
         """获取待发送的提醒"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -225,7 +291,7 @@ class StockMonitorDatabase:
     
     def get_all_recent_notifications(self, limit: int = 10) -> List[Dict]:
         """获取最近的所有通知（包括已发送和未发送的）"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -254,7 +320,7 @@ class StockMonitorDatabase:
     
     def mark_notification_sent(self, notification_id: int):
         """标记提醒已发送"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -266,7 +332,7 @@ class StockMonitorDatabase:
     
     def mark_all_notifications_sent(self):
         """标记所有通知为已读"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('UPDATE notifications SET sent = TRUE WHERE sent = FALSE')
@@ -278,7 +344,7 @@ class StockMonitorDatabase:
     
     def clear_all_notifications(self):
         """清空所有通知"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('DELETE FROM notifications')
@@ -291,7 +357,7 @@ class StockMonitorDatabase:
     def remove_monitored_stock(self, stock_id: int):
         """移除监测股票"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = get_connection(self.db_path)
             cursor = conn.cursor()
             
             # 删除相关记录
@@ -302,6 +368,7 @@ class StockMonitorDatabase:
             affected_rows = cursor.rowcount
             conn.commit()
             conn.close()
+            self.config_version += 1
             
             return affected_rows > 0
         except Exception as e:
@@ -314,7 +381,7 @@ class StockMonitorDatabase:
                               quant_enabled: bool = None,
                               quant_config: Dict = None):
         """更新监测股票"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         if quant_enabled is not None and quant_config is not None:
@@ -338,12 +405,13 @@ class StockMonitorDatabase:
         
         conn.commit()
         conn.close()
+        self.config_version += 1
         
         return cursor.rowcount > 0
     
     def toggle_notification(self, stock_id: int, enabled: bool):
         """切换通知状态"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -354,12 +422,13 @@ class StockMonitorDatabase:
         
         conn.commit()
         conn.close()
+        self.config_version += 1
         
         return cursor.rowcount > 0
     
     def get_stock_by_id(self, stock_id: int) -> Optional[Dict]:
         """根据ID获取股票信息"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -401,7 +470,7 @@ class StockMonitorDatabase:
         Returns:
             监测股票信息字典，不存在则返回None
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
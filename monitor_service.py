@@ -3,12 +3,18 @@ import threading
 import schedule
 from datetime import datetime, timedelta
 from typing import Dict, List
+import numpy as np
 import streamlit as st
 
 from monitor_db import monitor_db
 from stock_data import StockDataFetcher
 from miniqmt_interface import miniqmt, get_miniqmt_status
 from notification_service import notification_service
+from spot_snapshot import spot_snapshot
+from monitor_trigger_engine import TriggerEngine, TRIGGER_TYPES
+
+# 同一股票同类通知的冷却时间（分钟）
+NOTIFICATION_COOLDOWN_MINUTES = 60
 
 class StockMonitorService:
     """股票监测服务"""
@@ -17,6 +23,12 @@ class StockMonitorService:
         self.fetcher = StockDataFetcher()
         self.running = False
         self.thread = None
+        # 批量刷新模式：每轮只拉取一次行情快照
+        self.batch_refresh = True
+        # 触发引擎常驻内存：只在监测列表或价位设置变化时重新加载，冷却期在内存中更新
+        self.trigger_engine = TriggerEngine(cooldown_minutes=NOTIFICATION_COOLDOWN_MINUTES)
+        self._engine_version = None
+        self._engine_lock = threading.Lock()
     
     def start_monitoring(self):
         """启动监测服务"""
@@ -51,8 +63,10 @@ class StockMonitorService:
         """检查所有监测股票"""
         stocks = monitor_db.get_monitored_stocks()
         current_time = datetime.now()
+        with self._engine_lock:
+            self._sync_trigger_engine(stocks)
         
-        updated_count = 0
+        due_stocks = []
         for stock in stocks:
             # 检查是否需要更新价格
             last_checked = stock.get('last_checked')
@@ -67,6 +81,23 @@ class StockMonitorService:
                     print(f"股票 {stock['symbol']} 距离下次检查还有 {time_left:.1f} 分钟")
                     continue
             
+            due_stocks.append(stock)
+        
+        if not due_stocks:
+            return
+        
+        if self.batch_refresh:
+            updated_count = self._batch_update_prices(due_stocks)
+        else:
+            updated_count = self._sequential_update_prices(due_stocks)
+        
+        if updated_count > 0:
+            print(f"✅ 本轮共更新了 {updated_count} 只股票")
+    
+    def _sequential_update_prices(self, stocks: List[Dict]) -> int:
+        """逐只更新股票价格（每只股票单独请求）"""
+        updated_count = 0
+        for stock in stocks:
             try:
                 print(f"正在更新股票 {stock['symbol']} 的价格...")
                 self._update_stock_price(stock)
@@ -79,8 +110,65 @@ class StockMonitorService:
                 print(f"❌ 更新股票 {stock['symbol']} 价格失败: {e}")
                 time.sleep(3)  # 失败后也等待3秒再继续
         
-        if updated_count > 0:
-            print(f"✅ 本轮共更新了 {updated_count} 只股票")
+        return updated_count
+    
+    def _batch_update_prices(self, stocks: List[Dict]) -> int:
+        """
+        批量更新股票价格
+        
+        每轮只拉取一次全市场行情快照（A股，必要时加港股），一次性解析所有到期股票的价格，
+        并在单个事务中写入数据库；快照中找不到的股票（如美股）回退为逐只请求。
+        """
+        a_stocks = [s for s in stocks if self.fetcher._is_chinese_stock(s['symbol'])]
+        hk_stocks = [s for s in stocks
+                     if not self.fetcher._is_chinese_stock(s['symbol']) and self.fetcher._is_hk_stock(s['symbol'])]
+        
+        prices = {}
+        resolved_ids = set()
+        
+        for market_stocks, get_rows, normalize in (
+            (a_stocks, spot_snapshot.get_a_rows, lambda symbol: symbol),
+            (hk_stocks, spot_snapshot.get_hk_rows, self.fetcher._normalize_hk_code),
+        ):
+            if not market_stocks:
+                continue
+            try:
+                rows = get_rows([normalize(s['symbol']) for s in market_stocks])
+            except Exception as e:
+                print(f"❌ 获取行情快照失败，回退为逐只更新: {e}")
+                continue
+            
+            for stock in market_stocks:
+                row = rows.get(normalize(stock['symbol']))
+                if row is None:
+                    continue
+                resolved_ids.add(stock['id'])
+                try:
+                    price = float(row.get('最新价'))
+                    if price == price and price > 0:  # 排除NaN（停牌）
+                        prices[stock['id']] = price
+                except (ValueError, TypeError):
+                    pass
+        
+        failed_ids = [s['id'] for s in stocks if s['id'] in resolved_ids and s['id'] not in prices]
+        for stock in stocks:
+            if stock['id'] in failed_ids:
+                print(f"⚠️ 无法获取股票 {stock['symbol']} 的当前价格")
+        
+        if prices or failed_ids:
+            monitor_db.batch_update_stock_prices(prices, failed_ids)
+            print(f"✅ 批量更新 {len(prices)} 只股票价格（快照解析 {len(resolved_ids)} 只）")
+        
+        if prices:
+            self._evaluate_triggers(prices)
+        
+        # 快照中未覆盖的股票逐只更新
+        fallback_stocks = [s for s in stocks if s['id'] not in resolved_ids]
+        updated_count = len(prices)
+        if fallback_stocks:
+            updated_count += self._sequential_update_prices(fallback_stocks)
+        
+        return updated_count
     
     def _update_stock_price(self, stock: Dict):
         """更新股票价格并检查条件"""
@@ -119,56 +207,80 @@ class StockMonitorService:
                 pass
     
     def _check_trigger_conditions(self, stock: Dict, current_price: float):
-        """检查触发条件"""
-        if not stock.get('notification_enabled', True):
+        """检查单只股票的触发条件"""
+        self._evaluate_triggers({stock['id']: current_price})
+    
+    def _sync_trigger_engine(self, stocks: List[Dict] = None):
+        """
+        监测列表或价位、通知设置变化后重新加载触发引擎（调用方需持有 _engine_lock）
+        
+        Args:
+            stocks: 全部监测股票（已查询时传入，避免重复查询）
+        """
+        version = monitor_db.config_version
+        known = self.trigger_engine.position
+        # 其他进程新增的股票不会改变本进程的版本号，发现未加载的股票时也重新加载
+        if version == self._engine_version and (stocks is None or all(s['id'] in known for s in stocks)):
             return
+        if stocks is None:
+            stocks = monitor_db.get_monitored_stocks()
+        self.trigger_engine.load(
+            stocks, monitor_db.get_last_notification_times(minutes=NOTIFICATION_COOLDOWN_MINUTES)
+        )
+        self._engine_version = version
+    
+    def _evaluate_triggers(self, prices: Dict[int, float]):
+        """
+        批量检查触发条件
         
-        entry_range = stock.get('entry_range', {})
-        take_profit = stock.get('take_profit')
-        stop_loss = stock.get('stop_loss')
-        
-        # 检查进场区间
-        if entry_range and entry_range.get('min') and entry_range.get('max'):
-            if current_price >= entry_range['min'] and current_price <= entry_range['max']:
-                # 检查是否在最近60分钟内已发送过相同通知，避免重复
-                if not monitor_db.has_recent_notification(stock['id'], 'entry', minutes=60):
-                    message = f"股票 {stock['symbol']} ({stock['name']}) 价格 {current_price} 进入进场区间 [{entry_range['min']}-{entry_range['max']}]"
-                    monitor_db.add_notification(stock['id'], 'entry', message)
-                    
-                    # 立即发送通知（包括邮件）
-                    notification_service.send_notifications()
-                
-                # 如果启用量化交易，执行自动交易
-                if stock.get('quant_enabled', False):
-                    self._execute_quant_trade(stock, 'entry', current_price)
-        
-        # 检查止盈
-        if take_profit and current_price >= take_profit:
-            # 检查是否在最近60分钟内已发送过相同通知，避免重复
-            if not monitor_db.has_recent_notification(stock['id'], 'take_profit', minutes=60):
-                message = f"股票 {stock['symbol']} ({stock['name']}) 价格 {current_price} 达到止盈位 {take_profit}"
-                monitor_db.add_notification(stock['id'], 'take_profit', message)
-                
-                # 立即发送通知（包括邮件）
-                notification_service.send_notifications()
+        所有股票的进场区间、止盈、止损在常驻的触发引擎中一次向量化评估，
+        已通知的股票在引擎内进入冷却期；需要发送的通知一次性写入数据库，并且每轮只调用一次通知发送。
+        
+        Args:
+            prices: {stock_id: 最新价格}
+        """
+        engine = self.trigger_engine
+        with self._engine_lock:
+            if any(stock_id not in engine.position for stock_id in prices):
+                # 手动更新刚添加的股票等情况
+                self._engine_version = None
+            self._sync_trigger_engine()
+            hits, notify = engine.evaluate(prices)
+            # 重新加载会替换股票列表，取得与本次评估结果对应的列表
+            stocks = engine.stocks
+        
+        notifications = []
+        quant_signals = []
+        for i, j in zip(*np.nonzero(hits)):
+            stock = stocks[i]
+            signal_type = TRIGGER_TYPES[j]
+            current_price = prices[stock['id']]
             
-            # 如果启用量化交易，执行自动交易
-            if stock.get('quant_enabled', False):
-                self._execute_quant_trade(stock, 'take_profit', current_price)
-        
-        # 检查止损
-        if stop_loss and current_price <= stop_loss:
-            # 检查是否在最近60分钟内已发送过相同通知，避免重复
-            if not monitor_db.has_recent_notification(stock['id'], 'stop_loss', minutes=60):
-                message = f"股票 {stock['symbol']} ({stock['name']}) 价格 {current_price} 达到止损位 {stop_loss}"
-                monitor_db.add_notification(stock['id'], 'stop_loss', message)
-                
-                # 立即发送通知（包括邮件）
-                notification_service.send_notifications()
+            # 冷却期（最近60分钟内已发送过相同通知）内不重复通知
+            if notify[i, j]:
+                notifications.append((stock['id'], signal_type, self._format_trigger_message(stock, signal_type, current_price)))
             
             # 如果启用量化交易，执行自动交易
             if stock.get('quant_enabled', False):
-                self._execute_quant_trade(stock, 'stop_loss', current_price)
+                quant_signals.append((stock, signal_type, current_price))
+        
+        if notifications:
+            monitor_db.add_notifications(notifications)
+            # 立即发送通知（包括邮件）
+            notification_service.send_notifications()
+        
+        for stock, signal_type, current_price in quant_signals:
+            self._execute_quant_trade(stock, signal_type, current_price)
+    
+    def _format_trigger_message(self, stock: Dict, signal_type: str, current_price: float) -> str:
+        """生成触发通知内容"""
+        if signal_type == 'entry':
+            entry_range = stock.get('entry_range', {})
+            return f"股票 {stock['symbol']} ({stock['name']}) 价格 {current_price} 进入进场区间 [{entry_range['min']}-{entry_range['max']}]"
+        elif signal_type == 'take_profit':
+            return f"股票 {stock['symbol']} ({stock['name']}) 价格 {current_price} 达到止盈位 {stock.get('take_profit')}"
+        else:
+            return f"股票 {stock['symbol']} ({stock['name']}) 价格 {current_price} 达到止损位 {stock.get('stop_loss')}"
     
     def _execute_quant_trade(self, stock: Dict, signal_type: str, current_price: float):
         """执行量化交易"""
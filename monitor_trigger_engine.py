@@ -0,0 +1,114 @@
+"""
+监测触发条件引擎
+将监测股票的进场区间、止盈、止损及通知冷却期保存为NumPy数组，
+每轮价格更新用一次向量化运算得到所有触发结果
+"""
+
+import time
+from typing import Dict, List
+
+import numpy as np
+
+
+# 触发类型（列顺序）
+TRIGGER_TYPES = ('entry', 'take_profit', 'stop_loss')
+
+
+class TriggerEngine:
+    """向量化触发条件引擎"""
+
+    def __init__(self, cooldown_minutes: int = 60):
+        """
+        初始化引擎
+
+        Args:
+            cooldown_minutes: 同一股票同类通知的冷却时间（分钟）
+        """
+        self.cooldown_seconds = cooldown_minutes * 60
+        self.stocks = []
+        self.ids = np.empty(0, dtype=np.int64)
+        self.position = {}
+        self.entry_min = np.empty(0)
+        self.entry_max = np.empty(0)
+        self.take_profit = np.empty(0)
+        self.stop_loss = np.empty(0)
+        self.last_price = np.empty(0)
+        self.notification_enabled = np.empty(0, dtype=bool)
+        # 每种触发类型的冷却截止时间（epoch秒），形状 (n, len(TRIGGER_TYPES))
+        self.cooldown_until = np.empty((0, len(TRIGGER_TYPES)))
+
+    @staticmethod
+    def _level(value) -> float:
+        """价位为空或为0时视为未设置（与原有真值判断一致），返回NaN"""
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            return np.nan
+        return value if value else np.nan
+
+    def load(self, stocks: List[Dict], last_notification_times: Dict = None):
+        """
+        加载监测股票
+
+        Args:
+            stocks: monitor_db.get_monitored_stocks() 返回的股票列表
+            last_notification_times: {(stock_id, type): 最近一次通知的epoch秒}
+        """
+        n = len(stocks)
+        self.stocks = list(stocks)
+        self.ids = np.array([s['id'] for s in stocks], dtype=np.int64)
+        self.position = {stock_id: i for i, stock_id in enumerate(self.ids.tolist())}
+
+        entry_ranges = [s.get('entry_range') or {} for s in stocks]
+        self.entry_min = np.array([self._level(r.get('min')) for r in entry_ranges], dtype=np.float64)
+        self.entry_max = np.array([self._level(r.get('max')) for r in entry_ranges], dtype=np.float64)
+        self.take_profit = np.array([self._level(s.get('take_profit')) for s in stocks], dtype=np.float64)
+        self.stop_loss = np.array([self._level(s.get('stop_loss')) for s in stocks], dtype=np.float64)
+        self.last_price = np.array(
+            [s['current_price'] if s.get('current_price') is not None else np.nan for s in stocks],
+            dtype=np.float64
+        )
+        self.notification_enabled = np.array([bool(s.get('notification_enabled', True)) for s in stocks], dtype=bool)
+
+        self.cooldown_until = np.zeros((n, len(TRIGGER_TYPES)), dtype=np.float64)
+        for (stock_id, trigger_type), notified_at in (last_notification_times or {}).items():
+            i = self.position.get(stock_id)
+            if i is not None and trigger_type in TRIGGER_TYPES:
+                self.cooldown_until[i, TRIGGER_TYPES.index(trigger_type)] = notified_at + self.cooldown_seconds
+
+    def evaluate(self, prices: Dict[int, float], now: float = None):
+        """
+        用一次向量化运算评估本轮所有价格
+
+        Args:
+            prices: {stock_id: 最新价格}
+            now: 当前epoch秒，默认取当前时间
+
+        Returns:
+            tuple: (hits, notify)，均为形状 (n, len(TRIGGER_TYPES)) 的布尔数组；
+                   hits 为价格满足条件，notify 为满足条件且已过冷却期（需要通知）
+        """
+        now = time.time() if now is None else now
+
+        price = np.full(len(self.ids), np.nan)
+        for stock_id, value in prices.items():
+            i = self.position.get(stock_id)
+            if i is not None:
+                price[i] = value
+
+        # NaN参与比较结果为False，未设置的价位与缺失价格自然不会触发
+        with np.errstate(invalid='ignore'):
+            hits = np.column_stack((
+                (price >= self.entry_min) & (price <= self.entry_max),
+                price >= self.take_profit,
+                price <= self.stop_loss,
+            ))
+        hits &= self.notification_enabled[:, None]
+        notify = hits & (now >= self.cooldown_until)
+
+        # 更新状态：已通知的进入冷却期
+        self.cooldown_until[notify] = now + self.cooldown_seconds
+        has_price = ~np.isnan(price)
+        self.last_price[has_price] = price[has_price]
+
+        return hits, notify
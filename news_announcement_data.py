@@ -4,7 +4,7 @@
 """
 
 import pandas as pd
-import pywencai
+from wencai_cache import wencai_get
 import sys
 import io
 import warnings
@@ -99,8 +99,8 @@ class NewsAnnouncementDataFetcher:
             
             print(f"   使用问财查询: {query}")
             
-            # 使用pywencai查询
-            result = pywencai.get(query=query, loop=True)
+            # 使用pywencai查询（同一交易日内相同问句使用缓存）
+            result = wencai_get(query, 'news', loop=True)
             
             if result is None:
                 print(f"   问财查询返回None")
@@ -190,8 +190,8 @@ class NewsAnnouncementDataFetcher:
             
             print(f"   使用问财查询: {query}")
             
-            # 使用pywencai查询
-            result = pywencai.get(query=query, loop=True)
+            # 使用pywencai查询（同一交易日内相同问句使用缓存）
+            result = wencai_get(query, 'announcement', loop=True)
             
             if result is None:
                 print(f"   问财查询返回None")
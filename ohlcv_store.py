@@ -0,0 +1,205 @@
+"""
+本地日线行情存储模块
+按 (股票代码, 复权类型) 分区缓存日K线，配合 DataSourceManager 只补齐缺失的日期区间
+"""
+
+import sqlite3
+import time
+from datetime import datetime
+import pandas as pd
+
+
+# 存储的行情字段（与 DataSourceManager 标准化后的列名一致）
+BAR_COLUMNS = [
+    'open', 'close', 'high', 'low', 'volume', 'amount',
+    'amplitude', 'pct_change', 'change', 'turnover'
+]
+
+
+class OHLCVStore:
+    """日K线本地存储"""
+
+    def __init__(self, db_path='ohlcv_cache.db'):
+        """
+        初始化存储
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self.init_database()
+
+    def get_connection(self):
+        """获取数据库连接"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_database(self):
+        """初始化数据库表"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        # 日K线表：以 (symbol, adjust, date) 为聚簇主键，同一分区的数据物理上连续存放
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS daily_bars (
+            symbol TEXT NOT NULL,
+            adjust TEXT NOT NULL,
+            date TEXT NOT NULL,
+            {', '.join(f'"{col}" REAL' for col in BAR_COLUMNS)},
+            PRIMARY KEY (symbol, adjust, date)
+        ) WITHOUT ROWID
+        ''')
+
+        # 分区元数据：已覆盖的请求区间，用于计算缺口
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bar_partitions (
+            symbol TEXT NOT NULL,
+            adjust TEXT NOT NULL,
+            range_start TEXT NOT NULL,
+            range_end TEXT NOT NULL,
+            anchor_date TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (symbol, adjust)
+        )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def get_partition(self, symbol, adjust):
+        """
+        获取分区元数据
+
+        Returns:
+            dict: {'range_start', 'range_end', 'anchor_date', 'updated_at'}，不存在时返回 None
+                  anchor_date 为写入时已收盘的最后一根K线日期，用于检测复权因子变化
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT range_start, range_end, anchor_date, updated_at FROM bar_partitions
+            WHERE symbol = ? AND adjust = ?
+        ''', (symbol, adjust))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+        return {'range_start': row[0], 'range_end': row[1], 'anchor_date': row[2], 'updated_at': row[3]}
+
+    def load_bars(self, symbol, adjust, start_date, end_date):
+        """
+        读取区间内的日K线
+
+        Args:
+            symbol: 股票代码
+            adjust: 复权类型
+            start_date: 开始日期（YYYYMMDD）
+            end_date: 结束日期（YYYYMMDD）
+
+        Returns:
+            DataFrame: 包含 date 及 BAR_COLUMNS 列，按日期升序
+        """
+        conn = self.get_connection()
+        df = pd.read_sql_query(
+            f'''
+            SELECT date, {', '.join(f'"{col}"' for col in BAR_COLUMNS)} FROM daily_bars
+            WHERE symbol = ? AND adjust = ? AND date >= ? AND date <= ?
+            ORDER BY date
+            ''',
+            conn,
+            params=(symbol, adjust, start_date, end_date)
+        )
+        conn.close()
+
+        df['date'] = pd.to_datetime(df['date'], format='%Y%m%d')
+        df[BAR_COLUMNS] = df[BAR_COLUMNS].astype(float)
+        return df
+
+    def get_bar_close(self, symbol, adjust, date):
+        """获取指定日期的收盘价，不存在时返回 None"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT close FROM daily_bars WHERE symbol = ? AND adjust = ? AND date = ?
+        ''', (symbol, adjust, date))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def get_first_bar_date(self, symbol, adjust):
+        """获取分区内第一根K线日期（YYYYMMDD），不存在时返回 None"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT MIN(date) FROM daily_bars WHERE symbol = ? AND adjust = ?
+        ''', (symbol, adjust))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+
+    def save_bars(self, symbol, adjust, df, range_start, range_end):
+        """
+        写入日K线并更新分区覆盖区间（单事务）
+
+        Args:
+            symbol: 股票代码
+            adjust: 复权类型
+            df: DataFrame，需包含 date 列（datetime）及部分 BAR_COLUMNS 列
+            range_start: 本分区已覆盖的请求起始日期（YYYYMMDD）
+            range_end: 本分区已覆盖的请求结束日期（YYYYMMDD）
+        """
+        dates = pd.to_datetime(df['date']).dt.strftime('%Y%m%d').tolist()
+        values = {}
+        for col in BAR_COLUMNS:
+            if col in df.columns:
+                values[col] = pd.to_numeric(df[col], errors='coerce').astype(float).tolist()
+            else:
+                values[col] = [None] * len(df)
+
+        rows = [
+            (symbol, adjust, dates[i], *[
+                None if pd.isna(values[col][i]) else values[col][i] for col in BAR_COLUMNS
+            ])
+            for i in range(len(dates))
+        ]
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(f'''
+                INSERT OR REPLACE INTO daily_bars
+                (symbol, adjust, date, {', '.join(f'"{col}"' for col in BAR_COLUMNS)})
+                VALUES (?, ?, ?, {', '.join('?' for _ in BAR_COLUMNS)})
+            ''', rows)
+            # 当日K线在收盘前可能还会变化，锚点只取今天之前的最后一根K线
+            cursor.execute('''
+                SELECT MAX(date) FROM daily_bars WHERE symbol = ? AND adjust = ? AND date < ?
+            ''', (symbol, adjust, datetime.now().strftime('%Y%m%d')))
+            anchor_date = cursor.fetchone()[0]
+            cursor.execute('''
+                INSERT OR REPLACE INTO bar_partitions
+                (symbol, adjust, range_start, range_end, anchor_date, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (symbol, adjust, range_start, range_end, anchor_date, time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def invalidate(self, symbol, adjust=None):
+        """
+        删除分区数据（复权因子变化或手动清理时使用）
+
+        Args:
+            symbol: 股票代码
+            adjust: 复权类型，None 表示删除该股票的所有分区
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if adjust is None:
+            cursor.execute('DELETE FROM daily_bars WHERE symbol = ?', (symbol,))
+            cursor.execute('DELETE FROM bar_partitions WHERE symbol = ?', (symbol,))
+        else:
+            cursor.execute('DELETE FROM daily_bars WHERE symbol = ? AND adjust = ?', (symbol, adjust))
+            cursor.execute('DELETE FROM bar_partitions WHERE symbol = ? AND adjust = ?', (symbol, adjust))
+        conn.commit()
+        conn.close()
@@ -9,6 +9,8 @@ from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 import os
 
+from sqlite_pool import get_connection
+
 # 数据库文件路径
 DB_PATH = "portfolio_stocks.db"
 
@@ -28,7 +30,7 @@ class PortfolioDB:
     
     def _get_connection(self) -> sqlite3.Connection:
         """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
         return conn
     
@@ -11,6 +11,7 @@ from datetime import datetime
 
 # 导入必要的模块
 from portfolio_db import portfolio_db
+from config import ANALYSIS_MAX_WORKERS
 
 
 class PortfolioManager:
@@ -265,7 +266,7 @@ class PortfolioManager:
     
     def batch_analyze_parallel(self, stock_codes: List[str], period="1y",
                                selected_agents: List[str] = None,
-                               max_workers: int = 3,
+                               max_workers: int = ANALYSIS_MAX_WORKERS,
                                progress_callback=None) -> Dict:
         """
         并行批量分析（多线程）
@@ -274,7 +275,7 @@ class PortfolioManager:
             stock_codes: 股票代码列表
             period: 数据周期
             selected_agents: 选中的分析师列表
-            max_workers: 最大并发数（默认3）
+            max_workers: 最大并发数（默认 config.ANALYSIS_MAX_WORKERS，LLM请求另受全局限流）
             progress_callback: 进度回调函数
             
         Returns:
@@ -350,7 +351,7 @@ class PortfolioManager:
     
     def batch_analyze_portfolio(self, mode="sequential", period="1y",
                                 selected_agents: List[str] = None,
-                                max_workers: int = 3,
+                                max_workers: int = ANALYSIS_MAX_WORKERS,
                                 progress_callback=None) -> Dict:
         """
         批量分析所有持仓股票
@@ -359,7 +360,7 @@ class PortfolioManager:
             mode: 分析模式 ("sequential" 或 "parallel")
             period: 数据周期
             selected_agents: 选中的分析师列表
-            max_workers: 并行模式下的最大并发数（默认3）
+            max_workers: 并行模式下的最大并发数（默认 config.ANALYSIS_MAX_WORKERS）
             progress_callback: 进度回调函数
             
         Returns:
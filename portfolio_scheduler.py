@@ -12,6 +12,7 @@ from typing import Optional, Callable
 import traceback
 
 from portfolio_manager import portfolio_manager
+from config import ANALYSIS_MAX_WORKERS
 from notification_service import NotificationService
 
 
@@ -30,7 +31,7 @@ class PortfolioScheduler:
         self.notification_enabled = True  # 默认启用通知
         self.selected_agents = None  # None表示全部分析师
         self.notification_service = NotificationService()
-        self.max_workers = 3  # 并行模式的线程数
+        self.max_workers = ANALYSIS_MAX_WORKERS  # 并行模式的线程数
     
     # 兼容旧代码的属性
     @property
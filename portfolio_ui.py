@@ -13,6 +13,7 @@ import time
 
 from portfolio_manager import portfolio_manager
 from portfolio_scheduler import portfolio_scheduler
+from config import ANALYSIS_MAX_WORKERS
 
 
 def display_portfolio_manager():
@@ -259,9 +260,9 @@ def display_batch_analysis():
             max_workers = st.number_input(
                 "并行线程数",
                 min_value=2,
-                max_value=10,
-                value=3,
-                help="同时分析的股票数量"
+                max_value=20,
+                value=min(max(ANALYSIS_MAX_WORKERS, 2), 20),
+                help="同时分析的股票数量（LLM请求另受全局限流控制）"
             )
         else:
             max_workers = 1
@@ -580,8 +581,8 @@ def display_scheduler_management():
             max_workers = st.number_input(
                 "并行线程数",
                 min_value=2,
-                max_value=10,
-                value=portfolio_scheduler.max_workers,
+                max_value=20,
+                value=min(max(portfolio_scheduler.max_workers, 2), 20),
                 disabled=(analysis_mode == "sequential"),
                 help="仅在并行模式下生效"
             )
@@ -9,6 +9,7 @@ import io
 import warnings
 from datetime import datetime, timedelta
 import akshare as ak
+from spot_snapshot import spot_snapshot
 
 warnings.filterwarnings('ignore')
 
@@ -130,16 +131,12 @@ class QStockNewsDataFetcher:
             # 方法2: 如果没有获取到，尝试获取新浪财经新闻
             if not news_items:
                 try:
-                    # stock_zh_a_spot_em() - 获取股票信息，包含代码和名称
-                    df_info = ak.stock_zh_a_spot_em()
-                    
-                    # 查找股票名称
+                    # 从共享的全市场行情快照中查找股票名称
                     stock_name = None
-                    if df_info is not None and not df_info.empty:
-                        match = df_info[df_info['代码'] == symbol]
-                        if not match.empty:
-                            stock_name = match.iloc[0]['名称']
-                            print(f"   找到股票名称: {stock_name}")
+                    row = spot_snapshot.get_a_row(symbol)
+                    if row is not None:
+                        stock_name = row['名称']
+                        print(f"   找到股票名称: {stock_name}")
                     
                     # 使用股票名称搜索新闻
                     if stock_name:
@@ -0,0 +1,102 @@
+"""
+令牌桶限流器
+线程安全，同时提供阻塞（同步）与asyncio（异步）两种获取方式
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """令牌桶：以固定速率补充令牌，桶容量决定允许的突发量"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（默认等于 rate，即允许1秒的突发量）
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _try_take(self, amount: float) -> float:
+        """尝试取出令牌，成功返回0，否则返回需要等待的秒数"""
+        amount = min(amount, self.capacity)
+        with self.lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def acquire(self, amount: float = 1):
+        """阻塞直到取得 amount 个令牌"""
+        while True:
+            wait = self._try_take(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1):
+        """异步等待直到取得 amount 个令牌"""
+        while True:
+            wait = self._try_take(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def adjust(self, delta: float):
+        """
+        修正桶内令牌数（预估用量与实际用量不一致时使用）
+
+        Args:
+            delta: 正数为归还令牌，负数为补扣令牌（允许欠账，后续请求将等待）
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class LLMRateLimiter:
+    """LLM接口限流器：同时限制每分钟请求数（RPM）与每分钟Token数（TPM）"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """
+        初始化限流器
+
+        Args:
+            requests_per_minute: 每分钟请求数上限，0 表示不限制
+            tokens_per_minute: 每分钟Token数上限，0 表示不限制
+        """
+        self.request_bucket = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute > 0 else None
+
+    def acquire(self, estimated_tokens: int):
+        """阻塞直到请求数与Token额度均可用"""
+        if self.request_bucket:
+            self.request_bucket.acquire(1)
+        if self.token_bucket:
+            self.token_bucket.acquire(estimated_tokens)
+
+    async def acquire_async(self, estimated_tokens: int):
+        """异步等待直到请求数与Token额度均可用"""
+        if self.request_bucket:
+            await self.request_bucket.acquire_async(1)
+        if self.token_bucket:
+            await self.token_bucket.acquire_async(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """请求完成后按实际Token用量修正额度"""
+        if self.token_bucket and actual_tokens is not None:
+            self.token_bucket.adjust(estimated_tokens - actual_tokens)
@@ -6,8 +6,10 @@
 3. 近期重要事件
 """
 
-import pywencai
+from config import WENCAI_QUERY_TIMEOUT
+from wencai_cache import wencai_get
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from typing import Dict, Any
 import time
 import warnings
@@ -22,14 +24,34 @@ os.environ['NODE_NO_WARNINGS'] = '1'  # 屏蔽Node.js警告
 class RiskDataFetcher:
     """风险数据获取类"""
     
-    def __init__(self):
-        """初始化"""
-        pass
+    # 风险数据子查询：结果键 -> (说明, 问句后缀, 获取方法名)；问句为"股票代码+后缀"，统一由 query_text 生成
+    SUB_QUERIES = {
+        'lifting_ban': ('限售解禁数据', '限售解禁', '_get_lifting_ban_data'),
+        'shareholder_reduction': ('大股东减持数据', '大股东减持公告', '_get_shareholder_reduction_data'),
+        'important_events': ('重要事件数据', '近期重要事件', '_get_important_events_data'),
+    }
+    
+    @classmethod
+    def query_text(cls, key: str, symbol: str) -> str:
+        """子查询的问财问句"""
+        return f"{symbol}{cls.SUB_QUERIES[key][1]}"
+    
+    def __init__(self, query_timeout=WENCAI_QUERY_TIMEOUT):
+        """
+        初始化
+        
+        Args:
+            query_timeout: 单个子查询的等待上限（秒），超时的子查询记为无数据，不影响其余结果
+        """
+        self.query_timeout = query_timeout
     
     def get_risk_data(self, symbol: str) -> Dict[str, Any]:
         """
         获取股票风险相关数据
         
+        限售解禁、大股东减持、重要事件三个子查询并发执行（问财请求总数受全进程并发上限约束），
+        单个子查询失败或超时只影响该项数据
+        
         Args:
             symbol: 股票代码（如：600000）
             
@@ -47,42 +69,47 @@ class RiskDataFetcher:
             'error': None
         }
         
+        # 超时的子查询不等待其结束（其结果仍会写入问财查询缓存，供下次使用）
+        executor = ThreadPoolExecutor(max_workers=len(self.SUB_QUERIES))
         try:
-            # 1. 获取限售解禁数据
-            print("   查询限售解禁数据...")
-            lifting_ban = self._get_lifting_ban_data(symbol)
-            risk_data['lifting_ban'] = lifting_ban
-            if lifting_ban and lifting_ban.get('has_data'):
-                print(f"   获取到限售解禁数据")
-            else:
-                print(f"   暂无限售解禁数据")
-            
-            time.sleep(1)  # 避免请求过快
-            
-            # 2. 获取大股东减持公告
-            print("   查询大股东减持公告...")
-            reduction = self._get_shareholder_reduction_data(symbol)
-            risk_data['shareholder_reduction'] = reduction
-            if reduction and reduction.get('has_data'):
-                print(f"   获取到大股东减持数据")
-            else:
-                print(f"   暂无大股东减持数据")
-            
-            time.sleep(1)  # 避免请求过快
-            
-            # 3. 获取近期重要事件
-            print("   查询近期重要事件...")
-            events = self._get_important_events_data(symbol)
-            risk_data['important_events'] = events
-            if events and events.get('has_data'):
-                print(f"   获取到重要事件数据")
-            else:
-                print(f"   暂无重要事件数据")
+            print("   并发查询限售解禁、大股东减持、近期重要事件...")
+            deadline = time.monotonic() + self.query_timeout
+            futures = {
+                key: executor.submit(getattr(self, method), symbol)
+                for key, (_, _, method) in self.SUB_QUERIES.items()
+            }
+            
+            for key, future in futures.items():
+                label = self.SUB_QUERIES[key][0]
+                try:
+                    result = future.result(timeout=max(0, deadline - time.monotonic()))
+                except FuturesTimeoutError:
+                    result = {
+                        'has_data': False,
+                        'query': self.query_text(key, symbol),
+                        'data': None,
+                        'summary': None,
+                        'error': f"查询超时（{self.query_timeout}秒）"
+                    }
+                except Exception as e:
+                    result = {
+                        'has_data': False,
+                        'query': self.query_text(key, symbol),
+                        'data': None,
+                        'summary': None,
+                        'error': str(e)
+                    }
+                risk_data[key] = result
+                
+                if result.get('has_data'):
+                    print(f"   获取到{label}")
+                elif result.get('error'):
+                    print(f"   {label}获取失败: {result['error']}")
+                else:
+                    print(f"   暂无{label}")
             
             # 如果至少有一个数据源成功，则认为获取成功
-            if (lifting_ban and lifting_ban.get('has_data')) or \
-               (reduction and reduction.get('has_data')) or \
-               (events and events.get('has_data')):
+            if any(risk_data[key] and risk_data[key].get('has_data') for key in self.SUB_QUERIES):
                 risk_data['data_success'] = True
                 print(f"风险数据获取完成")
             else:
@@ -91,6 +118,8 @@ class RiskDataFetcher:
         except Exception as e:
             print(f"风险数据获取失败: {str(e)}")
             risk_data['error'] = str(e)
+        finally:
+            executor.shutdown(wait=False)
         
         return risk_data
     
@@ -98,17 +127,17 @@ class RiskDataFetcher:
         """获取限售解禁数据"""
         result = {
             'has_data': False,
-            'query': f"{symbol}限售解禁",
+            'query': self.query_text('lifting_ban', symbol),
             'data': None,
             'summary': None
         }
         
         try:
             # 构建问句
-            query = f"{symbol}限售解禁"
+            query = self.query_text('lifting_ban', symbol)
             
-            # 使用pywencai查询
-            response = pywencai.get(query=query, loop=True)
+            # 使用pywencai查询（同一交易日内相同问句使用缓存）
+            response = wencai_get(query, 'risk', loop=True)
             
             if response is None:
                 return result
@@ -161,17 +190,17 @@ class RiskDataFetcher:
         """获取大股东减持公告数据"""
         result = {
             'has_data': False,
-            'query': f"{symbol}大股东减持公告",
+            'query': self.query_text('shareholder_reduction', symbol),
             'data': None,
             'summary': None
         }
         
         try:
             # 构建问句
-            query = f"{symbol}大股东减持公告"
+            query = self.query_text('shareholder_reduction', symbol)
             
-            # 使用pywencai查询
-            response = pywencai.get(query=query, loop=True)
+            # 使用pywencai查询（同一交易日内相同问句使用缓存）
+            response = wencai_get(query, 'risk', loop=True)
             
             if response is None:
                 return result
@@ -224,17 +253,17 @@ class RiskDataFetcher:
         """获取近期重要事件数据"""
         result = {
             'has_data': False,
-            'query': f"{symbol}近期重要事件",
+            'query': self.query_text('important_events', symbol),
             'data': None,
             'summary': None
         }
         
         try:
             # 构建问句
-            query = f"{symbol}近期重要事件"
+            query = self.query_text('important_events', symbol)
             
-            # 使用pywencai查询
-            response = pywencai.get(query=query, loop=True)
+            # 使用pywencai查询（同一交易日内相同问句使用缓存）
+            response = wencai_get(query, 'risk', loop=True)
             
             if response is None:
                 return result
@@ -448,8 +477,100 @@ class RiskDataFetcher:
         return "\n".join(lines)
 
 
+def record_fixture(symbol: str, path: str):
+    """
+    录制一只股票风险数据子查询的问财原始返回及耗时（供 benchmark_risk_data 回放）
+
+    Args:
+        symbol: 股票代码
+        path: 保存路径（pickle）
+    """
+    import pickle
+    import wencai_cache
+
+    queries = {}
+    for key in RiskDataFetcher.SUB_QUERIES:
+        query = RiskDataFetcher.query_text(key, symbol)
+        start = time.perf_counter()
+        result = wencai_cache._query_wencai(query, loop=True)
+        queries[query] = {'latency': time.perf_counter() - start, 'result': result}
+        print(f"   {query}: {queries[query]['latency']:.2f}秒")
+    with open(path, 'wb') as f:
+        pickle.dump({'symbol': symbol, 'queries': queries}, f)
+    print(f"已录制到 {path}")
+
+
+def benchmark_risk_data(path: str = None, rounds: int = 3):
+    """
+    回放录制的问财返回，对比原串行流程（子查询间隔1秒）与并发流程的耗时；
+    不请求问财，也不读写问财查询缓存
+
+    Args:
+        path: record_fixture 录制的文件，为空时使用每个查询耗时2.5秒的模拟数据
+        rounds: 每种流程运行次数
+    """
+    import pickle
+    import wencai_cache
+
+    if path:
+        with open(path, 'rb') as f:
+            fixture = pickle.load(f)
+    else:
+        fixture = {'symbol': '600000', 'queries': {
+            RiskDataFetcher.query_text(key, '600000'): {
+                'latency': 2.5, 'result': pd.DataFrame({'股票代码': ['600000.SH'], '说明': [label]})
+            }
+            for key, (label, _, _) in RiskDataFetcher.SUB_QUERIES.items()
+        }}
+    symbol = fixture['symbol']
+
+    def replay(query, **kwargs):
+        record = fixture['queries'][query]
+        with wencai_cache.wencai_semaphore:
+            time.sleep(record['latency'])
+        return record['result']
+
+    original_query, original_cache = wencai_cache._query_wencai, wencai_cache.wencai_cache
+    wencai_cache._query_wencai, wencai_cache.wencai_cache = replay, None
+    fetcher = RiskDataFetcher()
+    try:
+        serial, parallel = [], []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for n, (_, _, method) in enumerate(RiskDataFetcher.SUB_QUERIES.values()):
+                if n:
+                    time.sleep(1)  # 原流程在子查询之间固定等待1秒
+                getattr(fetcher, method)(symbol)
+            serial.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            risk_data = fetcher.get_risk_data(symbol)
+            parallel.append(time.perf_counter() - start)
+        if not risk_data['data_success']:
+            print("⚠️ 回放结果中没有风险数据，请检查录制文件")
+    finally:
+        wencai_cache._query_wencai, wencai_cache.wencai_cache = original_query, original_cache
+
+    print("\n" + "=" * 60)
+    print(f"风险数据获取耗时（{symbol}，{rounds}轮，回放录制的问财耗时）")
+    print(f"   串行+固定间隔: 平均 {sum(serial) / rounds:.2f}秒")
+    print(f"   并发子查询:     平均 {sum(parallel) / rounds:.2f}秒")
+    print("=" * 60)
+
+
 # 测试代码
 if __name__ == "__main__":
+    import sys
+    
+    # python risk_data_fetcher.py --record 600000 fixture.pkl  录制问财返回
+    # python risk_data_fetcher.py --benchmark [fixture.pkl]     回放并对比耗时
+    if len(sys.argv) >= 4 and sys.argv[1] == '--record':
+        record_fixture(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+    if len(sys.argv) >= 2 and sys.argv[1] == '--benchmark':
+        benchmark_risk_data(sys.argv[2] if len(sys.argv) >= 3 else None)
+        sys.exit(0)
+    
     fetcher = RiskDataFetcher()
     
     # 测试获取风险数据
@@ -5,34 +5,72 @@
 
 import akshare as ak
 import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import warnings
 import time
+from config import SECTOR_HOST_REQUESTS_PER_SECOND, SECTOR_FETCH_MAX_WORKERS
+from rate_limiter import TokenBucket
+from spot_snapshot import spot_snapshot
+from stage_timer import span, in_current_context
 
 warnings.filterwarnings('ignore')
 
 
+# 各AKShare接口实际请求的东方财富主机（编号不同的 push2 子域名为同一服务，合并限流）
+SOURCE_HOSTS = {
+    'stock_board_industry_name_em': 'push2.eastmoney.com',
+    'stock_board_concept_name_em': 'push2.eastmoney.com',
+    'stock_sector_fund_flow_rank': 'push2.eastmoney.com',
+    'stock_zh_index_spot_em': 'push2.eastmoney.com',
+    'stock_hsgt_fund_flow_summary_em': 'datacenter-web.eastmoney.com',
+    'stock_news_em': 'search-api-web.eastmoney.com',
+}
+
+# 全进程共享的按主机限流器（桶容量为1，同一主机的请求按固定间隔发出）
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(host: str) -> TokenBucket:
+    """获取指定主机的限流器"""
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(SECTOR_HOST_REQUESTS_PER_SECOND, capacity=1)
+            _host_limiters[host] = limiter
+        return limiter
+
+
 class SectorStrategyDataFetcher:
     """板块策略数据获取类"""
     
+    # 大盘指数：overview中的键 -> (代码, 名称)
+    INDEX_SYMBOLS = {
+        "sh_index": ("000001", "上证指数"),
+        "sz_index": ("399001", "深证成指"),
+        "cyb_index": ("399006", "创业板指"),
+    }
+    
     def __init__(self):
         print("[智策] 板块数据获取器初始化...")
         self.max_retries = 3  # 最大重试次数
-        self.retry_delay = 2  # 重试延迟（秒）
-        self.request_delay = 1  # 请求间隔（秒）
+        self.retry_delay = 1  # 首次重试延迟（秒），之后每次翻倍
+        self.max_workers = SECTOR_FETCH_MAX_WORKERS  # 同时获取的数据源数
     
     def _safe_request(self, func, *args, **kwargs):
-        """安全的请求函数，包含重试机制"""
+        """安全的请求函数，按接口所在主机限流，失败时指数退避重试（可在多个线程中并发调用）"""
+        limiter = get_host_limiter(SOURCE_HOSTS.get(getattr(func, '__name__', ''), 'eastmoney.com'))
         for attempt in range(self.max_retries):
+            limiter.acquire()
             try:
-                result = func(*args, **kwargs)
-                # 添加请求延迟，避免请求过快
-                time.sleep(self.request_delay)
-                return result
+                return func(*args, **kwargs)
             except Exception as e:
                 if attempt < self.max_retries - 1:
-                    print(f"    请求失败，{self.retry_delay}秒后重试... (尝试 {attempt + 1}/{self.max_retries})")
-                    time.sleep(self.retry_delay)
+                    delay = self.retry_delay * (2 ** attempt)
+                    print(f"    请求失败，{delay}秒后重试... (尝试 {attempt + 1}/{self.max_retries})")
+                    time.sleep(delay)
                 else:
                     print(f"    请求失败，已达最大重试次数: {e}")
                     raise e
@@ -41,10 +79,13 @@ class SectorStrategyDataFetcher:
         """
         获取所有板块的综合数据
         
+        各数据源并发获取（同一主机的请求受限流器约束），单个数据源失败不影响其余数据
+        
         Returns:
-            dict: 包含多个维度的板块数据
+            dict: 包含多个维度的板块数据；failed_sources 为未获取到数据的数据源
         """
         print("[智策] 开始获取板块综合数据...")
+        start_time = time.time()
         
         data = {
             "success": False,
@@ -56,55 +97,68 @@ class SectorStrategyDataFetcher:
             "news": []
         }
         
-        try:
-            # 1. 获取行业板块数据
-            print("  [1/6] 获取行业板块行情...")
-            sectors_data = self._get_sector_performance()
-            if sectors_data:
-                data["sectors"] = sectors_data
-                print(f"    ✓ 成功获取 {len(sectors_data)} 个行业板块数据")
-            
-            # 2. 获取概念板块数据
-            print("  [2/6] 获取概念板块行情...")
-            concept_data = self._get_concept_performance()
-            if concept_data:
-                data["concepts"] = concept_data
-                print(f"    ✓ 成功获取 {len(concept_data)} 个概念板块数据")
-            
-            # 3. 获取板块资金流向
-            print("  [3/6] 获取行业资金流向...")
-            fund_flow_data = self._get_sector_fund_flow()
-            if fund_flow_data:
-                data["sector_fund_flow"] = fund_flow_data
-                print(f"    ✓ 成功获取资金流向数据")
-            
-            # 4. 获取市场总体情况
-            print("  [4/6] 获取市场总体情况...")
-            market_data = self._get_market_overview()
-            if market_data:
-                data["market_overview"] = market_data
-                print(f"    ✓ 成功获取市场概况")
-            
-            # 5. 获取北向资金流向
-            print("  [5/6] 获取北向资金流向...")
-            north_flow = self._get_north_money_flow()
-            if north_flow:
-                data["north_flow"] = north_flow
-                print(f"    ✓ 成功获取北向资金数据")
-            
-            # 6. 获取财经新闻
-            print("  [6/6] 获取财经新闻...")
-            news_data = self._get_financial_news()
-            if news_data:
-                data["news"] = news_data
-                print(f"    ✓ 成功获取 {len(news_data)} 条新闻")
-            
+        # 数据源名称 -> (说明, 获取函数)；大盘指数拆为三个独立请求
+        tasks = {
+            "sectors": ("行业板块行情", self._get_sector_performance),
+            "concepts": ("概念板块行情", self._get_concept_performance),
+            "sector_fund_flow": ("行业资金流向", self._get_sector_fund_flow),
+            "market_stats": ("市场涨跌统计", self._get_market_stats),
+            "north_flow": ("北向资金流向", self._get_north_money_flow),
+            "news": ("财经新闻", self._get_financial_news),
+        }
+        for key, (code, name) in self.INDEX_SYMBOLS.items():
+            tasks[key] = (name, lambda code=code, name=name: self._get_index_quote(code, name))
+        
+        def run_timed(key, task):
+            with span(f"data:{key}", 'data'):
+                return task()
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+            futures = {
+                key: executor.submit(in_current_context(run_timed), key, task)
+                for key, (_, task) in tasks.items()
+            }
+            for key, future in futures.items():
+                label = tasks[key][0]
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    print(f"    ✗ {label}获取失败: {e}")
+                    results[key] = None
+        
+        if results["sectors"]:
+            data["sectors"] = results["sectors"]
+            print(f"    ✓ 成功获取 {len(results['sectors'])} 个行业板块数据")
+        if results["concepts"]:
+            data["concepts"] = results["concepts"]
+            print(f"    ✓ 成功获取 {len(results['concepts'])} 个概念板块数据")
+        if results["sector_fund_flow"]:
+            data["sector_fund_flow"] = results["sector_fund_flow"]
+            print(f"    ✓ 成功获取资金流向数据")
+        overview = dict(results["market_stats"] or {})
+        for key in self.INDEX_SYMBOLS:
+            if results[key]:
+                overview[key] = results[key]
+        if overview:
+            data["market_overview"] = overview
+            print(f"    ✓ 成功获取市场概况")
+        if results["north_flow"]:
+            data["north_flow"] = results["north_flow"]
+            print(f"    ✓ 成功获取北向资金数据")
+        if results["news"]:
+            data["news"] = results["news"]
+            print(f"    ✓ 成功获取 {len(results['news'])} 条新闻")
+        
+        data["failed_sources"] = [tasks[key][0] for key, value in results.items() if not value]
+        if len(data["failed_sources"]) == len(tasks):
+            print("[智策] ✗ 所有数据源均获取失败")
+            data["error"] = "所有数据源均获取失败"
+        else:
             data["success"] = True
-            print("[智策] ✓ 板块数据获取完成！")
-            
-        except Exception as e:
-            print(f"[智策] ✗ 数据获取出错: {e}")
-            data["error"] = str(e)
+            if data["failed_sources"]:
+                print(f"[智策] ⚠️ 部分数据源获取失败，使用已获取的数据继续: {', '.join(data['failed_sources'])}")
+            print(f"[智策] ✓ 板块数据获取完成！耗时 {time.time() - start_time:.2f}秒")
         
         return data
     
@@ -204,75 +258,56 @@ class SectorStrategyDataFetcher:
             return {}
     
     def _get_market_overview(self):
-        """获取市场总体情况"""
+        """获取市场总体情况（涨跌统计及大盘指数）"""
+        overview = self._get_market_stats()
+        for key, (code, name) in self.INDEX_SYMBOLS.items():
+            index_quote = self._get_index_quote(code, name)
+            if index_quote:
+                overview[key] = index_quote
+        return overview
+    
+    def _get_market_stats(self):
+        """获取A股涨跌家数及涨停跌停统计"""
+        overview = {}
         try:
-            # 获取A股市场统计
-            overview = {}
-            
-            # 涨跌家数
-            try:
-                df_stat = self._safe_request(ak.stock_zh_a_spot_em)
-                if df_stat is not None and not df_stat.empty:
-                    total_count = len(df_stat)
-                    up_count = len(df_stat[df_stat['涨跌幅'] > 0])
-                    down_count = len(df_stat[df_stat['涨跌幅'] < 0])
-                    flat_count = total_count - up_count - down_count
-                    
-                    overview["total_stocks"] = total_count
-                    overview["up_count"] = up_count
-                    overview["down_count"] = down_count
-                    overview["flat_count"] = flat_count
-                    overview["up_ratio"] = round(up_count / total_count * 100, 2) if total_count > 0 else 0
-                    
-                    # 涨停跌停
-                    limit_up = len(df_stat[df_stat['涨跌幅'] >= 9.5])
-                    limit_down = len(df_stat[df_stat['涨跌幅'] <= -9.5])
-                    overview["limit_up"] = limit_up
-                    overview["limit_down"] = limit_down
-            except:
-                pass
-            
-            # 大盘指数
-            try:
-                # 上证指数
-                df_sh = ak.stock_zh_index_spot_em(symbol="上证指数")
-                if df_sh is not None and not df_sh.empty:
-                    overview["sh_index"] = {
-                        "code": "000001",
-                        "name": "上证指数",
-                        "close": df_sh.iloc[0].get('最新价', 0),
-                        "change_pct": df_sh.iloc[0].get('涨跌幅', 0),
-                        "change": df_sh.iloc[0].get('涨跌额', 0)
-                    }
+            df_stat = spot_snapshot.get_a_spot()
+            if df_stat is not None and not df_stat.empty:
+                total_count = len(df_stat)
+                up_count = len(df_stat[df_stat['涨跌幅'] > 0])
+                down_count = len(df_stat[df_stat['涨跌幅'] < 0])
+                flat_count = total_count - up_count - down_count
                 
-                # 深证成指
-                df_sz = self._safe_request(ak.stock_zh_index_spot_em, symbol="深证成指")
-                if df_sz is not None and not df_sz.empty:
-                    overview["sz_index"] = {
-                        "code": "399001",
-                        "name": "深证成指",
-                        "close": df_sz.iloc[0].get('最新价', 0),
-                        "change_pct": df_sz.iloc[0].get('涨跌幅', 0),
-                        "change": df_sz.iloc[0].get('涨跌额', 0)
-                    }
+                overview["total_stocks"] = total_count
+                overview["up_count"] = up_count
+                overview["down_count"] = down_count
+                overview["flat_count"] = flat_count
+                overview["up_ratio"] = round(up_count / total_count * 100, 2) if total_count > 0 else 0
                 
-                # 创业板指
-                df_cyb = self._safe_request(ak.stock_zh_index_spot_em, symbol="创业板指")
-                if df_cyb is not None and not df_cyb.empty:
-                    overview["cyb_index"] = {
-                        "code": "399006",
-                        "name": "创业板指",
-                        "close": df_cyb.iloc[0].get('最新价', 0),
-                        "change_pct": df_cyb.iloc[0].get('涨跌幅', 0),
-                        "change": df_cyb.iloc[0].get('涨跌额', 0)
-                    }
-            except:
-                pass
-            
-            return overview
-            
+                # 涨停跌停
+                limit_up = len(df_stat[df_stat['涨跌幅'] >= 9.5])
+                limit_down = len(df_stat[df_stat['涨跌幅'] <= -9.5])
+                overview["limit_up"] = limit_up
+                overview["limit_down"] = limit_down
+        except Exception as e:
+            print(f"    获取市场涨跌统计失败: {e}")
+        
+        return overview
+    
+    def _get_index_quote(self, code, name):
+        """获取单个大盘指数行情"""
+        try:
+            df = self._safe_request(ak.stock_zh_index_spot_em, symbol=name)
+            if df is None or df.empty:
+                return {}
+            return {
+                "code": code,
+                "name": name,
+                "close": df.iloc[0].get('最新价', 0),
+                "change_pct": df.iloc[0].get('涨跌幅', 0),
+                "change": df.iloc[0].get('涨跌额', 0)
+            }
         except Exception as e:
-            print(f"    获取市场概况失败: {e}")
+            print(f"    获取{name}失败: {e}")
             return {}
     
     def _get_north_money_flow(self):
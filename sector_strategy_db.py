@@ -0,0 +1,464 @@
+"""
+智策板块分析历史数据库模块
+保存每次智策分析的原始板块快照、智能体报告及最终预测，
+快照按列压缩存储，按日期建立索引，用于回看历史分析和计算板块日间轮动
+"""
+
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+
+class SectorStrategyDatabase:
+    """智策板块分析历史数据库管理类"""
+
+    # 以表格形式保存的原始数据：快照类型 -> 键（行业/概念板块以板块名称为键的字典，其余为记录列表）
+    SNAPSHOT_KINDS = ('sectors', 'concepts', 'sector_fund_flow', 'news')
+
+    def __init__(self, db_path='sector_strategy.db'):
+        """
+        初始化数据库
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self.init_database()
+
+    def get_connection(self):
+        """获取数据库连接"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_database(self):
+        """初始化数据库表"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+        # 分析运行记录表（市场概况、北向资金等小体量数据以JSON保存）
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sector_strategy_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_date TEXT NOT NULL,
+            run_time TEXT NOT NULL,
+            model TEXT,
+            data_timestamp TEXT,
+            market_data TEXT,
+            comprehensive_report TEXT,
+            final_predictions TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+
+        # 智能体报告表
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sector_strategy_agent_reports (
+            run_id INTEGER NOT NULL,
+            agent_key TEXT NOT NULL,
+            agent_name TEXT,
+            agent_role TEXT,
+            focus_areas TEXT,
+            analysis TEXT,
+            timestamp TEXT,
+            PRIMARY KEY (run_id, agent_key)
+        )
+        ''')
+
+        # 原始数据快照表（每次运行每类数据一行，列式JSON经zlib压缩）
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sector_strategy_snapshots (
+            run_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            run_date TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            payload BLOB NOT NULL,
+            PRIMARY KEY (run_id, kind)
+        )
+        ''')
+
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sector_runs_date ON sector_strategy_runs(run_date, run_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sector_snapshots_date ON sector_strategy_snapshots(run_date, kind)')
+
+        conn.commit()
+        conn.close()
+        print("[智策] 历史数据库初始化完成")
+
+    @staticmethod
+    def _json_value(value):
+        """JSON序列化时将NumPy/Pandas标量转换为Python类型"""
+        if hasattr(value, 'item'):
+            return value.item()
+        return str(value)
+
+    @classmethod
+    def _encode_table(cls, records: List[Dict]) -> bytes:
+        """将记录列表按列编码为压缩的JSON（列名只保存一次）"""
+        columns = []
+        for record in records:
+            for key in record:
+                if key not in columns:
+                    columns.append(key)
+        table = {
+            'columns': columns,
+            'values': [[record.get(col) for record in records] for col in columns]
+        }
+        text = json.dumps(table, ensure_ascii=False, default=cls._json_value, separators=(',', ':'))
+        return zlib.compress(text.encode('utf-8'))
+
+    @staticmethod
+    def _decode_table(payload: bytes) -> pd.DataFrame:
+        """解码列式快照为DataFrame"""
+        table = json.loads(zlib.decompress(payload).decode('utf-8'))
+        return pd.DataFrame(dict(zip(table['columns'], table['values'])), columns=table['columns'])
+
+    @staticmethod
+    def _decode_records(payload: bytes) -> List[Dict]:
+        """解码列式快照为记录列表（保持原始值类型，缺失的字段不补齐）"""
+        table = json.loads(zlib.decompress(payload).decode('utf-8'))
+        columns = table['columns']
+        return [
+            {col: value for col, value in zip(columns, row) if value is not None}
+            for row in zip(*table['values'])
+        ]
+
+    @staticmethod
+    def _snapshot_records(data: Dict, kind: str) -> List[Dict]:
+        """从 get_all_sector_data 的结果中取出指定类型的记录列表"""
+        value = data.get(kind) or {}
+        if kind in ('sectors', 'concepts'):
+            return [dict(record, name=record.get('name') or name) for name, record in value.items()]
+        if kind == 'sector_fund_flow':
+            return value.get('today', [])
+        return list(value)
+
+    def save_run(self, data: Dict, result: Dict, model: str = None) -> int:
+        """
+        保存一次智策分析（原始数据快照、智能体报告及最终预测在同一事务中写入）
+
+        Args:
+            data: SectorStrategyDataFetcher.get_all_sector_data() 的结果
+            result: SectorStrategyEngine 的分析结果
+            model: 使用的AI模型
+
+        Returns:
+            int: 运行记录ID
+        """
+        timestamp = result.get('timestamp') or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        run_date = timestamp[:10]
+        market_data = {
+            'market_overview': data.get('market_overview', {}),
+            'north_flow': data.get('north_flow', {}),
+            'fund_flow_update_time': (data.get('sector_fund_flow') or {}).get('update_time'),
+            'failed_sources': data.get('failed_sources', [])
+        }
+
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO sector_strategy_runs
+                (run_date, run_time, model, data_timestamp, market_data, comprehensive_report, final_predictions)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                run_date,
+                timestamp,
+                model,
+                data.get('timestamp'),
+                json.dumps(market_data, ensure_ascii=False, default=self._json_value),
+                result.get('comprehensive_report', ''),
+                json.dumps(result.get('final_predictions', {}), ensure_ascii=False, default=self._json_value)
+            ))
+            run_id = cursor.lastrowid
+
+            cursor.executemany('''
+                INSERT INTO sector_strategy_agent_reports
+                (run_id, agent_key, agent_name, agent_role, focus_areas, analysis, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (run_id, key, agent.get('agent_name'), agent.get('agent_role'),
+                 json.dumps(agent.get('focus_areas', []), ensure_ascii=False),
+                 agent.get('analysis', ''), agent.get('timestamp'))
+                for key, agent in (result.get('agents_analysis') or {}).items()
+            ])
+
+            snapshots = []
+            for kind in self.SNAPSHOT_KINDS:
+                records = self._snapshot_records(data, kind)
+                if records:
+                    snapshots.append((run_id, kind, run_date, len(records), self._encode_table(records)))
+            cursor.executemany('''
+                INSERT INTO sector_strategy_snapshots (run_id, kind, run_date, row_count, payload)
+                VALUES (?, ?, ?, ?, ?)
+            ''', snapshots)
+            conn.commit()
+        finally:
+            conn.close()
+
+        print(f"[智策] 分析记录已保存 (ID: {run_id})")
+        return run_id
+
+    def list_runs(self, limit=50, start_date=None, end_date=None) -> pd.DataFrame:
+        """
+        获取历史分析记录列表（不含报告正文和快照内容）
+
+        Args:
+            limit: 返回数量
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+
+        Returns:
+            pd.DataFrame: 列为 id, run_date, run_time, model, sector_count, concept_count, news_count，按时间倒序
+        """
+        where = []
+        params = []
+        if start_date:
+            where.append('r.run_date >= ?')
+            params.append(start_date)
+        if end_date:
+            where.append('r.run_date <= ?')
+            params.append(end_date)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+
+        conn = self.get_connection()
+        df = pd.read_sql_query(f'''
+            SELECT r.id, r.run_date, r.run_time, r.model,
+                   (SELECT row_count FROM sector_strategy_snapshots s
+                    WHERE s.run_id = r.id AND s.kind = 'sectors') AS sector_count,
+                   (SELECT row_count FROM sector_strategy_snapshots s
+                    WHERE s.run_id = r.id AND s.kind = 'concepts') AS concept_count,
+                   (SELECT row_count FROM sector_strategy_snapshots s
+                    WHERE s.run_id = r.id AND s.kind = 'news') AS news_count
+            FROM sector_strategy_runs r
+            {where_sql}
+            ORDER BY r.run_date DESC, r.run_time DESC, r.id DESC
+            LIMIT ?
+        ''', conn, params=params + [limit])
+        conn.close()
+        return df
+
+    def get_run(self, run_id: int) -> Optional[Dict]:
+        """
+        获取一次分析的完整内容
+
+        Args:
+            run_id: 运行记录ID
+
+        Returns:
+            dict: 与 SectorStrategyEngine 分析结果结构相同，另含 run_id、model 及原始数据 data；
+                  记录不存在时返回 None
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT run_time, model, data_timestamp, market_data, comprehensive_report, final_predictions
+            FROM sector_strategy_runs WHERE id = ?
+        ''', (run_id,))
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            return None
+
+        cursor.execute('''
+            SELECT agent_key, agent_name, agent_role, focus_areas, analysis, timestamp
+            FROM sector_strategy_agent_reports WHERE run_id = ? ORDER BY rowid
+        ''', (run_id,))
+        agents_analysis = {
+            r[0]: {
+                'agent_name': r[1],
+                'agent_role': r[2],
+                'analysis': r[4],
+                'focus_areas': json.loads(r[3]) if r[3] else [],
+                'timestamp': r[5]
+            }
+            for r in cursor.fetchall()
+        }
+        cursor.execute('SELECT kind, payload FROM sector_strategy_snapshots WHERE run_id = ?', (run_id,))
+        snapshots = dict(cursor.fetchall())
+        conn.close()
+
+        market_data = json.loads(row[3]) if row[3] else {}
+        data = {
+            'success': True,
+            'timestamp': row[2],
+            'market_overview': market_data.get('market_overview', {}),
+            'north_flow': market_data.get('north_flow', {}),
+            'failed_sources': market_data.get('failed_sources', [])
+        }
+        for kind in self.SNAPSHOT_KINDS:
+            records = self._decode_records(snapshots[kind]) if kind in snapshots else []
+            if kind in ('sectors', 'concepts'):
+                data[kind] = {record['name']: record for record in records}
+            elif kind == 'sector_fund_flow':
+                data[kind] = {'today': records, 'update_time': market_data.get('fund_flow_update_time')} if records else {}
+            else:
+                data[kind] = records
+
+        return {
+            'success': True,
+            'run_id': run_id,
+            'model': row[1],
+            'timestamp': row[0],
+            'agents_analysis': agents_analysis,
+            'comprehensive_report': row[4] or '',
+            'final_predictions': json.loads(row[5]) if row[5] else {},
+            'data': data
+        }
+
+    def get_snapshot(self, run_id: int, kind: str = 'sectors') -> Optional[pd.DataFrame]:
+        """
+        获取某次分析的原始数据快照
+
+        Args:
+            run_id: 运行记录ID
+            kind: 快照类型，sectors / concepts / sector_fund_flow / news
+
+        Returns:
+            pd.DataFrame: 快照数据，不存在时返回 None
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT payload FROM sector_strategy_snapshots WHERE run_id = ? AND kind = ?', (run_id, kind))
+        row = cursor.fetchone()
+        conn.close()
+        return self._decode_table(row[0]) if row else None
+
+    def get_run_dates(self, kind: str = 'sectors') -> List[str]:
+        """获取保存有指定快照的所有日期（倒序）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT run_date FROM sector_strategy_snapshots WHERE kind = ? ORDER BY run_date DESC
+        ''', (kind,))
+        dates = [r[0] for r in cursor.fetchall()]
+        conn.close()
+        return dates
+
+    def _latest_snapshot_run(self, cursor, kind: str, date: str = None, before: str = None) -> Optional[tuple]:
+        """查找某日（或某日之前最近一日）最后一次分析的 (run_id, run_date)"""
+        if date:
+            cursor.execute('''
+                SELECT run_id, run_date FROM sector_strategy_snapshots
+                WHERE kind = ? AND run_date = ? ORDER BY run_id DESC LIMIT 1
+            ''', (kind, date))
+        elif before:
+            cursor.execute('''
+                SELECT run_id, run_date FROM sector_strategy_snapshots
+                WHERE kind = ? AND run_date < ? ORDER BY run_date DESC, run_id DESC LIMIT 1
+            ''', (kind, before))
+        else:
+            cursor.execute('''
+                SELECT run_id, run_date FROM sector_strategy_snapshots
+                WHERE kind = ? ORDER BY run_date DESC, run_id DESC LIMIT 1
+            ''', (kind,))
+        return cursor.fetchone()
+
+    def get_board_rotation(self, date: str = None, compare_date: str = None, kind: str = 'sectors') -> Optional[Dict]:
+        """
+        计算板块日间轮动：对比两日（各取当日最后一次分析）的板块涨跌幅排名
+
+        Args:
+            date: 日期，默认为最近一次分析的日期
+            compare_date: 对比日期，默认为 date 之前最近一次分析的日期
+            kind: 'sectors'（行业板块）或 'concepts'（概念板块）
+
+        Returns:
+            dict: {date, compare_date, rotation}；rotation 为DataFrame，列为
+                  name, change_pct, rank, prev_change_pct, prev_rank, rank_change（正数为排名上升），
+                  按 rank_change 降序；任一日期没有快照时返回 None
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        current = self._latest_snapshot_run(cursor, kind, date=date)
+        previous = None
+        if current:
+            if compare_date:
+                previous = self._latest_snapshot_run(cursor, kind, date=compare_date)
+            else:
+                previous = self._latest_snapshot_run(cursor, kind, before=current[1])
+        conn.close()
+        if not current or not previous:
+            return None
+
+        frames = []
+        for run_id, _ in (current, previous):
+            df = self.get_snapshot(run_id, kind)[['name', 'change_pct']]
+            df['change_pct'] = pd.to_numeric(df['change_pct'], errors='coerce')
+            df['rank'] = df['change_pct'].rank(ascending=False, method='min').astype('Int64')
+            frames.append(df)
+
+        rotation = frames[0].merge(
+            frames[1].rename(columns={'change_pct': 'prev_change_pct', 'rank': 'prev_rank'}),
+            on='name', how='left'
+        )
+        rotation['rank_change'] = rotation['prev_rank'] - rotation['rank']
+        rotation = rotation.sort_values(['rank_change', 'rank'], ascending=[False, True], na_position='last')
+
+        return {
+            'date': current[1],
+            'compare_date': previous[1],
+            'rotation': rotation.reset_index(drop=True)
+        }
+
+    def delete_run(self, run_id: int):
+        """删除一次分析记录及其快照和智能体报告"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM sector_strategy_snapshots WHERE run_id = ?', (run_id,))
+        cursor.execute('DELETE FROM sector_strategy_agent_reports WHERE run_id = ?', (run_id,))
+        cursor.execute('DELETE FROM sector_strategy_runs WHERE id = ?', (run_id,))
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+
+    print("=" * 60)
+    print("测试智策历史数据库")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = SectorStrategyDatabase(os.path.join(tmp_dir, 'test_sector_strategy.db'))
+
+        names = [f"板块{i:03d}" for i in range(500)]
+        run_ids = []
+        start = time.perf_counter()
+        for day in ('2025-01-02', '2025-01-03'):
+            sectors = {
+                name: {
+                    "name": name,
+                    "change_pct": round(random.uniform(-5, 5), 2),
+                    "turnover": round(random.uniform(0, 10), 2),
+                    "total_market_cap": random.randint(10 ** 10, 10 ** 12),
+                    "top_stock": "领涨股",
+                    "top_stock_change": round(random.uniform(0, 10), 2),
+                    "up_count": random.randint(0, 50),
+                    "down_count": random.randint(0, 50)
+                }
+                for name in names
+            }
+            data = {"timestamp": f"{day} 09:00:00", "sectors": sectors, "concepts": sectors,
+                    "news": [{"title": "新闻", "content": "内容" * 50}] * 150}
+            result = {"timestamp": f"{day} 09:05:00", "final_predictions": {"summary": {}},
+                      "comprehensive_report": "综合研判",
+                      "agents_analysis": {"macro": {"agent_name": "宏观策略师", "analysis": "分析"}}}
+            run_ids.append(db.save_run(data, result, model="deepseek-chat"))
+        print(f"保存2次分析耗时: {time.perf_counter() - start:.3f}秒, "
+              f"数据库大小: {os.path.getsize(db.db_path) / 1024:.0f} KB")
+
+        print(db.list_runs())
+        run = db.get_run(run_ids[-1])
+        print(f"加载分析 #{run['run_id']}: {len(run['data']['sectors'])} 个行业板块, "
+              f"{len(run['agents_analysis'])} 份智能体报告")
+
+        rotation = db.get_board_rotation()
+        print(f"\n板块轮动 {rotation['compare_date']} -> {rotation['date']}:")
+        print(rotation['rotation'].head(10))
@@ -4,7 +4,9 @@
 """
 
 from sector_strategy_agents import SectorStrategyAgents
+from sector_strategy_db import SectorStrategyDatabase
 from deepseek_client import DeepSeekClient
+from stage_timer import PipelineTrace, span
 from typing import Dict, Any
 import time
 import json
@@ -13,8 +15,16 @@ import json
 class SectorStrategyEngine:
     """板块策略综合研判引擎"""
     
-    def __init__(self, model="deepseek-chat"):
+    def __init__(self, model="deepseek-chat", db_path='sector_strategy.db'):
+        """
+        初始化分析引擎
+        
+        Args:
+            model: AI模型名称
+            db_path: 历史数据库路径
+        """
         self.model = model
+        self.database = SectorStrategyDatabase(db_path)
         self.agents = SectorStrategyAgents(model=model)
         self.deepseek_client = DeepSeekClient(model=model)
         print(f"[智策引擎] 初始化完成 (模型: {model})")
@@ -27,8 +37,16 @@ class SectorStrategyEngine:
             data: 包含市场数据的字典
             
         Returns:
-            完整的分析结果
+            完整的分析结果，run_id 为保存到历史数据库的记录ID，timings 字段为各阶段及LLM调用的耗时明细
         """
+        trace = PipelineTrace('sector_strategy', time.strftime("%Y-%m-%d"))
+        with trace.activate():
+            results = self._run_comprehensive_analysis(data)
+        results["timings"] = trace.finish(record_id=results.get("run_id"), success=results.get("success", False))
+        return results
+    
+    def _run_comprehensive_analysis(self, data: Dict) -> Dict[str, Any]:
+        """综合分析流程的具体实现（各阶段计入当前流程的耗时统计）"""
         print("\n" + "=" * 60)
         print("🚀 智策综合分析系统启动")
         print("=" * 60)
@@ -50,37 +68,41 @@ class SectorStrategyEngine:
             
             # 宏观策略师
             print("1/4 宏观策略师...")
-            macro_result = self.agents.macro_strategist_agent(
-                market_data=data.get("market_overview", {}),
-                news_data=data.get("news", [])
-            )
+            with span("agent:macro", 'agent'):
+                macro_result = self.agents.macro_strategist_agent(
+                    market_data=data.get("market_overview", {}),
+                    news_data=data.get("news", [])
+                )
             agents_results["macro"] = macro_result
             
             # 板块诊断师
             print("2/4 板块诊断师...")
-            sector_result = self.agents.sector_diagnostician_agent(
-                sectors_data=data.get("sectors", {}),
-                concepts_data=data.get("concepts", {}),
-                market_data=data.get("market_overview", {})
-            )
+            with span("agent:sector", 'agent'):
+                sector_result = self.agents.sector_diagnostician_agent(
+                    sectors_data=data.get("sectors", {}),
+                    concepts_data=data.get("concepts", {}),
+                    market_data=data.get("market_overview", {})
+                )
             agents_results["sector"] = sector_result
             
             # 资金流向分析师
             print("3/4 资金流向分析师...")
-            fund_result = self.agents.fund_flow_analyst_agent(
-                fund_flow_data=data.get("sector_fund_flow", {}),
-                north_flow_data=data.get("north_flow", {}),
-                sectors_data=data.get("sectors", {})
-            )
+            with span("agent:fund", 'agent'):
+                fund_result = self.agents.fund_flow_analyst_agent(
+                    fund_flow_data=data.get("sector_fund_flow", {}),
+                    north_flow_data=data.get("north_flow", {}),
+                    sectors_data=data.get("sectors", {})
+                )
             agents_results["fund"] = fund_result
             
             # 市场情绪解码员
             print("4/4 市场情绪解码员...")
-            sentiment_result = self.agents.market_sentiment_decoder_agent(
-                market_data=data.get("market_overview", {}),
-                sectors_data=data.get("sectors", {}),
-                concepts_data=data.get("concepts", {})
-            )
+            with span("agent:sentiment", 'agent'):
+                sentiment_result = self.agents.market_sentiment_decoder_agent(
+                    market_data=data.get("market_overview", {}),
+                    sectors_data=data.get("sectors", {}),
+                    concepts_data=data.get("concepts", {})
+                )
             agents_results["sentiment"] = sentiment_result
             
             results["agents_analysis"] = agents_results
@@ -89,17 +111,27 @@ class SectorStrategyEngine:
             # 2. 综合研判
             print("\n[阶段2] 综合研判引擎工作中...")
             print("-" * 60)
-            comprehensive_report = self._conduct_comprehensive_discussion(agents_results)
+            with span("discussion"):
+                comprehensive_report = self._conduct_comprehensive_discussion(agents_results)
             results["comprehensive_report"] = comprehensive_report
             print("✓ 综合研判完成")
             
             # 3. 生成最终预测
             print("\n[阶段3] 生成最终预测...")
             print("-" * 60)
-            predictions = self._generate_final_predictions(comprehensive_report, agents_results, data)
+            with span("final_predictions"):
+                predictions = self._generate_final_predictions(comprehensive_report, agents_results, data)
             results["final_predictions"] = predictions
             print("✓ 预测生成完成")
             
+            # 4. 保存原始数据快照及分析结果
+            # 保存失败不影响本次分析结果
+            with span("save_run"):
+                try:
+                    results["run_id"] = self.database.save_run(data, results, model=self.model)
+                except Exception as e:
+                    print(f"⚠ 保存分析记录失败: {e}")
+            
             results["success"] = True
             
             print("\n" + "=" * 60)
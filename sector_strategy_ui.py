@@ -12,6 +12,7 @@ import time
 import base64
 
 from sector_strategy_data import SectorStrategyDataFetcher
+from sector_strategy_db import SectorStrategyDatabase
 from sector_strategy_engine import SectorStrategyEngine
 from sector_strategy_pdf import SectorStrategyPDFGenerator
 from sector_strategy_scheduler import sector_strategy_scheduler
@@ -105,6 +106,11 @@ def display_sector_strategy():
     
     st.markdown("---")
     
+    # 历史记录与板块轮动（读取本地数据库，无需重新获取数据）
+    display_history_section()
+    
+    st.markdown("---")
+    
     # 开始分析
     if analyze_button:
         # 清除之前的结果
@@ -123,6 +129,90 @@ def display_sector_strategy():
             st.error(f"❌ 分析失败: {result.get('error', '未知错误')}")
 
 
+def display_history_section():
+    """显示历史分析记录及板块日间轮动"""
+    
+    with st.expander("📚 历史分析与板块轮动", expanded=False):
+        try:
+            db = SectorStrategyDatabase()
+            runs_df = db.list_runs(limit=50)
+        except Exception as e:
+            st.error(f"❌ 加载历史记录失败: {str(e)}")
+            return
+        
+        if runs_df.empty:
+            st.info("暂无历史分析记录，完成一次智策分析后会自动保存")
+            return
+        
+        tab1, tab2 = st.tabs(["📋 历史分析", "🔄 板块轮动"])
+        
+        with tab1:
+            st.info(f"💾 共有 {len(runs_df)} 条历史分析记录")
+            
+            labels = {
+                row['id']: f"#{row['id']} | {row['run_time']} | {row['model'] or 'N/A'} | "
+                           f"行业{int(row['sector_count'] or 0)}个 概念{int(row['concept_count'] or 0)}个"
+                for _, row in runs_df.iterrows()
+            }
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                run_id = st.selectbox("选择历史分析", list(labels.keys()), format_func=labels.get)
+            with col2:
+                st.write("")
+                st.write("")
+                if st.button("📂 加载", use_container_width=True, key="load_sector_run"):
+                    result = db.get_run(int(run_id))
+                    if result:
+                        st.session_state.sector_strategy_result = result
+                        st.rerun()
+                    else:
+                        st.error("❌ 记录不存在")
+        
+        with tab2:
+            display_board_rotation(db)
+
+
+def display_board_rotation(db):
+    """显示板块日间轮动（对比两日保存的板块快照）"""
+    
+    dates = db.get_run_dates('sectors')
+    if len(dates) < 2:
+        st.info("至少需要两个交易日的分析记录才能计算板块轮动")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        kind_label = st.radio("板块类型", ["行业板块", "概念板块"], horizontal=True, key="rotation_kind")
+    kind = 'sectors' if kind_label == "行业板块" else 'concepts'
+    with col2:
+        date = st.selectbox("日期", dates[:-1], key="rotation_date")
+    with col3:
+        compare_date = st.selectbox("对比日期", [d for d in dates if d < date], key="rotation_compare_date")
+    
+    rotation = db.get_board_rotation(date, compare_date, kind)
+    if not rotation:
+        st.info("所选日期没有可对比的板块数据")
+        return
+    
+    df = rotation['rotation'].rename(columns={
+        'name': '板块',
+        'change_pct': f"涨跌幅({rotation['date']})",
+        'rank': '排名',
+        'prev_change_pct': f"涨跌幅({rotation['compare_date']})",
+        'prev_rank': '前排名',
+        'rank_change': '排名变化'
+    })
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("#### 🔺 排名上升最快")
+        st.dataframe(df.head(15), use_container_width=True, hide_index=True)
+    with col2:
+        st.markdown("#### 🔻 排名下降最快")
+        falling = df.dropna(subset=['排名变化']).sort_values('排名变化').head(15)
+        st.dataframe(falling, use_container_width=True, hide_index=True)
+
+
 def run_sector_strategy_analysis(model="deepseek-chat"):
     """运行智策分析"""
     
@@ -0,0 +1,152 @@
+"""
+全市场实时行情快照服务
+进程内共享的A股/港股实时行情快照，带TTL过期与单飞（single-flight）刷新，
+替代各模块中分别调用 ak.stock_zh_a_spot_em() / ak.stock_hk_spot_em() 的做法
+"""
+
+import threading
+import time
+
+from config import SPOT_SNAPSHOT_TTL
+
+
+class _Snapshot:
+    """单个市场的行情快照（DataFrame + 代码索引）"""
+
+    def __init__(self, df, fetched_at):
+        self.df = df
+        self.fetched_at = fetched_at
+        # 代码 -> 行号，O(1) 定位单只股票
+        if df is not None and '代码' in df.columns:
+            self.index = {str(code): pos for pos, code in enumerate(df['代码'].values)}
+        else:
+            self.index = {}
+
+
+class SpotSnapshotProvider:
+    """全市场行情快照提供者 - 同一TTL周期内所有调用方共享一次下载"""
+
+    # 市场 -> akshare 接口名
+    LOADERS = {
+        'a': 'stock_zh_a_spot_em',
+        'hk': 'stock_hk_spot_em',
+    }
+
+    def __init__(self, ttl=SPOT_SNAPSHOT_TTL):
+        """
+        初始化快照提供者
+
+        Args:
+            ttl: 快照有效期（秒）
+        """
+        self.ttl = ttl
+        self._snapshots = {}
+        self._locks = {market: threading.Lock() for market in self.LOADERS}
+
+    def _is_fresh(self, snapshot):
+        return snapshot is not None and (time.time() - snapshot.fetched_at) < self.ttl
+
+    def _load(self, market):
+        import akshare as ak
+        loader = getattr(ak, self.LOADERS[market])
+        print(f"[行情快照] 正在下载 {market.upper()} 全市场实时行情...")
+        start = time.time()
+        df = loader()
+        print(f"[行情快照] ✅ 下载完成，共 {0 if df is None else len(df)} 条，耗时 {time.time() - start:.2f}秒")
+        return df
+
+    def _get_snapshot(self, market, force_refresh=False):
+        snapshot = self._snapshots.get(market)
+        if not force_refresh and self._is_fresh(snapshot):
+            return snapshot
+
+        # 单飞刷新：并发线程在锁上等待同一次下载，拿到锁后再次检查是否已被刷新
+        requested_at = time.time()
+        with self._locks[market]:
+            snapshot = self._snapshots.get(market)
+            if self._is_fresh(snapshot) and (not force_refresh or snapshot.fetched_at >= requested_at):
+                return snapshot
+
+            df = self._load(market)
+            if df is None or df.empty:
+                # 下载失败时保留旧快照，由调用方决定是否使用
+                if snapshot is not None:
+                    return snapshot
+                raise ValueError(f"{market.upper()} 实时行情为空")
+
+            df = df.reset_index(drop=True)
+            snapshot = _Snapshot(df, time.time())
+            self._snapshots[market] = snapshot
+            return snapshot
+
+    def get_a_spot(self, force_refresh=False):
+        """
+        获取A股全市场实时行情
+
+        Args:
+            force_refresh: 是否忽略TTL强制刷新
+
+        Returns:
+            DataFrame: 与 ak.stock_zh_a_spot_em() 相同的结构（调用方不应原地修改）
+        """
+        return self._get_snapshot('a', force_refresh).df
+
+    def get_hk_spot(self, force_refresh=False):
+        """获取港股全市场实时行情，结构同 ak.stock_hk_spot_em()"""
+        return self._get_snapshot('hk', force_refresh).df
+
+    def get_a_row(self, symbol):
+        """
+        获取单只A股的实时行情行
+
+        Args:
+            symbol: 6位股票代码
+
+        Returns:
+            Series: 行情行，未找到时返回 None
+        """
+        return self._get_row('a', symbol)
+
+    def get_hk_row(self, symbol):
+        """获取单只港股的实时行情行（5位代码），未找到时返回 None"""
+        return self._get_row('hk', symbol)
+
+    def get_a_rows(self, symbols):
+        """
+        批量获取多只A股的实时行情行（只触发一次快照下载）
+
+        Returns:
+            dict: {代码: Series}，未找到的代码不包含在结果中
+        """
+        return self._get_rows('a', symbols)
+
+    def get_hk_rows(self, symbols):
+        """批量获取多只港股的实时行情行，返回 {代码: Series}"""
+        return self._get_rows('hk', symbols)
+
+    def _get_row(self, market, symbol):
+        snapshot = self._get_snapshot(market)
+        pos = snapshot.index.get(str(symbol))
+        if pos is None:
+            return None
+        return snapshot.df.iloc[pos]
+
+    def _get_rows(self, market, symbols):
+        snapshot = self._get_snapshot(market)
+        rows = {}
+        for symbol in symbols:
+            pos = snapshot.index.get(str(symbol))
+            if pos is not None:
+                rows[symbol] = snapshot.df.iloc[pos]
+        return rows
+
+    def invalidate(self, market=None):
+        """使快照失效（market为None时清空所有市场）"""
+        if market is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(market, None)
+
+
+# 全局行情快照实例
+spot_snapshot = SpotSnapshotProvider()
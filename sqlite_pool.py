@@ -0,0 +1,200 @@
+"""
+SQLite连接池模块
+按线程复用各数据库文件的连接（保留预编译语句缓存），并统一设置WAL、synchronous=NORMAL及忙等待超时，
+监控线程、定时任务线程与Streamlit页面并发读写同一数据库时，读操作不再被写操作阻塞
+"""
+
+import sqlite3
+import threading
+from typing import Dict, List
+
+from config import SQLITE_POOL_ENABLED, SQLITE_BUSY_TIMEOUT
+
+
+class PooledConnection(sqlite3.Connection):
+    """连接池中的连接：close() 把连接归还给当前线程的连接池，而不是真正关闭"""
+
+    def close(self):
+        """归还连接（未提交的事务回滚，与关闭连接的效果一致）"""
+        pool = getattr(self, '_pool', None)
+        if pool is None:
+            super().close()
+            return
+        if self.in_transaction:
+            self.rollback()
+        self.row_factory = None
+        if not pool._release(self):
+            super().close()
+
+    def force_close(self):
+        """真正关闭连接"""
+        self._pool = None
+        super().close()
+
+
+class SQLiteConnectionPool:
+    """按线程、按数据库文件复用连接的连接池"""
+
+    def __init__(self, timeout: float = 30, max_idle: int = 4, cached_statements: int = 256, enabled: bool = True):
+        """
+        初始化连接池
+
+        Args:
+            timeout: 数据库被锁定时的等待时间（秒）
+            max_idle: 每个线程每个数据库保留的空闲连接数（嵌套调用时会同时借出多个连接）
+            cached_statements: 每个连接缓存的预编译语句数
+            enabled: 为False时退回到每次新建连接（用于对比测试）
+        """
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.cached_statements = cached_statements
+        self.enabled = enabled
+        self._local = threading.local()
+        # 已设置为WAL模式的数据库（该设置保存在数据库文件中，每个文件只需设置一次）
+        self._wal_paths = set()
+        self._wal_lock = threading.Lock()
+
+    def _idle(self, db_path: str) -> List[PooledConnection]:
+        pools = getattr(self._local, 'idle', None)
+        if pools is None:
+            pools = self._local.idle = {}
+        return pools.setdefault(db_path, [])
+
+    def connect(self, db_path: str) -> sqlite3.Connection:
+        """
+        借出当前线程的一个连接（用完后照常调用 close() 即归还）
+
+        Args:
+            db_path: 数据库文件路径
+
+        Returns:
+            sqlite3.Connection: 连接（PooledConnection 是 sqlite3.Connection 的子类）
+        """
+        if not self.enabled or db_path == ':memory:':
+            return sqlite3.connect(db_path)
+
+        idle = self._idle(db_path)
+        if idle:
+            conn = idle.pop()
+            # 上次使用时因异常未走到 close() 的连接不会回到池中，这里只是保险
+            if conn.in_transaction:
+                conn.rollback()
+            return conn
+
+        conn = sqlite3.connect(db_path, timeout=self.timeout, cached_statements=self.cached_statements,
+                               factory=PooledConnection)
+        self._enable_wal(conn, db_path)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn._pool = self
+        conn._db_path = db_path
+        return conn
+
+    def _enable_wal(self, conn: sqlite3.Connection, db_path: str):
+        with self._wal_lock:
+            if db_path in self._wal_paths:
+                return
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._wal_paths.add(db_path)
+
+    def _release(self, conn: PooledConnection) -> bool:
+        """归还连接，空闲连接已满时返回False（由调用方关闭）"""
+        idle = self._idle(conn._db_path)
+        if len(idle) >= self.max_idle or conn in idle:
+            return False
+        idle.append(conn)
+        return True
+
+    def close_thread_connections(self):
+        """关闭当前线程的全部空闲连接（线程结束时空闲连接也会随之释放）"""
+        pools: Dict[str, List[PooledConnection]] = getattr(self._local, 'idle', None) or {}
+        for idle in pools.values():
+            while idle:
+                idle.pop().force_close()
+
+
+# 全进程共享的SQLite连接池
+connection_pool = SQLiteConnectionPool(timeout=SQLITE_BUSY_TIMEOUT, enabled=SQLITE_POOL_ENABLED)
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """从全局连接池借出连接"""
+    return connection_pool.connect(db_path)
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    # 以模块方式引用连接池，与 monitor_db 使用的是同一个实例
+    import sqlite_pool
+    from monitor_db import StockMonitorDatabase
+
+    print("=" * 60)
+    print("SQLite连接池基准测试：监控循环写入 + 页面并发查询")
+    print("=" * 60)
+
+    STOCKS = 100
+    CYCLES = 60
+    UI_THREADS = 4
+    UI_QUERIES = 300
+
+    def run(enabled: bool) -> Dict:
+        pool = sqlite_pool.connection_pool
+        pool.enabled = enabled
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = StockMonitorDatabase(os.path.join(tmp_dir, 'bench_monitor.db'))
+            stock_ids = [
+                db.add_monitored_stock(f"{600000 + i}", f"股票{i}", "买入",
+                                       {"min": 10.0, "max": 11.0}, 12.0, 9.0)
+                for i in range(STOCKS)
+            ]
+
+            def monitor_loop():
+                # 每轮：批量更新价格、逐只标记检查时间、写入触发的提醒
+                start = time.perf_counter()
+                for _ in range(CYCLES):
+                    db.batch_update_stock_prices({sid: round(random.uniform(9, 12), 2) for sid in stock_ids})
+                    for sid in random.sample(stock_ids, 10):
+                        db.update_last_checked(sid)
+                    db.add_notifications([(sid, 'entry', '进入买入区间') for sid in random.sample(stock_ids, 5)])
+                return time.perf_counter() - start
+
+            def ui_queries(n):
+                latencies = []
+                for i in range(n):
+                    start = time.perf_counter()
+                    if i % 3 == 0:
+                        db.get_monitored_stocks()
+                    elif i % 3 == 1:
+                        db.get_pending_notifications()
+                    else:
+                        db.get_stock_by_id(random.choice(stock_ids))
+                    latencies.append(time.perf_counter() - start)
+                return latencies
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=UI_THREADS + 1) as executor:
+                writer = executor.submit(monitor_loop)
+                readers = [executor.submit(ui_queries, UI_QUERIES) for _ in range(UI_THREADS)]
+                latencies = sorted(l for r in readers for l in r.result())
+                writer_seconds = writer.result()
+            total = time.perf_counter() - start
+            pool.close_thread_connections()
+
+        return {
+            'total': total,
+            'writer': writer_seconds,
+            'p50': latencies[len(latencies) // 2] * 1000,
+            'p95': latencies[int(len(latencies) * 0.95)] * 1000,
+            'max': latencies[-1] * 1000,
+        }
+
+    for label, enabled in (("每次新建连接（默认日志模式）", False), ("连接池（WAL + 连接复用）", True)):
+        stats = run(enabled)
+        print(f"\n{label}")
+        print(f"   总耗时: {stats['total']:.2f}秒（监控循环 {CYCLES} 轮写入 {stats['writer']:.2f}秒）")
+        print(f"   页面查询延迟: p50 {stats['p50']:.2f}ms, p95 {stats['p95']:.2f}ms, 最大 {stats['max']:.2f}ms")
+    sqlite_pool.connection_pool.enabled = SQLITE_POOL_ENABLED
@@ -0,0 +1,347 @@
+"""
+分析流程耗时统计模块
+记录个股分析、龙虎榜、板块策略、主力选股等流程中每个阶段、每个数据源及每次LLM调用的耗时，
+持久化到本地数据库，并按阶段汇总 p50/p95 以定位瓶颈
+"""
+
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from config import STAGE_TIMING_ENABLED, STAGE_TIMING_DB_PATH
+
+
+# 当前线程（上下文）正在记录的流程及所处阶段
+_current_trace = contextvars.ContextVar('stage_timer_trace', default=None)
+_current_stage = contextvars.ContextVar('stage_timer_stage', default=None)
+
+
+class PipelineTrace:
+    """一次流程运行的耗时记录（线程安全，可在线程池中并发记录）"""
+
+    def __init__(self, pipeline: str, subject: str = ''):
+        """
+        初始化耗时记录
+
+        Args:
+            pipeline: 流程名称，如 'stock_analysis'、'longhubang'
+            subject: 分析对象，如股票代码、日期
+        """
+        self.pipeline = pipeline
+        self.subject = subject
+        self.started_at = time.time()
+        self.total_seconds = None
+        self.spans = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """在该上下文内，span() 及LLM调用的耗时都记录到本流程"""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+            if self.total_seconds is None:
+                self.total_seconds = time.perf_counter() - self._start
+
+    def record(self, name: str, category: str, duration: float, ok: bool = True,
+               parent: Optional[str] = None, offset: Optional[float] = None, detail: Dict = None):
+        """
+        记录一段耗时
+
+        Args:
+            name: 阶段名称
+            category: 类别，'stage'（流程阶段）、'data'（数据源）、'agent'（分析师）、'llm'（LLM调用）
+            duration: 耗时（秒）
+            ok: 是否成功
+            parent: 所属的上级阶段
+            offset: 相对流程开始的起始时间（秒），默认按结束时间倒推
+            detail: 附加信息（如模型名、是否命中缓存）
+        """
+        if offset is None:
+            offset = time.perf_counter() - self._start - duration
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'category': category,
+                'parent': parent,
+                'offset': round(offset, 4),
+                'duration': round(duration, 4),
+                'ok': ok,
+                'detail': detail or {}
+            })
+
+    @contextmanager
+    def span(self, name: str, category: str = 'stage', detail: Dict = None):
+        """计时上下文，块内发生的子阶段及LLM调用以 name 为上级阶段"""
+        parent = _current_stage.get()
+        token = _current_stage.set(name)
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            _current_stage.reset(token)
+            self.record(name, category, time.perf_counter() - start, ok, parent,
+                        offset=start - self._start, detail=detail)
+
+    def to_dict(self) -> Dict:
+        """导出为可序列化的字典"""
+        total = self.total_seconds if self.total_seconds is not None else time.perf_counter() - self._start
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'pipeline': self.pipeline,
+            'subject': self.subject,
+            'started_at': datetime.fromtimestamp(self.started_at).strftime('%Y-%m-%d %H:%M:%S'),
+            'total_seconds': round(total, 4),
+            'spans': sorted(spans, key=lambda s: s['offset'])
+        }
+
+    def finish(self, record_id=None, success: bool = True) -> Dict:
+        """
+        结束记录并持久化
+
+        Args:
+            record_id: 关联的分析记录/报告ID
+            success: 流程是否成功
+
+        Returns:
+            dict: to_dict() 的结果
+        """
+        if self.total_seconds is None:
+            self.total_seconds = time.perf_counter() - self._start
+        timings = self.to_dict()
+        if stage_timing_db is not None:
+            try:
+                stage_timing_db.save_trace(timings, record_id=record_id, success=success)
+            except Exception as e:
+                print(f"⚠️ 保存耗时统计失败: {e}")
+        return timings
+
+
+def current_trace() -> Optional[PipelineTrace]:
+    """获取当前上下文中的流程耗时记录（未在流程中时返回 None）"""
+    return _current_trace.get()
+
+
+def span(name: str, category: str = 'stage', detail: Dict = None):
+    """对当前流程计时；不在流程中时不做任何事"""
+    trace = _current_trace.get()
+    if trace is None:
+        return nullcontext()
+    return trace.span(name, category, detail)
+
+
+def record_llm_call(duration: float, model: str, ok: bool = True, cached: bool = False):
+    """记录一次LLM调用的耗时，挂在当前阶段下"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_stage.get()
+    name = f"{parent}/llm" if parent else 'llm'
+    trace.record(name, 'llm', duration, ok, parent, detail={'model': model, 'cached': cached})
+
+
+def in_current_context(func):
+    """
+    包装函数，使其在提交到线程池后仍记录到当前流程
+
+    线程池中的线程不会继承提交方的 contextvars，每个任务需单独包装
+    """
+    ctx = contextvars.copy_context()
+
+    def wrapper(*args, **kwargs):
+        return ctx.run(func, *args, **kwargs)
+    return wrapper
+
+
+class StageTimingDatabase:
+    """流程耗时统计数据库"""
+
+    def __init__(self, db_path='stage_timings.db'):
+        """
+        初始化数据库
+
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        self.init_database()
+
+    def get_connection(self):
+        """获取数据库连接"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_database(self):
+        """初始化数据库表"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pipeline_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pipeline TEXT NOT NULL,
+            subject TEXT,
+            record_id TEXT,
+            started_at TEXT NOT NULL,
+            total_seconds REAL NOT NULL,
+            success INTEGER NOT NULL
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stage_spans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            category TEXT NOT NULL,
+            parent TEXT,
+            offset_seconds REAL,
+            duration REAL NOT NULL,
+            ok INTEGER NOT NULL,
+            detail TEXT,
+            FOREIGN KEY (run_id) REFERENCES pipeline_runs(id)
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_pipeline_runs_started ON pipeline_runs(pipeline, started_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stage_spans_run ON stage_spans(run_id)')
+
+        conn.commit()
+        conn.close()
+
+    def save_trace(self, timings: Dict, record_id=None, success: bool = True) -> int:
+        """
+        保存一次流程的耗时记录
+
+        Args:
+            timings: PipelineTrace.to_dict() 的结果
+            record_id: 关联的分析记录/报告ID
+            success: 流程是否成功
+
+        Returns:
+            int: 运行记录ID
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO pipeline_runs (pipeline, subject, record_id, started_at, total_seconds, success)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (timings['pipeline'], timings['subject'], None if record_id is None else str(record_id),
+                  timings['started_at'], timings['total_seconds'], int(success)))
+            run_id = cursor.lastrowid
+            cursor.executemany('''
+                INSERT INTO stage_spans (run_id, name, category, parent, offset_seconds, duration, ok, detail)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (run_id, s['name'], s['category'], s['parent'], s['offset'], s['duration'], int(s['ok']),
+                 json.dumps(s['detail'], ensure_ascii=False))
+                for s in timings['spans']
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        return run_id
+
+    def get_run_timings(self, pipeline: str, record_id) -> Optional[Dict]:
+        """获取某条分析记录对应的最近一次耗时明细，不存在时返回 None"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id, subject, started_at, total_seconds FROM pipeline_runs
+            WHERE pipeline = ? AND record_id = ? ORDER BY id DESC LIMIT 1
+        ''', (pipeline, str(record_id)))
+        row = cursor.fetchone()
+        if not row:
+            conn.close()
+            return None
+        cursor.execute('''
+            SELECT name, category, parent, offset_seconds, duration, ok, detail FROM stage_spans
+            WHERE run_id = ? ORDER BY offset_seconds
+        ''', (row[0],))
+        spans = [
+            {'name': r[0], 'category': r[1], 'parent': r[2], 'offset': r[3], 'duration': r[4],
+             'ok': bool(r[5]), 'detail': json.loads(r[6]) if r[6] else {}}
+            for r in cursor.fetchall()
+        ]
+        conn.close()
+        return {'pipeline': pipeline, 'subject': row[1], 'started_at': row[2],
+                'total_seconds': row[3], 'spans': spans}
+
+    def get_stage_summary(self, pipeline: Optional[str] = None, days: int = 30) -> pd.DataFrame:
+        """
+        按阶段汇总耗时分布
+
+        Args:
+            pipeline: 流程名称，None 表示所有流程
+            days: 统计最近几天的数据
+
+        Returns:
+            DataFrame: 列为 pipeline, category, name, count, mean, p50, p95, max, failures，
+                       按 p95 降序；每个流程的总耗时以 name='total' 列出
+        """
+        since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        where = 'r.started_at >= ?'
+        params: List = [since]
+        if pipeline:
+            where += ' AND r.pipeline = ?'
+            params.append(pipeline)
+
+        conn = self.get_connection()
+        spans = pd.read_sql_query(f'''
+            SELECT r.pipeline, s.category, s.name, s.duration, s.ok
+            FROM stage_spans s JOIN pipeline_runs r ON s.run_id = r.id
+            WHERE {where}
+        ''', conn, params=params)
+        runs = pd.read_sql_query(f'''
+            SELECT r.pipeline, 'total' AS category, 'total' AS name, r.total_seconds AS duration, r.success AS ok
+            FROM pipeline_runs r WHERE {where}
+        ''', conn, params=params)
+        conn.close()
+
+        columns = ['pipeline', 'category', 'name', 'count', 'mean', 'p50', 'p95', 'max', 'failures']
+        df = pd.concat([runs, spans], ignore_index=True)
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+
+        grouped = df.groupby(['pipeline', 'category', 'name'])
+        summary = grouped['duration'].agg(
+            count='count',
+            mean='mean',
+            p50=lambda s: s.quantile(0.5),
+            p95=lambda s: s.quantile(0.95),
+            max='max'
+        )
+        summary['failures'] = grouped['ok'].apply(lambda s: int((s == 0).sum()))
+        summary = summary.reset_index().sort_values(['pipeline', 'p95'], ascending=[True, False])
+        return summary[columns].round(3).reset_index(drop=True)
+
+    def clear(self):
+        """清空耗时记录"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM stage_spans')
+        cursor.execute('DELETE FROM pipeline_runs')
+        conn.commit()
+        conn.close()
+
+
+# 全局耗时统计数据库实例（未启用或初始化失败时为None，耗时仍会返回给调用方但不持久化）
+stage_timing_db = None
+if STAGE_TIMING_ENABLED:
+    try:
+        stage_timing_db = StageTimingDatabase(STAGE_TIMING_DB_PATH)
+    except Exception as e:
+        print(f"⚠️ 耗时统计数据库初始化失败: {e}")
@@ -2,12 +2,14 @@ import yfinance as yf
 import akshare as ak
 import pandas as pd
 import numpy as np
-import ta
 from datetime import datetime, timedelta
 import requests
 import json
 import pywencai
 from data_source_manager import data_source_manager
+from spot_snapshot import spot_snapshot
+from technical_indicators import calculate_indicator_columns, format_latest_indicators, IndicatorPanel
+from indicator_state import indicator_states
 
 class StockDataFetcher:
     """股票数据获取类"""
@@ -143,38 +145,35 @@ class StockDataFetcher:
             
             # 方法2: 尝试获取实时价格和涨跌幅（如果网络允许）
             try:
-                # 使用更简单的接口获取实时价格
-                real_time_data = ak.stock_zh_a_spot_em()
-                if real_time_data is not None and not real_time_data.empty:
-                    stock_real_time = real_time_data[real_time_data['代码'] == symbol]
-                    if not stock_real_time.empty:
-                        row = stock_real_time.iloc[0]
-                        info['current_price'] = row.get('最新价', 'N/A')
-                        info['change_percent'] = row.get('涨跌幅', 'N/A')
-                        if info['name'] == '未知':
-                            info['name'] = row.get('名称', '未知')
-                        
-                        # 如果实时数据中有市盈率和市净率，优先使用
-                        if '市盈率-动态' in row and info['pe_ratio'] == 'N/A':
-                            try:
-                                pe_val = row['市盈率-动态']
-                                if pe_val and pe_val != '-':
-                                    pe_val = float(pe_val)
-                                    if 0 < pe_val <= 1000:
-                                        info['pe_ratio'] = pe_val
-                            except:
-                                pass
-                        
-                        if '市净率' in row and info['pb_ratio'] == 'N/A':
-                            try:
-                                pb_val = row['市净率']
-                                if pb_val and pb_val != '-':
-                                    pb_val = float(pb_val)
-                                    if 0 < pb_val <= 100:
-                                        info['pb_ratio'] = pb_val
-                            except:
-                                pass
-                                
+                # 从共享的全市场行情快照中定位该股票
+                row = spot_snapshot.get_a_row(symbol)
+                if row is not None:
+                    info['current_price'] = row.get('最新价', 'N/A')
+                    info['change_percent'] = row.get('涨跌幅', 'N/A')
+                    if info['name'] == '未知':
+                        info['name'] = row.get('名称', '未知')
+                    
+                    # 如果实时数据中有市盈率和市净率，优先使用
+                    if '市盈率-动态' in row and info['pe_ratio'] == 'N/A':
+                        try:
+                            pe_val = row['市盈率-动态']
+                            if pe_val and pe_val != '-':
+                                pe_val = float(pe_val)
+                                if 0 < pe_val <= 1000:
+                                    info['pe_ratio'] = pe_val
+                        except:
+                            pass
+                    
+                    if '市净率' in row and info['pb_ratio'] == 'N/A':
+                        try:
+                            pb_val = row['市净率']
+                            if pb_val and pb_val != '-':
+                                pb_val = float(pb_val)
+                                if 0 < pb_val <= 100:
+                                    info['pb_ratio'] = pb_val
+                        except:
+                            pass
+                            
             except Exception as e:
                 print(f"[Akshare] 获取实时数据失败: {e}")
                 # 如果实时数据获取失败，尝试使用数据源管理器获取历史数据（支持tushare备用）
@@ -264,34 +263,30 @@ class StockDataFetcher:
             
             # 方法1: 获取港股实时行情
             try:
-                # 使用akshare获取港股实时数据
-                realtime_df = ak.stock_hk_spot_em()
-                if realtime_df is not None and not realtime_df.empty:
-                    # 查找对应股票
-                    stock_data = realtime_df[realtime_df['代码'] == hk_code]
-                    if not stock_data.empty:
-                        row = stock_data.iloc[0]
-                        info['name'] = row.get('名称', '未知')
-                        info['current_price'] = row.get('最新价', 'N/A')
-                        info['change_percent'] = row.get('涨跌幅', 'N/A')
-                        
-                        # 市值（港元）
-                        market_cap = row.get('总市值', 'N/A')
-                        if market_cap != 'N/A':
-                            try:
-                                info['market_cap'] = float(market_cap)
-                            except:
-                                pass
-                        
-                        # 市盈率
-                        pe = row.get('市盈率', 'N/A')
-                        if pe != 'N/A' and pe != '-':
-                            try:
-                                pe_val = float(pe)
-                                if 0 < pe_val <= 1000:
-                                    info['pe_ratio'] = pe_val
-                            except:
-                                pass
+                # 从共享的港股行情快照中查找对应股票
+                row = spot_snapshot.get_hk_row(hk_code)
+                if row is not None:
+                    info['name'] = row.get('名称', '未知')
+                    info['current_price'] = row.get('最新价', 'N/A')
+                    info['change_percent'] = row.get('涨跌幅', 'N/A')
+                    
+                    # 市值（港元）
+                    market_cap = row.get('总市值', 'N/A')
+                    if market_cap != 'N/A':
+                        try:
+                            info['market_cap'] = float(market_cap)
+                        except:
+                            pass
+                    
+                    # 市盈率
+                    pe = row.get('市盈率', 'N/A')
+                    if pe != 'N/A' and pe != '-':
+                        try:
+                            pe_val = float(pe)
+                            if 0 < pe_val <= 1000:
+                                info['pe_ratio'] = pe_val
+                        except:
+                            pass
             except Exception as e:
                 print(f"获取港股实时数据失败: {e}")
             
@@ -523,71 +518,72 @@ class StockDataFetcher:
             return {"error": f"获取美股数据失败: {str(e)}"}
     
     def calculate_technical_indicators(self, df):
-        """计算技术指标"""
+        """计算技术指标（返回新的DataFrame，不修改传入的数据）"""
         try:
             if isinstance(df, dict) and "error" in df:
                 return df
-                
-            # 移动平均线
-            df['MA5'] = ta.trend.sma_indicator(df['Close'], window=5)
-            df['MA10'] = ta.trend.sma_indicator(df['Close'], window=10)
-            df['MA20'] = ta.trend.sma_indicator(df['Close'], window=20)
-            df['MA60'] = ta.trend.sma_indicator(df['Close'], window=60)
-            
-            # RSI
-            df['RSI'] = ta.momentum.rsi(df['Close'], window=14)
-            
-            # MACD
-            macd = ta.trend.MACD(df['Close'])
-            df['MACD'] = macd.macd()
-            df['MACD_signal'] = macd.macd_signal()
-            df['MACD_histogram'] = macd.macd_diff()
             
-            # 布林带
-            bollinger = ta.volatility.BollingerBands(df['Close'])
-            df['BB_upper'] = bollinger.bollinger_hband()
-            df['BB_middle'] = bollinger.bollinger_mavg()
-            df['BB_lower'] = bollinger.bollinger_lband()
-            
-            # KDJ指标
-            df['K'] = ta.momentum.stoch(df['High'], df['Low'], df['Close'])
-            df['D'] = ta.momentum.stoch_signal(df['High'], df['Low'], df['Close'])
-            
-            # 成交量指标
-            df['Volume_MA5'] = ta.trend.sma_indicator(df['Volume'], window=5)
-            df['Volume_ratio'] = df['Volume'] / df['Volume_MA5']
-            
-            return df
+            # MA5/10/20/60、RSI、MACD、布林带、KDJ、量比由指标内核一次性计算
+            return df.assign(**calculate_indicator_columns(df))
             
         except Exception as e:
             return {"error": f"计算技术指标失败: {str(e)}"}
     
-    def get_latest_indicators(self, df):
-        """获取最新的技术指标值"""
+    def get_latest_indicators(self, df, symbol=None):
+        """获取最新的技术指标值
+        
+        Args:
+            df: 日K线数据（可以已由 calculate_technical_indicators 计算指标列）
+            symbol: 股票代码；传入时指标从该股票的增量状态读取，只对新增（或盘中变化）的K线做增量计算，
+                    不传时直接读取 df 最后一行的指标列
+        """
         try:
             if isinstance(df, dict) and "error" in df:
                 return df
-                
+            
             latest = df.iloc[-1]
+            state = indicator_states.sync(symbol, df) if symbol else None
+            values = state.latest() if state is not None else latest
             
-            return {
-                "price": latest['Close'],
-                "ma5": latest['MA5'],
-                "ma10": latest['MA10'], 
-                "ma20": latest['MA20'],
-                "ma60": latest['MA60'],
-                "rsi": latest['RSI'],
-                "macd": latest['MACD'],
-                "macd_signal": latest['MACD_signal'],
-                "bb_upper": latest['BB_upper'],
-                "bb_lower": latest['BB_lower'],
-                "k_value": latest['K'],
-                "d_value": latest['D'],
-                "volume_ratio": latest['Volume_ratio']
-            }
+            return format_latest_indicators(latest['Close'], values)
         except Exception as e:
             return {"error": f"获取最新指标失败: {str(e)}"}
     
+    def get_panel_indicators(self, symbols, period="1y", max_workers=None):
+        """批量获取多只股票的日K线并一次性计算技术指标（用于选股、筛选等批量场景）
+        
+        Args:
+            symbols: 股票代码列表
+            period: 数据周期
+            max_workers: 并发获取K线的线程数，默认使用 ANALYSIS_MAX_WORKERS
+        
+        Returns:
+            tuple: (IndicatorPanel, 获取失败的股票及原因字典)；
+                   panel.latest_indicators(symbol) 返回与 get_latest_indicators 相同格式的字典
+        """
+        import concurrent.futures
+        from config import ANALYSIS_MAX_WORKERS
+        
+        frames = {}
+        errors = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or ANALYSIS_MAX_WORKERS) as executor:
+            futures = {executor.submit(self.get_stock_data, symbol, period): symbol for symbol in symbols}
+            for future in concurrent.futures.as_completed(futures):
+                symbol = futures[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    errors[symbol] = str(e)
+                    continue
+                if isinstance(df, dict):
+                    errors[symbol] = df.get("error", "无法获取历史数据")
+                else:
+                    frames[symbol] = df
+        
+        # 保持输入顺序
+        frames = {symbol: frames[symbol] for symbol in symbols if symbol in frames}
+        return IndicatorPanel.from_frames(frames), errors
+    
     def get_financial_data(self, symbol):
         """获取详细财务数据"""
         try:
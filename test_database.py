@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析记录数据库测试：历史记录摘要及分页、报告全文搜索
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+from database import StockAnalysisDatabase, REPORT_ROWID_SPAN
+
+
+# 升级前的 analysis_records 表结构
+LEGACY_SCHEMA = '''
+    CREATE TABLE analysis_records (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        symbol TEXT NOT NULL,
+        stock_name TEXT,
+        analysis_date TEXT NOT NULL,
+        period TEXT NOT NULL,
+        stock_info TEXT,
+        agents_results TEXT,
+        discussion_result TEXT,
+        final_decision TEXT,
+        created_at TEXT NOT NULL
+    )
+'''
+
+
+def create_legacy_db(db_path, rows):
+    """创建只有 analysis_records 表的旧数据库，rows 为 (symbol, stock_name, final_decision, created_at)"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(LEGACY_SCHEMA)
+    conn.executemany('''
+        INSERT INTO analysis_records
+        (symbol, stock_name, analysis_date, period, stock_info, agents_results, discussion_result, final_decision, created_at)
+        VALUES (?, ?, '2024-01-01 10:00:00', '1y', '{}', '{}', '""', ?, ?)
+    ''', [
+        (symbol, name, decision if isinstance(decision, str) else json.dumps(decision, ensure_ascii=False), created_at)
+        for symbol, name, decision, created_at in rows
+    ])
+    conn.commit()
+    conn.close()
+
+
+def test_summary_backfill_for_legacy_rows():
+    """升级前保存的记录在打开数据库时补建摘要，评级和价位从 final_decision 解析"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'legacy.db')
+        create_legacy_db(db_path, [
+            ('600000', '浦发银行', {
+                'rating': '买入', 'confidence_level': '8', 'target_price': '¥12.50元',
+                'entry_range': '10.2-10.8', 'take_profit': '13', 'stop_loss': '9.5元'
+            }, '2024-01-01T10:00:00'),
+            ('000001', '平安银行', {'rating': '卖出', 'entry_range': '11'}, '2024-01-02T10:00:00'),
+            ('600519', '贵州茅台', 'not json', '2024-01-03T10:00:00'),
+        ])
+
+        db = StockAnalysisDatabase(db_path)
+        records = {r['symbol']: r for r in db.get_all_records()}
+        assert db.get_record_count() == 3
+
+        first = records['600000']
+        assert first['rating'] == '买入'
+        assert first['confidence'] == 8.0
+        assert first['target_price'] == 12.5
+        assert (first['entry_min'], first['entry_max']) == (10.2, 10.8)
+        assert (first['take_profit'], first['stop_loss']) == (13.0, 9.5)
+
+        # 单个价位时进场区间上下限相同；缺失的字段为None
+        second = records['000001']
+        assert (second['entry_min'], second['entry_max']) == (11.0, 11.0)
+        assert second['target_price'] is None
+
+        # final_decision 无法解析时评级为"未知"
+        assert records['600519']['rating'] == '未知'
+
+        # 再次打开不会重复补建；新保存的记录同时写入摘要
+        db = StockAnalysisDatabase(db_path)
+        record_id = db.save_analysis('300750', '宁德时代', '1y', {}, {}, '', {'rating': '持有'})
+        assert db.get_record_count() == 4
+        assert db.get_records_page(limit=1)['records'][0]['id'] == record_id
+
+        assert db.delete_record(record_id)
+        assert db.get_record_count() == 3
+
+
+def test_keyset_paging_across_equal_created_at():
+    """created_at 相同的记录按ID区分先后，逐页翻完每条记录恰好出现一次"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'paging.db')
+        rows = [(f'6000{i:02d}', f'股票{i}', {'rating': '买入' if i % 2 else '持有'}, '2024-01-01T10:00:00')
+                for i in range(7)]
+        rows += [(f'0000{i:02d}', f'银行{i}', {'rating': '卖出'}, '2024-01-02T10:00:00') for i in range(3)]
+        create_legacy_db(db_path, rows)
+        db = StockAnalysisDatabase(db_path)
+
+        seen = []
+        cursor = None
+        while True:
+            page = db.get_records_page(limit=3, cursor=cursor)
+            assert len(page['records']) <= 3
+            seen.extend(r['id'] for r in page['records'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        # 较新的3条在前，同一时间的按ID倒序
+        assert seen == [10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+        # 筛选条件与分页组合
+        buys = []
+        cursor = None
+        while True:
+            page = db.get_records_page(limit=2, cursor=cursor, rating='买入')
+            buys.extend(r['id'] for r in page['records'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert buys == [6, 4, 2]
+        assert db.count_records(rating='买入') == 3
+
+
+def test_search_filters_by_symbol_or_name():
+    """按股票代码或名称模糊搜索，% 和 _ 按字面匹配"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'search.db')
+        create_legacy_db(db_path, [
+            ('600000', '浦发银行', {'rating': '买入'}, '2024-01-01T10:00:00'),
+            ('600036', '招商银行', {'rating': '持有'}, '2024-01-02T10:00:00'),
+            ('AAPL', 'Apple_Inc', {'rating': '买入'}, '2024-01-03T10:00:00'),
+        ])
+        db = StockAnalysisDatabase(db_path)
+
+        assert [r['symbol'] for r in db.get_records_page(search='6000')['records']] == ['600036', '600000']
+        assert db.count_records(search='浦发') == 1
+        assert db.count_records(search='银行') == 2
+        assert db.count_records(search='aapl') == 1
+        assert db.count_records(search='e_I') == 1
+        assert db.count_records(search='_') == 1
+        assert db.count_records(search='%') == 0
+        assert db.count_records(search='银行', rating='持有') == 1
+
+
+def save_report(db, symbol, name, risk_text, discussion=''):
+    """保存一条只含风险管理师报告的分析记录"""
+    agents_results = {'risk': {'agent_name': '风险管理师', 'analysis': risk_text}}
+    return db.save_analysis(symbol, name, '1y', {}, agents_results, discussion, {'rating': '持有'})
+
+
+def report_index_rows(db, record_id):
+    """某条记录在报告全文索引中的行数"""
+    conn = sqlite3.connect(db.db_path)
+    count = conn.execute('''
+        SELECT COUNT(*) FROM analysis_report_fts WHERE rowid BETWEEN ? AND ?
+    ''', (record_id * REPORT_ROWID_SPAN, (record_id + 1) * REPORT_ROWID_SPAN - 1)).fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_report_search_keywords():
+    """二字词、含单个汉字的混合关键词及单个汉字都能搜到"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = StockAnalysisDatabase(os.path.join(tmp_dir, 'reports.db'))
+        assert db.fts_enabled
+        spdb = save_report(db, '600000', '浦发银行', 'A股市场情绪回暖，大股东存在减持计划，注意商誉减值风险。')
+        pingan = save_report(db, '000001', '平安银行', '技术面偏弱，ST股风险较高。', discussion='团队建议观望')
+
+        def ids(query, **kwargs):
+            return [hit['id'] for hit in db.search_reports(query, **kwargs)]
+
+        assert ids('减持') == [spdb]
+        assert ids('商誉减值') == [spdb]
+        assert ids('A股') == [spdb]
+        assert ids('a股市场') == [spdb]
+        assert ids('ST股') == [pingan]
+        assert sorted(ids('股')) == sorted([spdb, pingan])
+        assert ids('观望') == [pingan]
+        assert ids('减持 观望') == []
+        assert ids('B股') == []
+
+        hit = db.search_reports('减持')[0]
+        assert hit['symbol'] == '600000'
+        assert hit['section'] == '风险管理师'
+        assert '【减持】' in hit['snippet']
+
+        # 代码/名称筛选与历史列表的搜索相同（模糊匹配）
+        assert ids('股', search='浦发') == [spdb]
+        assert ids('股', search='00001') == [pingan]
+
+
+def test_delete_record_removes_report_index():
+    """删除记录时同时删除其报告全文索引"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = StockAnalysisDatabase(os.path.join(tmp_dir, 'reports.db'))
+        record_id = save_report(db, '600000', '浦发银行', '大股东减持', discussion='限售解禁压力')
+        other_id = save_report(db, '600036', '招商银行', '大股东减持')
+        assert report_index_rows(db, record_id) == 2
+
+        assert db.delete_record(record_id)
+        assert report_index_rows(db, record_id) == 0
+        assert [hit['id'] for hit in db.search_reports('减持')] == [other_id]
+        assert db.search_reports('限售解禁') == []
+
+
+def test_report_index_backfill_for_legacy_rows():
+    """升级前保存的记录在打开数据库时建立报告全文索引"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'legacy.db')
+        create_legacy_db(db_path, [('600000', '浦发银行', {'rating': '买入'}, '2024-01-01T10:00:00')])
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            UPDATE analysis_records SET agents_results = ?, discussion_result = ?
+        ''', (json.dumps({'risk': {'agent_name': '风险管理师', 'analysis': '存在减持风险'}}, ensure_ascii=False),
+              json.dumps('团队讨论：A股情绪偏弱', ensure_ascii=False)))
+        conn.commit()
+        conn.close()
+
+        db = StockAnalysisDatabase(db_path)
+        assert [hit['id'] for hit in db.search_reports('减持')] == [1]
+        assert [hit['section'] for hit in db.search_reports('A股')] == ['团队讨论']
+
+
+if __name__ == "__main__":
+    test_summary_backfill_for_legacy_rows()
+    test_keyset_paging_across_equal_created_at()
+    test_search_filters_by_symbol_or_name()
+    test_report_search_keywords()
+    test_delete_record_removes_report_index()
+    test_report_index_backfill_for_legacy_rows()
+    print("✅ 分析记录数据库测试通过")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标增量状态测试
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from indicator_state import IndicatorStateStore
+from technical_indicators import compute_indicators
+
+
+def make_bars(n=320, seed=0):
+    """生成以交易日为索引的模拟日K线"""
+    rng = np.random.default_rng(seed)
+    close = 10 + np.cumsum(rng.normal(0, 0.2, n))
+    return pd.DataFrame({
+        'Close': close,
+        'High': close + rng.uniform(0.01, 0.3, n),
+        'Low': close - rng.uniform(0.01, 0.3, n),
+        'Volume': rng.uniform(1e5, 2e5, n),
+    }, index=pd.bdate_range('2024-01-01', periods=n))
+
+
+def assert_matches(state, df):
+    """状态的最新指标与对整段K线从头计算的结果一致"""
+    reference = compute_indicators(df['Close'].values, df['High'].values, df['Low'].values, df['Volume'].values)
+    latest = state.latest()
+    for column, values in reference.items():
+        if column not in latest:
+            continue
+        if math.isnan(values[-1]):
+            assert math.isnan(latest[column]), column
+        else:
+            assert abs(latest[column] - values[-1]) < 1e-8, column
+
+
+def test_shifted_window_appends_without_rebuild():
+    """滚动一年的窗口起点后移、末尾新增一根K线时，沿用原状态只追加一根"""
+    bars = make_bars()
+    store = IndicatorStateStore()
+
+    state = store.sync('600000', bars.iloc[0:300])
+    bar_count = state.bar_count
+
+    resumed = store.sync('600000', bars.iloc[1:301])
+    assert resumed is state
+    assert resumed.bar_count == bar_count + 1
+    # 状态延续了窗口之前的历史，等价于对全部K线从头计算
+    assert_matches(resumed, bars.iloc[0:301])
+
+
+def test_intraday_bar_replaced():
+    """当日K线在盘中变化时替换最后一根，不重建"""
+    bars = make_bars()
+    store = IndicatorStateStore()
+    state = store.sync('600000', bars.iloc[:300])
+
+    updated = bars.iloc[:300].copy()
+    updated.iloc[-1, updated.columns.get_loc('Close')] += 0.5
+    resumed = store.sync('600000', updated)
+    assert resumed is state
+    assert resumed.bar_count == 300
+    assert_matches(resumed, updated)
+
+
+def test_changed_history_rebuilds():
+    """历史K线变化（如复权）时按整段数据重建"""
+    bars = make_bars()
+    store = IndicatorStateStore()
+    state = store.sync('600000', bars.iloc[:300])
+
+    adjusted = bars.iloc[1:301].copy()
+    adjusted[['Close', 'High', 'Low']] *= 0.9
+    rebuilt = store.sync('600000', adjusted)
+    assert rebuilt is not state
+    assert_matches(rebuilt, adjusted)
+
+
+def test_gap_after_state_rebuilds():
+    """窗口不包含状态的最后一根K线时重建"""
+    bars = make_bars()
+    store = IndicatorStateStore()
+    state = store.sync('600000', bars.iloc[:100])
+
+    rebuilt = store.sync('600000', bars.iloc[150:300])
+    assert rebuilt is not state
+    assert_matches(rebuilt, bars.iloc[150:300])
+
+
+if __name__ == "__main__":
+    test_shifted_window_appends_without_rebuild()
+    test_intraday_bar_replaced()
+    test_changed_history_rebuilds()
+    test_gap_after_state_rebuilds()
+    print("✅ 技术指标增量状态测试通过")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite连接池测试
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from sqlite_pool import SQLiteConnectionPool, PooledConnection
+
+
+def make_pool(tmp_dir):
+    """创建连接池及带一张测试表的数据库"""
+    pool = SQLiteConnectionPool(timeout=5)
+    db_path = os.path.join(tmp_dir, 'pool_test.db')
+    conn = pool.connect(db_path)
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.commit()
+    conn.close()
+    return pool, db_path
+
+
+def test_close_returns_connection_to_pool():
+    """close() 归还连接，同一线程再次借出的是同一个连接，并已启用WAL"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool, db_path = make_pool(tmp_dir)
+        conn = pool.connect(db_path)
+        assert isinstance(conn, PooledConnection)
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        conn.close()
+
+        again = pool.connect(db_path)
+        assert again is conn
+        again.close()
+        pool.close_thread_connections()
+
+
+def test_close_rolls_back_uncommitted_transaction():
+    """未提交的事务在 close() 时回滚，不会带给下一个使用者"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool, db_path = make_pool(tmp_dir)
+        conn = pool.connect(db_path)
+        conn.execute("INSERT INTO items (name) VALUES ('未提交')")
+        assert conn.in_transaction
+        conn.close()
+
+        again = pool.connect(db_path)
+        assert again is conn
+        assert not again.in_transaction
+        assert again.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+
+        # 已提交的数据不受影响
+        again.execute("INSERT INTO items (name) VALUES ('已提交')")
+        again.commit()
+        again.close()
+        conn = pool.connect(db_path)
+        assert conn.execute('SELECT name FROM items').fetchall() == [('已提交',)]
+        conn.close()
+        pool.close_thread_connections()
+
+
+def test_close_resets_row_factory():
+    """使用者设置的 row_factory 在归还时重置"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool, db_path = make_pool(tmp_dir)
+        conn = pool.connect(db_path)
+        conn.execute("INSERT INTO items (name) VALUES ('a')")
+        conn.commit()
+        conn.row_factory = sqlite3.Row
+        assert isinstance(conn.execute('SELECT * FROM items').fetchone(), sqlite3.Row)
+        conn.close()
+
+        again = pool.connect(db_path)
+        assert again is conn
+        assert again.row_factory is None
+        assert again.execute('SELECT id, name FROM items').fetchone() == (1, 'a')
+        again.close()
+        pool.close_thread_connections()
+
+
+def test_nested_connections_and_idle_limit():
+    """嵌套借出时得到不同的连接，超过空闲上限的连接被真正关闭"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pool, db_path = make_pool(tmp_dir)
+        pool.max_idle = 1
+        outer = pool.connect(db_path)
+        inner = pool.connect(db_path)
+        assert inner is not outer
+        inner.close()
+        outer.close()
+
+        # 只保留了一个空闲连接，另一个已关闭
+        kept = pool.connect(db_path)
+        assert kept is inner
+        closed = [c for c in (outer, inner) if c is not kept][0]
+        try:
+            closed.execute('SELECT 1')
+            assert False, "超出空闲上限的连接应已关闭"
+        except sqlite3.ProgrammingError:
+            pass
+        kept.close()
+        pool.close_thread_connections()
+
+
+def test_memory_and_disabled_use_plain_connections():
+    """内存数据库及停用连接池时每次新建普通连接"""
+    pool = SQLiteConnectionPool(enabled=True)
+    conn = pool.connect(':memory:')
+    assert not isinstance(conn, PooledConnection)
+    conn.close()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        disabled = SQLiteConnectionPool(enabled=False)
+        conn = disabled.connect(os.path.join(tmp_dir, 'plain.db'))
+        assert not isinstance(conn, PooledConnection)
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_close_returns_connection_to_pool()
+    test_close_rolls_back_uncommitted_transaction()
+    test_close_resets_row_factory()
+    test_nested_connections_and_idle_limit()
+    test_memory_and_disabled_use_plain_connections()
+    print("✅ SQLite连接池测试通过")
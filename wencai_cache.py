@@ -0,0 +1,293 @@
+"""
+问财（pywencai）查询缓存模块
+以规范化问句及交易日为键，将查询结果缓存到本地数据库，按查询类型设置有效期；
+相同问句的并发查询共享同一次请求（单飞），同一交易日内重复分析不再请求问财
+"""
+
+import hashlib
+import json
+import pickle
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import config
+
+
+# 查询类型 -> 缓存有效期（秒）
+QUERY_TTLS = {
+    'risk': config.WENCAI_CACHE_TTL,
+    'announcement': config.WENCAI_CACHE_TTL,
+    'main_force': config.WENCAI_CACHE_TTL,
+    'news': config.WENCAI_NEWS_CACHE_TTL,
+}
+
+
+def normalize_query(query: str) -> str:
+    """规范化问句：全角转半角、去除空白、英文转小写"""
+    text = unicodedata.normalize('NFKC', query)
+    return re.sub(r'\s+', '', text).lower()
+
+
+def trading_date(now: datetime = None) -> str:
+    """当前所属交易日（周末归入上一个周五）"""
+    now = now or datetime.now()
+    if now.weekday() >= 5:
+        now -= timedelta(days=now.weekday() - 4)
+    return now.strftime('%Y-%m-%d')
+
+
+class WencaiQueryCache:
+    """问财查询结果的磁盘缓存"""
+
+    def __init__(self, db_path='wencai_cache.db', empty_ttl=3600):
+        """
+        初始化缓存
+
+        Args:
+            db_path: 数据库文件路径
+            empty_ttl: 无结果（返回None或空表）查询的有效期上限（秒），避免偶发失败影响整个交易日
+        """
+        self.db_path = db_path
+        self.empty_ttl = empty_ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self.init_database()
+
+    def get_connection(self):
+        """获取数据库连接"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def init_database(self):
+        """初始化数据库表"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS wencai_results (
+            cache_key TEXT PRIMARY KEY,
+            query_type TEXT NOT NULL,
+            query TEXT NOT NULL,
+            trading_date TEXT NOT NULL,
+            result BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_wencai_results_expires ON wencai_results(expires_at)')
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(query: str, date: str, params: Dict) -> str:
+        """计算查询的哈希键"""
+        payload = json.dumps(
+            {'query': normalize_query(query), 'date': date, 'params': params},
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, cache_key: str, count: bool = True) -> Optional[bytes]:
+        """
+        读取缓存
+
+        Args:
+            cache_key: 缓存键
+            count: 是否计入命中统计
+
+        Returns:
+            bytes: 序列化的查询结果（用 loads 还原），未命中或已过期时返回 None
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT result FROM wencai_results WHERE cache_key = ? AND expires_at > ?
+            ''', (cache_key, time.time()))
+            row = cursor.fetchone()
+        finally:
+            conn.close()
+
+        if count:
+            with self._stats_lock:
+                if row:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return row[0] if row else None
+
+    def set(self, cache_key: str, query_type: str, query: str, date: str, blob: bytes, ttl: int, empty: bool):
+        """写入缓存，并删除已过期的条目"""
+        now = time.time()
+        if empty:
+            ttl = min(ttl, self.empty_ttl)
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO wencai_results
+                (cache_key, query_type, query, trading_date, result, size, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (cache_key, query_type, query, date, blob, len(blob), now, now + ttl))
+            cursor.execute('DELETE FROM wencai_results WHERE expires_at <= ?', (now,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def dumps(result) -> bytes:
+        """序列化查询结果（DataFrame或包含DataFrame的字典）"""
+        return zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def loads(blob: bytes):
+        """还原查询结果，每次调用返回独立的副本"""
+        return pickle.loads(zlib.decompress(blob))
+
+    def stats(self) -> Dict:
+        """获取缓存统计信息（命中/未命中次数、按查询类型的有效条目数、总大小）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT query_type, COUNT(*), COALESCE(SUM(size), 0) FROM wencai_results
+            WHERE expires_at > ? GROUP BY query_type
+        ''', (time.time(),))
+        rows = cursor.fetchall()
+        conn.close()
+
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 2) if total > 0 else 0,
+            'entries': {r[0]: r[1] for r in rows},
+            'total_bytes': sum(r[2] for r in rows)
+        }
+
+    def clear(self, query_type: str = None):
+        """清空缓存（指定 query_type 时只清空该类型）"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        if query_type:
+            cursor.execute('DELETE FROM wencai_results WHERE query_type = ?', (query_type,))
+        else:
+            cursor.execute('DELETE FROM wencai_results')
+        conn.commit()
+        conn.close()
+
+
+# 全进程共享的问财查询缓存（未启用或初始化失败时为None）
+wencai_cache = None
+if config.WENCAI_CACHE_ENABLED:
+    try:
+        wencai_cache = WencaiQueryCache(config.WENCAI_CACHE_PATH, empty_ttl=config.WENCAI_EMPTY_CACHE_TTL)
+    except Exception as e:
+        print(f"⚠️ 问财查询缓存初始化失败: {e}")
+
+# 正在进行的查询：缓存键 -> Future（结果为序列化后的查询结果）
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# 全进程同时进行的问财请求上限（每次请求都会启动Node.js计算请求参数）
+wencai_semaphore = threading.BoundedSemaphore(config.WENCAI_MAX_CONCURRENCY)
+
+
+def _query_wencai(query: str, **kwargs):
+    """请求问财（受全进程并发上限约束）"""
+    import pywencai
+    with wencai_semaphore:
+        return pywencai.get(query=query, **kwargs)
+
+
+def _is_empty(result) -> bool:
+    if result is None:
+        return True
+    return bool(getattr(result, 'empty', False))
+
+
+def wencai_get(query: str, query_type: str = 'risk', **kwargs):
+    """
+    带缓存的 pywencai.get
+
+    同一交易日内相同问句（规范化后）直接返回缓存结果；并发的相同查询只请求一次问财，
+    其余调用方等待并共享结果。异常不缓存，原样抛出给所有等待的调用方。
+    实际发出的请求数受 WENCAI_MAX_CONCURRENCY 限制。
+
+    Args:
+        query: 问句
+        query_type: 查询类型，决定缓存有效期，见 QUERY_TTLS
+        **kwargs: 传给 pywencai.get 的其他参数（如 loop=True）
+
+    Returns:
+        与 pywencai.get 相同的返回值（每个调用方得到独立的副本）
+    """
+    date = trading_date()
+    cache_key = WencaiQueryCache.make_key(query, date, kwargs)
+
+    blob = _read_cache(cache_key)
+    if blob is not None:
+        return WencaiQueryCache.loads(blob)
+
+    with _inflight_lock:
+        future = _inflight.get(cache_key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[cache_key] = future
+
+    if not leader:
+        return WencaiQueryCache.loads(future.result())
+
+    try:
+        # 等锁期间上一次相同查询可能刚刚完成并写入缓存
+        blob = _read_cache(cache_key, count=False)
+        if blob is not None:
+            future.set_result(blob)
+            return WencaiQueryCache.loads(blob)
+
+        result = _query_wencai(query, **kwargs)
+        blob = WencaiQueryCache.dumps(result)
+        # 先写缓存再结束单飞，之后到达的调用方都能命中缓存
+        if wencai_cache is not None:
+            try:
+                wencai_cache.set(cache_key, query_type, query, date, blob,
+                                 QUERY_TTLS.get(query_type, config.WENCAI_CACHE_TTL), _is_empty(result))
+            except Exception as e:
+                print(f"⚠️ 写入问财查询缓存失败: {e}")
+        future.set_result(blob)
+        return result
+    except BaseException as e:
+        if not future.done():
+            future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(cache_key, None)
+
+
+def _read_cache(cache_key: str, count: bool = True) -> Optional[bytes]:
+    if wencai_cache is None:
+        return None
+    try:
+        return wencai_cache.get(cache_key, count)
+    except Exception as e:
+        print(f"⚠️ 读取问财查询缓存失败: {e}")
+        return None
+
+
+def get_wencai_cache_stats() -> Optional[Dict]:
+    """获取问财查询缓存的命中统计，缓存未启用时返回None"""
+    return wencai_cache.stats() if wencai_cache is not None else None